@@ -0,0 +1,127 @@
+"""
+Logging handlers that keep log I/O off the request threads.
+Configured by settings.LOGGING - this module must not import the apps, it's loaded before they're ready.
+"""
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import logging
+import os
+import queue
+import threading
+
+
+class _BlockingSentinelListener(QueueListener):
+    """
+    A QueueListener that waits for room in a full queue when stopped, instead of raising queue.Full.
+    """
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class QueueFileHandler(QueueHandler):
+    """
+    Writes records to a size-rotated file from a background thread, through a bounded queue.
+
+    Records are formatted by the background thread, so a record's arguments should be plain values that
+    aren't changed after they're logged (and never querysets - they'd be evaluated outside of the request).
+
+    When the queue is full, records below block_level are dropped right away and records at or above it
+    wait up to block_timeout seconds for room before they're dropped. Dropped records are counted and
+    reported by a warning once the queue has room again.
+
+    The rotation isn't coordinated between processes - when several workers share a log file, set backupCount
+    to 0 or rotate the file externally.
+    """
+    def __init__(self, filename, maxBytes: int = 0, backupCount: int = 0, encoding: str = None,
+                 queue_size: int = 10000, block_level='WARNING', block_timeout: float = 0.1) -> None:
+        """
+        Args:
+            filename: Path of the log file.
+            maxBytes (int, optional): Size to rotate the file at, 0 never rotates. Defaults to 0.
+            backupCount (int, optional): Amount of rotated files to keep. Defaults to 0.
+            encoding (str, optional): Encoding of the log file. Defaults to the locale's encoding.
+            queue_size (int, optional): Maximum amount of queued records. Defaults to 10000.
+            block_level (optional): The lowest level (name or number) of records that wait for room in a full queue. Defaults to 'WARNING'.
+            block_timeout (float, optional): Seconds to wait for room in a full queue. Defaults to 0.1.
+        """
+        super().__init__(queue.Queue(queue_size))
+        self.target = RotatingFileHandler(filename, maxBytes=maxBytes, backupCount=backupCount, encoding=encoding, delay=True)
+        self.block_level = block_level if isinstance(block_level, int) else logging.getLevelName(block_level.upper())
+        self.block_timeout = block_timeout
+        self.__dropped = 0
+        self.__dropped_lock = threading.Lock()
+        self.listener = None
+        self.__start_listener()
+        # A forked worker doesn't inherit the listener's thread
+        os.register_at_fork(after_in_child=self.__after_fork)
+
+    def __start_listener(self) -> None:
+        self.listener = _BlockingSentinelListener(self.queue, self.target, respect_handler_level=True)
+        self.listener.start()
+
+    def __after_fork(self) -> None:
+        if self.listener is None:
+            # Closed
+            return
+        self.queue = queue.Queue(self.queue.maxsize)
+        self.__dropped = 0
+        self.__dropped_lock = threading.Lock()
+        self.__start_listener()
+
+    @property
+    def dropped(self) -> int:
+        """
+        Amount of records dropped since the last report.
+        """
+        return self.__dropped
+
+    def setFormatter(self, fmt) -> None:
+        # Records are formatted by the file handler, in the listener's thread
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Leave the formatting to the listener's thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.__dropped:
+            self.__report_dropped()
+        try:
+            if record.levelno >= self.block_level:
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            with self.__dropped_lock:
+                self.__dropped += 1
+
+    def __report_dropped(self) -> None:
+        """
+        Queues a warning about the dropped records, if there's room for it.
+        """
+        with self.__dropped_lock:
+            if not self.__dropped:
+                # Reported by another thread
+                return
+            record = logging.LogRecord(
+                'django', logging.WARNING, __file__, 0,
+                "Dropped %d log records, the log queue was full", (self.__dropped,), None, func='enqueue'
+            )
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                return
+            self.__dropped = 0
+
+    def flush(self) -> None:
+        self.target.flush()
+
+    def close(self) -> None:
+        """
+        Writes the queued records and stops the listener.
+        """
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        self.target.close()
+        super().close()
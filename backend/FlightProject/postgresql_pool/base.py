@@ -0,0 +1,119 @@
+"""
+The PostgreSQL backend, with the connections borrowed from a psycopg connection pool shared by the process' threads.
+
+Django (4.2) opens a connection per thread, and keeps it for the thread's next requests for CONN_MAX_AGE seconds -
+which doesn't help under ASGI, where each request runs its sync code in a new thread. With a pool, a request borrows
+a connection on its first query and returns it when Django closes the connection at the end of the request.
+
+Configured like the pool of Django 5.1's backend, so it can be replaced by it: OPTIONS['pool'] holds the arguments of
+psycopg_pool.ConnectionPool (ie. min_size, max_size, timeout) and CONN_MAX_AGE must be 0, CONN_HEALTH_CHECKS checks
+each connection as it's borrowed. Without OPTIONS['pool'] it's the stock backend.
+"""
+from time import perf_counter
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base, creation
+from psycopg import IsolationLevel
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    """
+    Closes the pool before the test database is created or destroyed - its connections would keep the database in use,
+    or connect to the database the pool was created for.
+    """
+    def _create_test_db(self, verbosity, autoclobber, keepdb=False):
+        self.connection.close_pool()
+        return super()._create_test_db(verbosity, autoclobber, keepdb)
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        self.connection.close_pool()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+    # Alias -> ConnectionPool, shared by the wrappers of all threads
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+    @property
+    def pool(self):
+        """
+        The alias' connection pool (psycopg_pool.ConnectionPool), or None if it's not pooled.
+        Created on first use, so each gunicorn worker creates its own after it's forked.
+        """
+        options = self.settings_dict['OPTIONS'].get('pool')
+        if not options or self.alias == NO_DB_ALIAS:
+            return None
+        pool = DatabaseWrapper._pools.get(self.alias)
+        if pool is not None:
+            return pool
+        with DatabaseWrapper._pools_lock:
+            if self.alias not in DatabaseWrapper._pools:
+                if self.settings_dict['CONN_MAX_AGE'] != 0:
+                    raise ImproperlyConfigured("Pooled connections require CONN_MAX_AGE = 0, they're returned to the pool after each request.")
+                try:
+                    from psycopg_pool import ConnectionPool
+                except ImportError as e:
+                    raise ImproperlyConfigured("OPTIONS['pool'] requires the psycopg-pool package.") from e
+                DatabaseWrapper._pools[self.alias] = ConnectionPool(
+                    kwargs=self.get_connection_params(),
+                    name=self.alias,
+                    open=False,
+                    check=ConnectionPool.check_connection if self.settings_dict['CONN_HEALTH_CHECKS'] else None,
+                    **({} if options is True else options)
+                )
+            return DatabaseWrapper._pools[self.alias]
+
+    def close_pool(self) -> None:
+        """
+        Closes the alias' pool and its connections, it's recreated (with the current settings) on the next query.
+        """
+        with DatabaseWrapper._pools_lock:
+            pool = DatabaseWrapper._pools.pop(self.alias, None)
+        if pool is not None:
+            pool.close()
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop('pool', None)
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = IsolationLevel(options.get('isolation_level', IsolationLevel.READ_COMMITTED))
+        except ValueError:
+            raise ImproperlyConfigured(
+                f"Invalid transaction isolation level {options['isolation_level']} specified. Use one of the psycopg.IsolationLevel values."
+            )
+        # Opens the pool on the first connection (does nothing once it's open), it fills up in the background
+        pool.open()
+        # The backend is loaded while the apps' models are, before they can be imported
+        from FlightsApi.utils.instrumentation import Instrumentation, instrumentation_enabled
+        start = perf_counter()
+        failed = True
+        try:
+            connection = pool.getconn()
+            failed = False
+        finally:
+            if instrumentation_enabled():
+                # The time requests wait for a connection (errors are timeouts), listed with the repository's metrics
+                Instrumentation.record('ConnectionPool.getconn', perf_counter() - start, failed=failed)
+        if 'isolation_level' in options:
+            connection.isolation_level = self.isolation_level
+        return connection
+
+    def _close(self):
+        if self.connection is None or self.pool is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            # Rolls back an unfinished transaction, or discards a broken connection
+            self.pool.putconn(self.connection)
+        # Returned to the pool, even when closed in an atomic block
+        self.connection = None
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -52,6 +53,8 @@ REST_FRAMEWORK = {
 }
 
 MIDDLEWARE = [
+    # Removed from the chain unless PROFILING_ENABLED is set
+    'FlightsApi.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -59,6 +62,8 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Removed from the chain unless there are DATABASE_REPLICAS
+    'FlightsApi.middleware.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -89,19 +94,44 @@ APPEND_SLASH = False
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-
+# Connections of each worker process' pool (see FlightProject.postgresql_pool), 0 disables the pool.
+# The database's max_connections must fit the workers' pools (WEB_CONCURRENCY times this)
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 0))
+# Connections a pool keeps open while idle
+DB_POOL_MIN_SIZE = min(int(os.environ.get('DB_POOL_MIN_SIZE', 2)), DB_POOL_MAX_SIZE)
+# Seconds a request waits for a pooled connection before it fails
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'FlightProject.postgresql_pool',
         'HOST': os.environ.get('POSTGRES_HOST'),
         'PORT': 5432,
         'NAME': os.environ.get('POSTGRES_DB'),
         'USER': os.environ.get('POSTGRES_USER'),
-        'PASSWORD': os.environ.get('POSTGRES_PASSWORD')
+        'PASSWORD': os.environ.get('POSTGRES_PASSWORD'),
+        # Seconds a thread keeps its connection for its next requests (0 closes it after each request) - pooled connections
+        # are kept by the pool instead. Under ASGI every request runs in a new thread, use the pool there.
+        'CONN_MAX_AGE': 0 if DB_POOL_MAX_SIZE else int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        # Checks that a kept (or pooled) connection still works before using it, so a dropped connection doesn't fail the request
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', 'True').lower() not in ('false', '0'),
+        'OPTIONS': {
+            'pool': {'min_size': DB_POOL_MIN_SIZE, 'max_size': DB_POOL_MAX_SIZE, 'timeout': DB_POOL_TIMEOUT}
+        } if DB_POOL_MAX_SIZE else {}
     }
 }
 
+# Read replicas of the database (comma separated host[:port]), the repository's read-only methods read from a random one and
+# everything else from the primary ('default') - see FlightsApi.repository.replicas. Each replica has its own pool.
+DATABASE_REPLICAS = []
+for index, replica in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(','))):
+    host, _, port = replica.strip().partition(':')
+    DATABASES[f'replica_{index + 1}'] = {**DATABASES['default'], 'HOST': host, 'PORT': int(port or 5432), 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica_{index + 1}')
+DATABASE_ROUTERS = ['FlightsApi.repository.replicas.ReplicaRouter']
+# Seconds a session reads from the primary after it writes, so it sees its writes - longer than the replicas' lag
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -145,7 +175,81 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedStaticFilesStorage'
 # Authorization / Session settings
 ALLOWED_HOSTS = ['*', 'frontend', 'localhost', '']
 
-SESSION_ENGINE = "django.contrib.sessions.backends.db"
+# Sessions are read from the sessions cache and written through to the database (see FlightsApi.sessions), so an
+# authenticated request doesn't query the session table. 'django.contrib.sessions.backends.db' reads them from the database.
+SESSION_ENGINE = os.environ.get('SESSION_ENGINE', 'FlightsApi.sessions')
+SESSION_CACHE_ALIAS = 'sessions'
+
+# The caches shared by the worker processes: a Redis server (requires the redis package, and a maxmemory-policy that
+# doesn't evict keys) also shares them between hosts, otherwise they're files in a directory only the app's user can access
+SHARED_CACHE_REDIS_URL = os.environ.get('SHARED_CACHE_REDIS_URL')
+SHARED_CACHE_LOCATION = Path(os.environ.get('SHARED_CACHE_LOCATION', BASE_DIR / 'cache'))
+if SHARED_CACHE_REDIS_URL:
+    SESSIONS_CACHE = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': SHARED_CACHE_REDIS_URL, 'KEY_PREFIX': 'sessions'}
+    IDENTITIES_CACHE = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': SHARED_CACHE_REDIS_URL, 'KEY_PREFIX': 'identities'}
+else:
+    SESSIONS_CACHE = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': SHARED_CACHE_LOCATION / 'sessions',
+        'OPTIONS': {
+            # Culled sessions are read from the database again
+            'MAX_ENTRIES': int(os.environ.get('SESSION_CACHE_MAX_ENTRIES', 10000)),
+        },
+    }
+    IDENTITIES_CACHE = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': SHARED_CACHE_LOCATION / 'identities',
+        'OPTIONS': {
+            # Never culled - a culled invalidation time would let sessions keep a stale role. At most one entry per user.
+            'MAX_ENTRIES': sys.maxsize,
+        },
+    }
+
+CACHES = {
+    # Per process - the identity, country and flight caches are kept with their own expiry (or invalidated by signals)
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Shared, so a session that's logged out in one worker isn't kept in the others
+    'sessions': {**SESSIONS_CACHE, 'TIMEOUT': None},
+    # Shared, the times users' identities were invalidated (see FlightsApi.facades.identity_cache.SessionIdentity)
+    'identities': IDENTITIES_CACHE,
+}
+
+# Runtime type checks of the repository's arguments (see FlightsApi.utils.typechecking).
+# Checked when the functions are decorated (at import time), disable in production to remove their overhead.
+TYPE_CHECKS_ENABLED = os.environ.get('TYPE_CHECKS_ENABLED', 'True').lower() not in ('false', '0')
+# Call counts and latency histograms of the repository's methods (see FlightsApi.utils.instrumentation).
+# Checked when the functions are decorated (at import time), the methods aren't wrapped at all when disabled.
+INSTRUMENTATION_ENABLED = os.environ.get('INSTRUMENTATION_ENABLED', 'False').lower() not in ('false', '0')
+
+# Per-request SQL query count and DB/serialization timings of the API, reported in Server-Timing headers and the log (see FlightsApi.middleware)
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'False').lower() not in ('false', '0')
+# Requests that make more SQL queries than this are logged as warnings
+PROFILING_QUERY_BUDGET = int(os.environ.get('PROFILING_QUERY_BUDGET', 20))
+
+# Seconds to cache a logged in user's role and profile for facade resolution (see FlightsApi.facades.identity_cache)
+FACADE_IDENTITY_CACHE_TIMEOUT = int(os.environ.get('FACADE_IDENTITY_CACHE_TIMEOUT', 300))
+# Seconds to keep the countries in memory before reloading them (see FlightsApi.repository.country_registry)
+COUNTRY_REGISTRY_TIMEOUT = int(os.environ.get('COUNTRY_REGISTRY_TIMEOUT', 3600))
+# Seconds to keep the flight graph (itinerary search) before reloading it, to pick up changes made by other processes (see FlightsApi.repository.flight_graph)
+FLIGHT_GRAPH_TIMEOUT = int(os.environ.get('FLIGHT_GRAPH_TIMEOUT', 300))
+# Days of first flights' departures an itinerary search can cover, and the longest connection (in minutes) it can allow -
+# a search's work grows with both
+ITINERARY_MAX_DAYS = int(os.environ.get('ITINERARY_MAX_DAYS', 3))
+ITINERARY_MAX_CONNECTION = int(os.environ.get('ITINERARY_MAX_CONNECTION', 1440))
+# Hours of flights shown on the arrival/departure boards (see FlightsApi.repository.flight_boards)
+FLIGHT_BOARD_HOURS = int(os.environ.get('FLIGHT_BOARD_HOURS', 12))
+# Seconds to keep a board before reloading it, to pick up changes made by other processes
+FLIGHT_BOARD_TIMEOUT = int(os.environ.get('FLIGHT_BOARD_TIMEOUT', 300))
+# Seconds clients may cache the board endpoints' responses for
+FLIGHT_BOARD_MAX_AGE = int(os.environ.get('FLIGHT_BOARD_MAX_AGE', 15))
+# Seconds a board's event stream stays open before the client reconnects - each open stream holds a server thread
+FLIGHT_BOARD_STREAM_SECONDS = int(os.environ.get('FLIGHT_BOARD_STREAM_SECONDS', 300))
+# Seconds between keep-alive comments on an idle event stream
+FLIGHT_BOARD_HEARTBEAT = int(os.environ.get('FLIGHT_BOARD_HEARTBEAT', 15))
+# Seconds clients may cache the country endpoints' responses for
+COUNTRIES_MAX_AGE = int(os.environ.get('COUNTRIES_MAX_AGE', 3600))
 # SESSION_COOKIE_SAMESITE = 'None'
 # SESSION_COOKIE_SECURE = True
 
@@ -184,10 +288,18 @@ LOGGING = {
             "formatter": "basic",
         },
         "file": {
-            "level": "DEBUG",
-            "class": "logging.FileHandler",
+            # Written by a background thread through a bounded queue (see FlightProject.log_handlers)
+            "level": os.environ.get('LOG_FILE_LEVEL', 'DEBUG'),
+            "class": "FlightProject.log_handlers.QueueFileHandler",
             "filename": BASE_DIR / "exposed/logs/app.log",
-            "formatter": "timestamped"
+            "formatter": "timestamped",
+            # Size in bytes to rotate the log file at, and the amount of rotated files to keep
+            "maxBytes": int(os.environ.get('LOG_FILE_MAX_BYTES', 10 * 1024 * 1024)),
+            "backupCount": int(os.environ.get('LOG_FILE_BACKUP_COUNT', 5)),
+            # Records waiting to be written, when full debug/info records are dropped and warnings and errors wait a bit for room
+            "queue_size": int(os.environ.get('LOG_QUEUE_SIZE', 10000)),
+            "block_level": "WARNING",
+            "block_timeout": 0.1,
         },
     },
     "loggers": {
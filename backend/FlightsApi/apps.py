@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class FlightsapiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'FlightsApi'
+
+    def ready(self):
+        # Connect the signal receivers
+        from . import signals
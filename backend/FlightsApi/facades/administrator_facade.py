@@ -1,9 +1,11 @@
 # Python builtin imports
 from typing import Tuple
+from datetime import date as Date
 import logging
 
 # Django imports
 from django.core.exceptions import ValidationError
+from django.db import connections
 
 # App imports
 from FlightsApi.repository import Repository as R, DBTables, Paginate
@@ -11,6 +13,7 @@ from FlightsApi.repository import errors as RepoErrors
 from FlightsApi.utils.response_utils import conflict_response, not_found_response, bad_request_response, \
                             ok_response, created_response, internal_error_response, \
                             no_content_ok
+from FlightsApi.utils.instrumentation import Instrumentation, instrumentation_enabled
 
 # Local module imports
 from .facade_base import FacadeBase
@@ -18,11 +21,16 @@ from .facade_base import FacadeBase
 logger = logging.getLogger('django')
 
 class AdministratorFacade(FacadeBase):
-    def __init__(self, user: dict) -> None:
+    def __init__(self, user: dict, profile: dict = None) -> None:
+        """
+        Args:
+            user (dict): A serialized user.
+            profile (dict, optional): The user's serialized profile, fetched from the repository if not given.
+        """
         super().__init__()
-        self.__required_group = R.get_or_create_group('admin')
+        self.__required_group = None
         self.__user = user
-        self.__user['admin'] = R.get_by_user_id(DBTables.ADMIN, self.__user['id'])
+        self.__user['admin'] = profile if profile is not None else R.get_by_user_id(DBTables.ADMIN, self.__user['id'])
         
     @property
     def usertype(self):
@@ -46,6 +54,9 @@ class AdministratorFacade(FacadeBase):
         
     @property 
     def required_group(self):
+        # Fetched on demand, as most requests never need it
+        if self.__required_group is None:
+            self.__required_group = R.get_or_create_group('admin')
         return self.__required_group
     
     def get_customer_by_id(self, id: int):
@@ -71,20 +82,24 @@ class AdministratorFacade(FacadeBase):
             else:
                 return not_found_response()
     
-    def get_all_customers(self, limit: int = 50, page: int = 1) -> Tuple[int, dict]:
+    def get_all_customers(self, limit: int = 50, page: int = 1, cursor: str = None, count_total: bool = True) -> Tuple[int, dict]:
         """Gets all customers in the system
 
         Args:
             limit (int, optional): Pagination limit. Defaults to 50.
             page (int, optional): Pagination page. Defaults to 1.
+            cursor (str, optional): Pagination cursor, overrides the page if given. Defaults to None.
+            count_total (bool, optional): Whether to count the total amount of customers. Defaults to True.
 
         Returns:
             Tuple[int, dict]: A response tuple containing status code and data/errors.
         """
         # Retrieve Data
-        pagination = Paginate(per_page=limit, page_number=page)
+        pagination = Paginate(per_page=limit, page_number=page, cursor=cursor, count_total=count_total)
         try:
             data = R.get_all(DBTables.CUSTOMER, pagination)
+        except ValueError as e:
+            return bad_request_response(errors=e)
         except Exception as e:
             logger.error(e)
             return internal_error_response(errors=e)
@@ -95,6 +110,9 @@ class AdministratorFacade(FacadeBase):
     
     def get_airlines_by_name(self, name, limit, page):
         return super().get_airlines_by_name(name, limit, page, allow_deactivated=True)
+
+    async def aget_airlines_by_name(self, name, limit, page):
+        return await super().aget_airlines_by_name(name, limit, page, allow_deactivated=True)
         
         
     def add_airline(self, username, password, email, name: str, country_id: int) -> Tuple[int, dict]:
@@ -309,20 +327,92 @@ class AdministratorFacade(FacadeBase):
     
     
     
-    def get_users_by_usertype(self, usertype: str):
-        """Returns a list of users by usertype."""
+    def get_users_by_usertype(self, usertype: str, limit: int = 50, page: int = 1, cursor: str = None, count_total: bool = True) -> Tuple[int, dict]:
+        """Returns a page of users by usertype, each with its profile.
+
+        Args:
+            usertype (str): 'admins', 'airlines' or 'customers'.
+            limit (int, optional): Pagination limit. Defaults to 50.
+            page (int, optional): Pagination page. Defaults to 1.
+            cursor (str, optional): Pagination cursor, overrides the page if given. Defaults to None.
+            count_total (bool, optional): Whether to count the total amount of users. Defaults to True.
+
+        Returns:
+            Tuple[int, dict]: A response tuple containing status code and data/errors.
+        """
+        dbtable = AdministratorFacade.__usertype_table(usertype)
+        if dbtable is None:
+            return bad_request_response('Invalid usertype')
+
+        pagination = Paginate(per_page=limit, page_number=page, cursor=cursor, count_total=count_total)
+        try:
+            data = R.get_users_by_usertype(dbtable, pagination)
+        except ValueError as e:
+            return bad_request_response(errors=e)
+        except Exception as e:
+            logger.error(e)
+            return internal_error_response(errors=e)
+        return ok_response(data=data, pagination=pagination)
+
+    def export_customers(self) -> Tuple[int, dict]:
+        """Streams all the customers, for exporting.
+
+        Returns:
+            Tuple[int, dict]: A response tuple containing status code and data/errors.
+                              The data has the customers' field names under 'fields', and an iterator of the customers under 'rows'.
+        """
+        fields, rows = R.export(DBTables.CUSTOMER)
+        return ok_response(data={'fields': fields, 'rows': rows})
+
+    def export_flights(self, origin_country_id: int = None, destination_country_id: int = None, date: Date = None, airline_id: int = None, allow_cancelled: bool = True, expand: bool = False, min_seats: int = None) -> Tuple[int, dict]:
+        """Streams all the flights that fit the parameters (see get_flights_by_parameters), for exporting.
+
+        Args:
+            origin_country_id (int, optional): Id of the flight's origin country. Defaults to None.
+            destination_country_id (int, optional): Id of the flight's destination country. Defaults to None.
+            date (Date, optional): Date of departure. Defaults to None.
+            airline_id (int, optional): Id of the flight's operating airline. Defaults to None.
+            allow_cancelled (bool, optional): Whether to include cancelled flights. Defaults to True.
+            expand (bool, optional): Embed the airline's name and both countries in each flight. Defaults to False.
+            min_seats (int, optional): Minimum amount of remaining seats. Defaults to None.
+
+        Returns:
+            Tuple[int, dict]: A response tuple containing status code and data/errors.
+                              The data has the flights' field names under 'fields', and an iterator of the flights under 'rows'.
+        """
+        fields, rows = R.export_flights_by_parameters(origin_country_id, destination_country_id, date, airline_id, allow_cancelled, expand=expand, min_seats=min_seats)
+        return ok_response(data={'fields': fields, 'rows': rows})
+
+    def export_users_by_usertype(self, usertype: str) -> Tuple[int, dict]:
+        """Streams all the users of a usertype with their profiles, for exporting.
+
+        Args:
+            usertype (str): 'admins', 'airlines' or 'customers'.
+
+        Returns:
+            Tuple[int, dict]: A response tuple containing status code and data/errors.
+                              The data has the users' field names under 'fields', and an iterator of the users under 'rows'.
+        """
+        dbtable = AdministratorFacade.__usertype_table(usertype)
+        if dbtable is None:
+            return bad_request_response('Invalid usertype')
+        fields, rows = R.export_users_by_usertype(dbtable)
+        return ok_response(data={'fields': fields, 'rows': rows})
+
+    @staticmethod
+    def __usertype_table(usertype: str):
+        """
+        The profile table of a usertype in the users endpoints ('admins', 'airlines' or 'customers'), or None if it's invalid.
+        """
         match (usertype):
             case 'admins':
-                data = R.get_users_by_usertype(usertype=DBTables.ADMIN)
-                return ok_response(data)
+                return DBTables.ADMIN
             case 'airlines':
-                data = R.get_users_by_usertype(usertype=DBTables.AIRLINECOMPANY)
-                return ok_response(data)
+                return DBTables.AIRLINECOMPANY
             case 'customers':
-                data = R.get_users_by_usertype(usertype=DBTables.CUSTOMER)
-                return ok_response(data)
+                return DBTables.CUSTOMER
             case _:
-                return bad_request_response('Invalid usertype')
+                return None
     
     def deactivate_airline(self, airline_id: int) -> Tuple[int, dict]:
         """Deactivates an airline account
@@ -426,4 +516,33 @@ class AdministratorFacade(FacadeBase):
         if updated['is_active'] == False:
             return no_content_ok()
         else:
-            return internal_error_response('Failed to update administrator.')
\ No newline at end of file
+            return internal_error_response('Failed to update administrator.')
+
+    def get_repository_metrics(self) -> Tuple[int, dict]:
+        """Gets the repository's call counts and latency histograms, and the database connection pools' stats
+        (ie. requests_wait_ms - the total time requests waited for a connection), recorded by this process
+
+        Returns:
+            Tuple[int, dict]: A status code and data/errors dictionary
+        """
+        pools = {alias: pool.get_stats() for alias, pool in self.__connection_pools().items()}
+        return ok_response({'enabled': instrumentation_enabled(), 'methods': Instrumentation.snapshot(), 'pools': pools})
+
+
+    def reset_repository_metrics(self) -> Tuple[int, dict]:
+        """Clears the repository's recorded metrics
+
+        Returns:
+            Tuple[int, dict]: A status code and data/errors dictionary
+        """
+        Instrumentation.reset()
+        for pool in self.__connection_pools().values():
+            pool.pop_stats()
+        return no_content_ok()
+
+    @staticmethod
+    def __connection_pools() -> dict:
+        """
+        The connection pools of the pooled databases, by alias (see FlightProject.postgresql_pool).
+        """
+        return {alias: pool for alias in connections if (pool := getattr(connections[alias], 'pool', None)) is not None}
@@ -1,5 +1,5 @@
 # Python builtin imports
-from typing import Tuple
+from typing import List, Tuple
 from datetime import datetime
 import logging
 
@@ -19,11 +19,16 @@ from .facade_base import FacadeBase
 logger = logging.getLogger('django')
 
 class AirlineFacade(FacadeBase):
-    def __init__(self, user: dict) -> None:
+    def __init__(self, user: dict, profile: dict = None) -> None:
+        """
+        Args:
+            user (dict): A serialized user.
+            profile (dict, optional): The user's serialized profile, fetched from the repository if not given.
+        """
         super().__init__()
-        self.__required_group = R.get_or_create_group('airlinecompany')
+        self.__required_group = None
         self.__user = user
-        self.__user['airline'] = R.get_by_user_id(DBTables.AIRLINECOMPANY, self.__user['id'])
+        self.__user['airline'] = profile if profile is not None else R.get_by_user_id(DBTables.AIRLINECOMPANY, self.__user['id'])
     
     @property
     def usertype(self):
@@ -47,6 +52,9 @@ class AirlineFacade(FacadeBase):
     
     @property 
     def required_group(self):
+        # Fetched on demand, as most requests never need it
+        if self.__required_group is None:
+            self.__required_group = R.get_or_create_group('airlinecompany')
         return self.__required_group
 
     def get_my_flights(self, limit: int = 50, page: int = 0):
@@ -134,6 +142,44 @@ class AirlineFacade(FacadeBase):
 
         return created_response(data)
 
+    def add_flights(self, flights: List[Tuple[int, dict]], invalid_rows: List[dict] = None) -> Tuple[int, dict]:
+        """Add many new flights to the airline, in bulk.
+
+        Args:
+            flights (List[Tuple[int, dict]]): (Row number, flight fields) of the flights to add.
+                                              Flight fields are the same as add_flight's arguments, named like the Flight's fields.
+            invalid_rows (List[dict], optional): Reports of rows that already failed validation, to include in the results. Defaults to None.
+
+        Returns:
+            Tuple[int, dict]: A response tuple containing status code and a report of each row's result.
+                              Created if any of the flights was added, bad request otherwise.
+        """
+        rows = [{**flight, 'airline': int(self.entity_id)} for _, flight in flights]
+        try:
+            created, failed = R.add_all(DBTables.FLIGHT, rows)
+        except (ValueError, TypeError, ValidationError) as e:
+            logger.error(e)
+            return bad_request_response(errors=e)
+        except Exception as e:
+            logger.error(e)
+            return internal_error_response(errors=e)
+        
+        # Rows are created in order, so the created flights line up with the rows that didn't fail
+        failed_errors = {id(fields): errors for fields, errors in failed}
+        created_flights = iter(created)
+        results = list(invalid_rows or [])
+        for (row_number, _), fields in zip(flights, rows):
+            if id(fields) in failed_errors:
+                results.append({'row': row_number, 'errors': failed_errors[id(fields)]})
+            else:
+                results.append({'row': row_number, 'data': next(created_flights)})
+        results.sort(key=lambda result: result['row'])
+        
+        report = {'created': len(created), 'failed': len(results) - len(created), 'rows': results}
+        if not created:
+            return bad_request_response(errors=report)
+        return created_response(report)
+
     def update_flight(self, flight_id: int, **updated_fields) -> Tuple[int, dict]:
         """Update a flight owned by the airline
 
@@ -235,6 +281,18 @@ class AirlineFacade(FacadeBase):
             for airline in data['data']:
                 airline.pop('user', None)
         return code, data
+
+    async def aget_airlines_by_name(self, name: str = '',  limit: int = 50, page: int = 1) -> Tuple[int, dict]:
+        """
+        Async get_airlines_by_name(), removes the user information from it.
+        """
+        code, data = await super().aget_airlines_by_name(name, limit, page)
+        if code != 200:
+            return code, data
+        if 'data' in data:
+            for airline in data['data']:
+                airline.pop('user', None)
+        return code, data
     
     def get_airline_by_id(self, id: int):
         """Overrides FacadeBase's function and removes the user information from it.
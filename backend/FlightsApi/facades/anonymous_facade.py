@@ -1,8 +1,10 @@
 # Python builtin imports
 from typing import Tuple
 import logging
+import time
 
 # Django imports
+from asgiref.sync import sync_to_async
 from django.http import HttpRequest
 from django.core.exceptions import ValidationError
 
@@ -16,6 +18,7 @@ from FlightsApi.utils.response_utils import conflict_response, bad_request_respo
 # Local module imports
 from .errors import *
 from .facade_base import FacadeBase
+from .identity_cache import IdentityCache, SessionIdentity
 from .administrator_facade import AdministratorFacade
 from .airline_facade import AirlineFacade
 from .customer_facade import CustomerFacade
@@ -58,6 +61,7 @@ class AnonymousFacade(FacadeBase):
     @staticmethod
     def facade_from_user(user):
         """Returns a facade from a django user object.
+        The user's role and profile are cached (see IdentityCache), so resolving a known user's facade costs no queries.
 
         Args:
             user (django.contrib.auth.models.User): A user object used to determine which facade to retrieve.
@@ -68,6 +72,48 @@ class AnonymousFacade(FacadeBase):
         Returns:
             Union[AdministratorFacade, AirlineFacade, CustomerFacade, AnonymousFacade]: _description_
         """
+        return AnonymousFacade.__facade(AnonymousFacade.__identity(user))
+
+    @staticmethod
+    def __identity(user) -> dict:
+        """
+        A user's role and profile, from the identity cache or the repository.
+        """
+        identity = IdentityCache.get(user.id)
+        if identity is None:
+            identity = AnonymousFacade.__resolve_identity(user)
+            IdentityCache.set(user.id, identity)
+        return identity
+
+    @staticmethod
+    def __facade(identity: dict):
+        """
+        The facade of a user's role and profile.
+        """
+        # Return the right facade - copy the cached dictionaries as the facades extend them
+        match (identity['role']):
+            case 'admin':
+                return AdministratorFacade(dict(identity['user']), dict(identity['profile']))
+            case 'airline':
+                return AirlineFacade(dict(identity['user']), dict(identity['profile']))
+            case 'customer':
+                return CustomerFacade(dict(identity['user']), dict(identity['profile']))
+            case _:
+                return AnonymousFacade()
+    
+    @staticmethod
+    def __resolve_identity(user) -> dict:
+        """Finds a user's role and profile in the repository.
+
+        Args:
+            user (django.contrib.auth.models.User): A user object to resolve.
+
+        Raises:
+            RepositoryTransactionException: If failed to create/get permission groups.
+
+        Returns:
+            dict: A dictionary of role, serialized user and serialized profile.
+        """
         # Make sure the groups were created - this should happen once on the first facade fetch.
         if not AnonymousFacade.__groups_created:
             try:
@@ -80,22 +126,29 @@ class AnonymousFacade(FacadeBase):
             else:
                 AnonymousFacade.__groups_created = True
         
-        # Return the right facade
+        # Find the user's role
         if is_admin(user):
-            return AdministratorFacade(R.serialize_user(user))
+            role, table = 'admin', DBTables.ADMIN
         elif is_airline(user):
-            return AirlineFacade(R.serialize_user(user))
+            role, table = 'airline', DBTables.AIRLINECOMPANY
         elif is_customer(user):
-            return CustomerFacade(R.serialize_user(user))
+            role, table = 'customer', DBTables.CUSTOMER
+        elif user.is_superuser:
+            R.assign_group_to_user(user.id, 'admin')
+            role, table = 'admin', DBTables.ADMIN
         else:
-            if user.is_superuser:
-                R.assign_group_to_user(user.id, 'admin')
-                return AdministratorFacade(R.serialize_user(user))
-            return AnonymousFacade()
+            return {'role': 'anon', 'user': {}, 'profile': {}}
+        
+        return {
+            'role': role,
+            'user': R.serialize_user(user),
+            'profile': R.get_by_user_id(table, user.id)
+        }
         
     @staticmethod
     def login(request: HttpRequest) -> Tuple[FacadeBase, str]:
         """Logs a user in, returns the right facade for that user alongside an error message if there was an error.
+        The user's role and profile are stored in their session (see SessionIdentity), so resolving it costs no queries.
 
         Args:
             request (HttpRequest): An http request to login
@@ -105,13 +158,38 @@ class AnonymousFacade(FacadeBase):
         """
         # Get user from request
         user = request.user
-        if user.is_authenticated:
-            # Not anonymous user
-            facade = AnonymousFacade.facade_from_user(user)
-        else:
+        if not user.is_authenticated:
             # Anonymous user
-            facade = AnonymousFacade()
-        return facade
+            return AnonymousFacade()
+        # Not anonymous user - usually resolved from the session, which was read to authenticate the user
+        session = getattr(request, 'session', None)
+        if session is None:
+            # Authenticated without a session (ie. by a test's request)
+            return AnonymousFacade.facade_from_user(user)
+        identity = SessionIdentity.get(session, user.id)
+        if identity is None:
+            # Resolved from the repository - this process' identity cache may hold an identity invalidated by another process
+            resolved_at = time.time()
+            identity = AnonymousFacade.__resolve_identity(user)
+            IdentityCache.set(user.id, identity)
+            SessionIdentity.set(session, user.id, identity, resolved_at)
+        return AnonymousFacade.__facade(identity)
+
+    @staticmethod
+    async def alogin(request: HttpRequest) -> FacadeBase:
+        """Async login() for async views, the request's user must already be authenticated (see AsyncAPIView).
+
+        Args:
+            request (HttpRequest): An http request to login
+
+        Returns:
+            FacadeBase: The user's facade
+        """
+        user = request.user
+        if not user.is_authenticated:
+            return AnonymousFacade()
+        # Usually resolved from the session, a user that isn't stored in it is resolved with the (sync) ORM
+        return await sync_to_async(AnonymousFacade.login)(request)
         
     
     def add_customer(self, username, password, email, first_name, last_name, address, phone_number) -> Tuple[int, dict]:
@@ -205,6 +283,18 @@ class AnonymousFacade(FacadeBase):
                 airline.pop('user', None)
         # Return censored result
         return code, data
+
+    async def aget_airlines_by_name(self, name: str = '',  limit: int = 50, page: int = 1) -> Tuple[int, dict]:
+        """
+        Async get_airlines_by_name(), censoring the user information.
+        """
+        code, data = await super().aget_airlines_by_name(name, limit, page)
+        if code != 200:
+            return code, data
+        if 'data' in data:
+            for airline in data['data']:
+                airline.pop('user', None)
+        return code, data
     
     def get_airline_by_id(self, id: int):
         """Overrides FacadeBase's function and censors the user information from it.
@@ -224,3 +314,6 @@ class AnonymousFacade(FacadeBase):
 
     def get_flights_by_parameters(self, *args, **kwargs):
         return super().get_flights_by_parameters(*args, **kwargs, allow_cancelled = False)
+
+    async def aget_flights_by_parameters(self, *args, **kwargs):
+        return await super().aget_flights_by_parameters(*args, **kwargs, allow_cancelled = False)
@@ -18,11 +18,16 @@ from .facade_base import FacadeBase
 logger = logging.getLogger('django')
 
 class CustomerFacade(FacadeBase):
-    def __init__(self, user: dict) -> None:
+    def __init__(self, user: dict, profile: dict = None) -> None:
+        """
+        Args:
+            user (dict): A serialized user.
+            profile (dict, optional): The user's serialized profile, fetched from the repository if not given.
+        """
         super().__init__()
-        self.__required_group = R.get_or_create_group('customer')
+        self.__required_group = None
         self.__user = user
-        self.__user['customer'] = R.get_by_user_id(DBTables.CUSTOMER, self.__user['id'])
+        self.__user['customer'] = profile if profile is not None else R.get_by_user_id(DBTables.CUSTOMER, self.__user['id'])
         
     @property
     def usertype(self):
@@ -30,6 +35,9 @@ class CustomerFacade(FacadeBase):
         
     @property
     def required_group(self):
+        # Fetched on demand, as most requests never need it
+        if self.__required_group is None:
+            self.__required_group = R.get_or_create_group('customer')
         return self.__required_group
     
     @property
@@ -120,10 +128,12 @@ class CustomerFacade(FacadeBase):
         if not bookable:
             return conflict_response(errors=f'Cannot book flight because { reason }.')
         
-        # Create ticket
+        # Create ticket - the seats are reserved atomically, so a concurrent booking may still take them
         try:
             data, success = R.add(DBTables.TICKET, flight=flight_id, customer=int(self.entity_id), seat_count=seat_count)
-        except (ValueError, TypeError, ValidationError) as e:
+        except RepoErrors.FlightNotBookableException as e:
+            return conflict_response(errors=f'Cannot book flight because { e }.')
+        except (ValueError, TypeError, ValidationError, RepoErrors.OutOfBoundsException) as e:
             logger.error(e)
             return bad_request_response(errors=e)
         except Exception as e:
@@ -220,6 +230,18 @@ class CustomerFacade(FacadeBase):
                 airline.pop('user', None)
         # Return censored result
         return code, data
+
+    async def aget_airlines_by_name(self, name: str = '',  limit: int = 50, page: int = 1) -> Tuple[int, dict]:
+        """
+        Async get_airlines_by_name(), without the user information.
+        """
+        code, data = await super().aget_airlines_by_name(name, limit, page)
+        if code != 200:
+            return code, data
+        if 'data' in data:
+            for airline in data['data']:
+                airline.pop('user', None)
+        return code, data
     
     def get_airline_by_id(self, id: int):
         """Overrides FacadeBase's function and censors the user information from it.
@@ -239,4 +261,7 @@ class CustomerFacade(FacadeBase):
     
     
     def get_flights_by_parameters(self, *args, **kwargs):
-        return super().get_flights_by_parameters(*args, **kwargs, allow_cancelled = False)
\ No newline at end of file
+        return super().get_flights_by_parameters(*args, **kwargs, allow_cancelled = False)
+
+    async def aget_flights_by_parameters(self, *args, **kwargs):
+        return await super().aget_flights_by_parameters(*args, **kwargs, allow_cancelled = False)
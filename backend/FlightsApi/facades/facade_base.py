@@ -56,22 +56,27 @@ class FacadeBase():
         
     
     @staticmethod
-    def get_all_flights(limit: int = 50, page: int = 1) -> Tuple[int, dict]:
+    def get_all_flights(limit: int = 50, page: int = 1, cursor: str = None, count_total: bool = True) -> Tuple[int, dict]:
         """Fetches all flights (paginated) from the repository
 
         Args:
             limit (int, optional): Maximum amount of results per call. Defaults to 100.
             page (int, optional): Page number. Defaults to 1.
+            cursor (str, optional): Pagination cursor, overrides the page if given. Defaults to None.
+            count_total (bool, optional): Whether to count the total amount of flights. Defaults to True.
+            min_seats (int, optional): Minimum amount of remaining seats. Defaults to None.
 
         Returns:
             Tuple[int, dict]: Status code, data
         """
         # Initialize pagination
-        pagination = Paginate(per_page=limit, page_number=page)
+        pagination = Paginate(per_page=limit, page_number=page, cursor=cursor, count_total=count_total)
         
         # Fetch data
         try:
             data = R.get_all(DBTables.FLIGHT, pagination)
+        except ValueError as e:
+            return bad_request_response(errors=e)
         except Exception as e:
             logger.error(e)
             return internal_error_response(errors=e)
@@ -104,9 +109,33 @@ class FacadeBase():
         
         # Return response
         return ok_response(data=data)
+
+    @staticmethod
+    async def aget_flight_by_id(id: int) -> Tuple[int, dict]:
+        """Async get_flight_by_id() - fetches a flight from the repo by a given ID with the async ORM.
+
+        Args:
+            id (int): Flight ID
+
+        Returns:
+            Tuple[int, dict]: Status code, data
+        """
+        try:
+            data = await R.aget_by_id(DBTables.FLIGHT, id)
+        except RepoErrors.OutOfBoundsException as e:
+            logger.error(e)
+            return bad_request_response(errors=e)
+        except Exception as e:
+            logger.error(e)
+            return internal_error_response(errors=e)
+        
+        if not data: # Check if the result came up empty
+            return not_found_response(errors=RepoErrors.EntityNotFoundException())
+        
+        return ok_response(data=data)
     
     @staticmethod
-    def get_flights_by_parameters(origin_country_id: int = None, destination_country_id: int = None, date: Date = None, airline_id: int = None, limit: int = 50, page: int = 1, allow_cancelled: bool = True) -> Tuple[int, dict]:
+    def get_flights_by_parameters(origin_country_id: int = None, destination_country_id: int = None, date: Date = None, airline_id: int = None, limit: int = 50, page: int = 1, allow_cancelled: bool = True, expand: bool = False, cursor: str = None, count_total: bool = True, min_seats: int = None) -> Tuple[int, dict]:
         """Get all flights and filter by given parameters.
 
         Args:
@@ -116,16 +145,19 @@ class FacadeBase():
             airline_id (int, optional): Id of the flight's operating airline. Defaults to None.
             limit (int, optional): Pagination limit. Defaults to 50.
             page (int, optional): Pagination page. Defaults to 1.
+            expand (bool, optional): Embed the airline's name and both countries in each flight. Defaults to False.
+            cursor (str, optional): Pagination cursor, overrides the page if given. Defaults to None.
+            count_total (bool, optional): Whether to count the total amount of flights. Defaults to True.
 
         Returns:
             Tuple[int, dict]: Status code, data
         """
         # Initialize pagination
-        pagination = Paginate(limit, page)
+        pagination = Paginate(limit, page, cursor=cursor, count_total=count_total)
         
         # Fetch data and handle exceptions
         try:
-            data = R.get_flights_by_parameters(origin_country_id, destination_country_id, date, airline_id, allow_cancelled, pagination)
+            data = R.get_flights_by_parameters(origin_country_id, destination_country_id, date, airline_id, allow_cancelled, pagination, expand=expand, min_seats=min_seats)
         except ValueError as e:
             return bad_request_response(errors=e)
         except Exception as e:
@@ -134,7 +166,99 @@ class FacadeBase():
         
         # Return response
         return ok_response(data=data, pagination=pagination)
+
+    @staticmethod
+    async def aget_flights_by_parameters(origin_country_id: int = None, destination_country_id: int = None, date: Date = None, airline_id: int = None, limit: int = 50, page: int = 1, allow_cancelled: bool = True, expand: bool = False, cursor: str = None, count_total: bool = True, min_seats: int = None) -> Tuple[int, dict]:
+        """Async get_flights_by_parameters() - gets all flights and filters by given parameters with the async ORM.
+
+        Args:
+            origin_country_id (int, optional): Id of the flight's origin country. Defaults to None.
+            destination_country_id (int, optional): Id of the flight's destination country. Defaults to None.
+            date (Date, optional): Date of departure. Defaults to None.
+            airline_id (int, optional): Id of the flight's operating airline. Defaults to None.
+            limit (int, optional): Pagination limit. Defaults to 50.
+            page (int, optional): Pagination page. Defaults to 1.
+            expand (bool, optional): Embed the airline's name and both countries in each flight. Defaults to False.
+            cursor (str, optional): Pagination cursor, overrides the page if given. Defaults to None.
+            count_total (bool, optional): Whether to count the total amount of flights. Defaults to True.
+            min_seats (int, optional): Minimum amount of remaining seats. Defaults to None.
+
+        Returns:
+            Tuple[int, dict]: Status code, data
+        """
+        pagination = Paginate(limit, page, cursor=cursor, count_total=count_total)
+        try:
+            data = await R.aget_flights_by_parameters(origin_country_id, destination_country_id, date, airline_id, allow_cancelled, pagination, expand=expand, min_seats=min_seats)
+        except ValueError as e:
+            return bad_request_response(errors=e)
+        except Exception as e:
+            logger.error(e)
+            return internal_error_response(errors=e)
+        return ok_response(data=data, pagination=pagination)
+
+    @staticmethod
+    def get_itineraries(origin_country_id: int, destination_country_id: int, date_from: Date, date_to: Date = None, max_stops: int = 2, min_connection: int = 45, max_connection: int = 360, seats: int = 1, limit: int = 50, expand: bool = False) -> Tuple[int, dict]:
+        """Find direct and connecting itineraries between two countries.
+
+        Args:
+            origin_country_id (int): Id of the origin country.
+            destination_country_id (int): Id of the destination country.
+            date_from (Date): The first day the itinerary can depart on.
+            date_to (Date, optional): The last day the itinerary can depart on. Defaults to date_from.
+            max_stops (int, optional): Maximum connections, 0 to 2. Defaults to 2.
+            min_connection (int, optional): Minimum minutes between connecting flights. Defaults to 45.
+            max_connection (int, optional): Maximum minutes between connecting flights. Defaults to 360.
+            seats (int, optional): Seats required on each flight. Defaults to 1.
+            limit (int, optional): Maximum amount of itineraries. Defaults to 50.
+            expand (bool, optional): Embed the airline's name and both countries in each flight. Defaults to False.
+
+        Returns:
+            Tuple[int, dict]: Status code, data
+        """
+        try:
+            data = R.get_itineraries(
+                origin_country_id, destination_country_id, date_from, date_to or date_from,
+                max_stops=max_stops, min_connection=min_connection, max_connection=max_connection, seats=seats, limit=limit, expand=expand
+            )
+        except ValueError as e:
+            return bad_request_response(errors=e)
+        except Exception as e:
+            logger.error(e)
+            return internal_error_response(errors=e)
+        return ok_response(data=data)
         
+    @staticmethod
+    def get_flight_board(board: str, country_id: int, limit: int = 50, page: int = 1, cursor: str = None) -> Tuple[int, dict]:
+        """Gets the flights on a country's arrivals or departures board - those arriving/departing in the next 12 hours.
+
+        Args:
+            board (str): 'arrivals' or 'departures'.
+            country_id (int): ID of the country.
+            limit (int, optional): Pagination limit. Defaults to 50.
+            page (int, optional): Pagination page. Defaults to 1.
+            cursor (str, optional): Pagination cursor, overrides the page if given. Defaults to None.
+
+        Returns:
+            Tuple[int, dict]: Status code, data
+        """
+        pagination = Paginate(limit, page, cursor=cursor)
+        try:
+            if not R.get_by_id(DBTables.COUNTRY, country_id):
+                return not_found_response(errors=RepoErrors.EntityNotFoundException())
+            match (board):
+                case 'arrivals':
+                    data = R.get_arrival_flights(country_id, pagination)
+                case 'departures':
+                    data = R.get_departure_flights(country_id, pagination)
+                case _:
+                    return bad_request_response("Board must be 'arrivals' or 'departures'.")
+        except (ValueError, RepoErrors.OutOfBoundsException) as e:
+            return bad_request_response(errors=e)
+        except Exception as e:
+            logger.error(e)
+            return internal_error_response(errors=e)
+        return ok_response(data=data, pagination=pagination)
+
     @classmethod
     def get_all_airlines(cls, limit: int = 50, page: int = 1) -> Tuple[int, dict]:
         """Get all airlines
@@ -199,6 +323,26 @@ class FacadeBase():
         # Return response
         return ok_response(data=data, pagination=pagination)
 
+    @staticmethod
+    async def aget_airlines_by_name(name: str, limit: int = 50, page: int = 1, allow_deactivated = False) -> Tuple[int, dict]:
+        """Async get_airlines_by_name() - gets all airlines whos name contains a certain string with the async ORM.
+
+        Args:
+            name (str): String to search in the airlines' names.
+            limit (int, optional): Pagination limit. Defaults to 50.
+            page (int, optional): Pagination page. Defaults to 1.
+
+        Returns:
+            Tuple[int, dict]: Status code, data.
+        """
+        pagination = Paginate(limit, page)
+        try:
+            data = await R.aget_airlines_by_name(name, pagination, allow_deactivated)
+        except Exception as e:
+            logger.error(e)
+            return internal_error_response(errors=e)
+        return ok_response(data=data, pagination=pagination)
+
     @staticmethod
     def get_all_countries(limit: int = 50, page: int = 0) -> Tuple[int, dict]:
         """Gets all countries
@@ -222,6 +366,25 @@ class FacadeBase():
         
         # Return response
         return ok_response(data=data, pagination=pagination)
+
+    @staticmethod
+    async def aget_all_countries(limit: int = 50, page: int = 0) -> Tuple[int, dict]:
+        """Async get_all_countries() - gets all countries, loading them with the async ORM if required.
+
+        Args:
+            limit (int, optional): Pagination limit. Defaults to 50.
+            page (int, optional): Pagination page. Defaults to 0.
+
+        Returns:
+            Tuple[int, dict]: Status code, data
+        """
+        pagination = Paginate(per_page=limit, page_number=page)
+        try:
+            data = await R.aget_all(DBTables.COUNTRY, pagination)
+        except Exception as e:
+            logger.error(e)
+            return internal_error_response(errors=e)
+        return ok_response(data=data, pagination=pagination)
     
     @staticmethod
     def get_country_by_id(id: int) -> Tuple[int, dict]:
@@ -0,0 +1,119 @@
+# Python builtin imports
+from typing import Union
+import logging
+import time
+
+# Django imports
+from django.conf import settings
+from django.contrib.sessions.backends.base import SessionBase
+from django.core.cache import cache, caches
+
+logger = logging.getLogger('django')
+
+
+class IdentityCache():
+    """
+    Caches the role and profile that a user's facade is resolved from, keyed by user ID.
+    Uses the default cache backend (process-local unless configured otherwise) with a TTL
+    of settings.FACADE_IDENTITY_CACHE_TIMEOUT seconds. Entries are invalidated by signals (see FlightsApi.signals).
+    """
+    KEY_PREFIX = 'facade-identity'
+
+    @staticmethod
+    def key(user_id: int) -> str:
+        return f"{IdentityCache.KEY_PREFIX}:{user_id}"
+
+    @staticmethod
+    def get(user_id: int) -> Union[dict, None]:
+        """Gets a cached identity.
+
+        Args:
+            user_id (int): ID of the user
+
+        Returns:
+            Union[dict, None]: A dictionary of role, user and profile, or None if not cached.
+        """
+        return cache.get(IdentityCache.key(user_id))
+
+    @staticmethod
+    def set(user_id: int, identity: dict) -> None:
+        """Caches an identity.
+
+        Args:
+            user_id (int): ID of the user
+            identity (dict): A dictionary of role, user and profile
+        """
+        cache.set(IdentityCache.key(user_id), identity, getattr(settings, 'FACADE_IDENTITY_CACHE_TIMEOUT', 300))
+
+    @staticmethod
+    def invalidate(user_id: int) -> None:
+        """Removes a user's cached identity.
+
+        Args:
+            user_id (int): ID of the user
+        """
+        logger.debug("Invalidating the cached identity of user #%s", user_id)
+        cache.delete(IdentityCache.key(user_id))
+        SessionIdentity.invalidate(user_id)
+
+
+class SessionIdentity():
+    """
+    The role and profile of a logged in user, stored in their session (see AnonymousFacade.login) - sessions are read
+    from the session cache, so the user's facade is resolved without queries in any worker process.
+    Trusted for settings.FACADE_IDENTITY_CACHE_TIMEOUT seconds from when it was resolved, unless the user's identity was
+    invalidated since - the invalidation times are kept in the 'identities' cache, which the worker processes share and
+    which doesn't cull them.
+    """
+    SESSION_KEY = '_facade_identity'
+    INVALIDATED_KEY_PREFIX = 'facade-identity-invalidated'
+    CACHE_ALIAS = 'identities'
+
+    @staticmethod
+    def __invalidated_key(user_id: int) -> str:
+        return f"{SessionIdentity.INVALIDATED_KEY_PREFIX}:{user_id}"
+
+    @staticmethod
+    def get(session: SessionBase, user_id: int) -> Union[dict, None]:
+        """Gets the identity stored in a session.
+
+        Args:
+            session (SessionBase): The user's session
+            user_id (int): ID of the session's user
+
+        Returns:
+            Union[dict, None]: A dictionary of role, user and profile, or None if it's not stored, expired or invalidated.
+        """
+        stored = session.get(SessionIdentity.SESSION_KEY)
+        if stored is None or stored['user_id'] != user_id:
+            return None
+        resolved_at = stored['resolved_at']
+        if time.time() - resolved_at > getattr(settings, 'FACADE_IDENTITY_CACHE_TIMEOUT', 300):
+            return None
+        invalidated_at = caches[SessionIdentity.CACHE_ALIAS].get(SessionIdentity.__invalidated_key(user_id))
+        if invalidated_at is not None and invalidated_at >= resolved_at:
+            return None
+        return stored['identity']
+
+    @staticmethod
+    def set(session: SessionBase, user_id: int, identity: dict, resolved_at: float) -> None:
+        """Stores an identity in a session, it's saved with the session at the end of the request.
+
+        Args:
+            session (SessionBase): The user's session
+            user_id (int): ID of the session's user
+            identity (dict): A dictionary of role, user and profile
+            resolved_at (float): When the identity started resolving (time.time()), changes made since invalidate it
+        """
+        session[SessionIdentity.SESSION_KEY] = {'user_id': user_id, 'resolved_at': resolved_at, 'identity': identity}
+
+    @staticmethod
+    def invalidate(user_id: int) -> None:
+        """Invalidates the identities of a user stored in their sessions until now.
+
+        Args:
+            user_id (int): ID of the user
+        """
+        # Older identities expire by themselves after the timeout
+        timeout = getattr(settings, 'FACADE_IDENTITY_CACHE_TIMEOUT', 300)
+        caches[SessionIdentity.CACHE_ALIAS].set(SessionIdentity.__invalidated_key(user_id), time.time(), timeout)
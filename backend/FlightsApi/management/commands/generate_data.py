@@ -0,0 +1,280 @@
+import json
+import random
+import tempfile
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from FlightsApi.models import Country, User, Admin, AirlineCompany, Customer, Flight, Ticket
+from FlightsApi.repository import DBTables
+
+
+FIRST_NAMES = ['Noa', 'Liam', 'Maya', 'Omer', 'Emma', 'Ariel', 'Sofia', 'Daniel', 'Yael', 'Lucas',
+               'Tamar', 'Mateo', 'Olivia', 'Itai', 'Aisha', 'Kenji', 'Elena', 'Ravi', 'Chloe', 'Jonas']
+LAST_NAMES = ['Cohen', 'Levi', 'Smith', 'Garcia', 'Mizrahi', 'Müller', 'Rossi', 'Tanaka', 'Novak', 'Silva',
+              'Peretz', 'Nielsen', 'Dubois', 'Kowalski', 'Haddad', 'Johnson', 'Ivanova', 'Kaur', 'Okafor', 'Berg']
+COLORS = ['red', 'blue', 'green', 'orange', 'purple', 'black', 'white', 'silver', 'golden', 'brown']
+ANIMALS = ['goose', 'gorilla', 'fish', 'tiger', 'panda', 'eagle', 'wolf', 'koala', 'lion', 'rabbit']
+STREETS = ['Herzl St', 'Main St', 'Oak Ave', 'Rothschild Blvd', 'High St', 'Park Rd', 'Elm St', 'Lake Dr']
+CITIES = ['Tel Aviv', 'Haifa', 'Berlin', 'Lisbon', 'Osaka', 'Austin', 'Lyon', 'Oslo', 'Nairobi', 'Pune']
+
+
+class Command(BaseCommand):
+    help = "Generates random admins, airlines, customers, flights and tickets straight through the database, " \
+           "and writes their credentials (and the generated entities) to a JSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--admins', type=int, default=0, help="Number of admins to generate.")
+        parser.add_argument('--airlines', type=int, default=0, help="Number of airlines to generate.")
+        parser.add_argument('--customers', type=int, default=0, help="Number of customers to generate.")
+        parser.add_argument('--flights', type=int, default=0, help="Number of flights to generate per airline.")
+        parser.add_argument('--tickets', type=int, default=0, help="Maximum number of tickets to generate per flight (as long as there are seats).")
+        parser.add_argument('--seed', type=int, default=None, help="Random seed, for reproducible data.")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Number of rows inserted at a time.")
+        parser.add_argument('--passwords', type=int, default=10,
+                            help="Number of distinct passwords the users share. Each is only hashed once, as hashing is slow by design.")
+        parser.add_argument('--output', default=str(settings.BASE_DIR / 'exposed/generated_data/output.json'),
+                            help="Path of the output file.")
+        parser.add_argument('--credentials-only', action='store_true',
+                            help="Only write the users to the output file, without the flights and tickets.")
+        parser.add_argument('--no-copy', action='store_true', help="Insert with bulk_create even when COPY is available.")
+
+    def handle(self, *args, **options):
+        for option in ('admins', 'airlines', 'customers', 'flights', 'tickets'):
+            if options[option] < 0:
+                raise CommandError(f"--{option} cannot be negative.")
+        if options['batch_size'] <= 0 or options['passwords'] <= 0:
+            raise CommandError("--batch-size and --passwords must be positive.")
+        self.__random = random.Random(options['seed'])
+        self.__batch_size = options['batch_size']
+        self.__use_copy = connection.vendor == 'postgresql' and not options['no_copy']
+        self.__country_ids = list(Country.objects.order_by('id').values_list('id', flat=True))
+        if options['airlines'] and len(self.__country_ids) < 2:
+            raise CommandError("At least 2 countries are required to generate airlines and flights (python manage.py loaddata countries).")
+
+        # Hash every password once, users get one of them at random
+        self.__passwords = []
+        for _ in range(options['passwords']):
+            password = f"Aa1!{self.__random.choice(COLORS)}{self.__random.randint(1000, 9999)}"
+            self.__passwords.append((password, make_password(password)))
+
+        self.stdout.write(f"Output file is '{options['output']}'.")
+        with open(options['output'], 'w') as output:
+            output.write('{\n')
+            with transaction.atomic():
+                admins = self.__generate_admins(options['admins'])
+                airlines = self.__generate_airlines(options['airlines'])
+                customers = self.__generate_customers(options['customers'])
+            for key, entities in (('admins', admins), ('airlines', airlines), ('customers', customers)):
+                output.write(f'"{key}": ')
+                json.dump(entities, output, indent=4)
+                output.write(',\n')
+
+            # Flights and tickets are written as they're generated, as there might be millions of them
+            with tempfile.TemporaryFile('w+') as tickets_output:
+                output.write('"flights": {')
+                customer_ids = [customer['customer']['id'] for customer in customers]
+                flight_count, ticket_count = 0, 0
+                for index, airline in enumerate(airlines):
+                    if not options['credentials_only']:
+                        output.write(f'{"," if index else ""}\n"{airline["airline"]["id"]}": [')
+                    generated = self.__generate_flights(airline['airline']['id'], options['flights'], customer_ids, options['tickets'],
+                                                        None if options['credentials_only'] else output,
+                                                        None if options['credentials_only'] else tickets_output)
+                    flight_count += generated[0]
+                    ticket_count += generated[1]
+                    if not options['credentials_only']:
+                        output.write(']')
+                    self.stdout.write(f"Created {flight_count} flights and {ticket_count} tickets...")
+                output.write('\n},\n"tickets": {')
+                tickets_output.seek(0)
+                for chunk in iter(lambda: tickets_output.read(1 << 20), ''):
+                    output.write(chunk)
+                output.write('\n}\n}\n')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(admins)} admins, {len(airlines)} airlines, {len(customers)} customers, {flight_count} flights and {ticket_count} tickets."
+        ))
+
+    def __generate_users(self, count: int, group_name: str) -> list:
+        """
+        Creates users in a group.
+
+        Returns:
+            list: (User, Password) tuples of the created users.
+        """
+        if not count:
+            return []
+        group, _ = Group.objects.get_or_create(name=group_name)
+        # Continue from the existing users, so generating again doesn't clash with earlier usernames
+        start = (User.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+        users = []
+        for index in range(start, start + count):
+            first_name, last_name = self.__random.choice(FIRST_NAMES), self.__random.choice(LAST_NAMES)
+            password, password_hash = self.__random.choice(self.__passwords)
+            user = User(
+                username=f"{self.__random.choice(COLORS)}{self.__random.choice(ANIMALS)}{index}",
+                email=f"{first_name}.{last_name}{index}@example.com".lower(),
+                password=password_hash
+            )
+            # Kept on the instance for the profile
+            user.generated_name = (first_name, last_name)
+            users.append((user, password))
+        for batch in self.__batches(users):
+            User.objects.bulk_create([user for user, _ in batch])
+        memberships = [User.groups.through(user_id=user.pk, group_id=group.pk) for user, _ in users]
+        User.groups.through.objects.bulk_create(memberships, batch_size=self.__batch_size)
+        return users
+
+    def __generate_admins(self, count: int) -> list:
+        users = self.__generate_users(count, 'admin')
+        admins = [Admin(first_name=user.generated_name[0], last_name=user.generated_name[1], user=user) for user, _ in users]
+        Admin.objects.bulk_create(admins, batch_size=self.__batch_size)
+        self.stdout.write(f"Created {len(admins)} admins...")
+        return self.__serialize_profiles('admin', DBTables.ADMIN, admins, users)
+
+    def __generate_airlines(self, count: int) -> list:
+        users = self.__generate_users(count, 'airline')
+        airlines = [
+            AirlineCompany(name=f"{' '.join(user.generated_name)} Airlines", country_id=self.__random.choice(self.__country_ids), user=user)
+            for user, _ in users
+        ]
+        AirlineCompany.objects.bulk_create(airlines, batch_size=self.__batch_size)
+        self.stdout.write(f"Created {len(airlines)} airlines...")
+        return self.__serialize_profiles('airline', DBTables.AIRLINECOMPANY, airlines, users)
+
+    def __generate_customers(self, count: int) -> list:
+        users = self.__generate_users(count, 'customer')
+        customers = [
+            Customer(
+                first_name=user.generated_name[0],
+                last_name=user.generated_name[1],
+                address=f"{self.__random.randint(1, 300)} {self.__random.choice(STREETS)}, {self.__random.choice(CITIES)}",
+                # Unique like the username
+                phone_number=f"050-{user.pk:08d}",
+                user=user
+            ) for user, _ in users
+        ]
+        Customer.objects.bulk_create(customers, batch_size=self.__batch_size)
+        self.stdout.write(f"Created {len(customers)} customers...")
+        return self.__serialize_profiles('customer', DBTables.CUSTOMER, customers, users)
+
+    def __serialize_profiles(self, key: str, dbtable: DBTables, profiles: list, users: list) -> list:
+        """
+        Serializes profiles alongside their users and passwords, in the output file's format.
+        """
+        serialized_users = {}
+        serialized_profiles = []
+        for batch in self.__batches(list(zip(profiles, users))):
+            user_ids = [user.pk for _, (user, _) in batch]
+            for user in DBTables.USER.values_serializer.serialize_query(User.objects.filter(pk__in=user_ids)):
+                serialized_users[user['id']] = user
+            serialized_profiles.extend(
+                dbtable.values_serializer.serialize_query(dbtable.model.objects.filter(pk__in=[profile.pk for profile, _ in batch]).order_by('pk'))
+            )
+        result = []
+        for profile, (user, password) in zip(serialized_profiles, users):
+            result.append({key: profile, 'user': {**serialized_users[user.pk], 'password': password}})
+        return result
+
+    def __generate_flights(self, airline_id: int, count: int, customer_ids: list, max_tickets: int, output, tickets_output) -> tuple:
+        """
+        Creates an airline's flights and their tickets, a batch of flights at a time.
+        The flights and tickets are written to the outputs if given.
+
+        Returns:
+            tuple: Number of created flights and tickets.
+        """
+        now = timezone.now()
+        flight_count, ticket_count = 0, 0
+        remaining = count
+        while remaining > 0:
+            batch_size = min(self.__batch_size, remaining)
+            remaining -= batch_size
+            flights = []
+            flight_tickets = []
+            for _ in range(batch_size):
+                origin, destination = self.__random.sample(self.__country_ids, 2)
+                departure = now + timedelta(seconds=self.__random.randrange(156 * 7 * 24 * 60 * 60))
+                arrival = departure + timedelta(minutes=self.__random.randint(30, 48 * 60))
+                flight = Flight(airline_id=airline_id, origin_country_id=origin, destination_country_id=destination,
+                                departure_datetime=departure, arrival_datetime=arrival, total_seats=self.__random.randint(50, 300))
+                # Book seats while there are any, keeping the flight's counter in line with its tickets
+                tickets = []
+                if customer_ids:
+                    for _ in range(max_tickets):
+                        seat_count = self.__random.randint(1, 5)
+                        if flight.booked_seats + seat_count > flight.total_seats:
+                            break
+                        flight.booked_seats += seat_count
+                        tickets.append(Ticket(customer_id=self.__random.choice(customer_ids), seat_count=seat_count))
+                flights.append(flight)
+                flight_tickets.append(tickets)
+
+            with transaction.atomic():
+                self.__insert(Flight, flights)
+                all_tickets = []
+                for flight, tickets in zip(flights, flight_tickets):
+                    for ticket in tickets:
+                        ticket.flight_id = flight.pk
+                    all_tickets.extend(tickets)
+                for batch in self.__batches(all_tickets):
+                    self.__insert(Ticket, batch)
+
+            if output:
+                self.__write_flights(flights, flight_tickets, flight_count > 0, output, tickets_output)
+            flight_count += len(flights)
+            ticket_count += len(all_tickets)
+        return flight_count, ticket_count
+
+    def __write_flights(self, flights: list, flight_tickets: list, has_previous: bool, output, tickets_output) -> None:
+        """
+        Writes a batch of flights, and their tickets (by flight) to the outputs.
+        """
+        serialized = DBTables.FLIGHT.values_serializer.serialize_query(Flight.objects.filter(pk__in=[flight.pk for flight in flights]).order_by('pk'))
+        output.write((',' if has_previous else '') + ','.join(json.dumps(flight) for flight in serialized))
+        ticket_ids = [ticket.pk for tickets in flight_tickets for ticket in tickets]
+        serialized_tickets = {}
+        for batch in self.__batches(ticket_ids):
+            for ticket in DBTables.TICKET.values_serializer.serialize_query(Ticket.objects.filter(pk__in=batch)):
+                serialized_tickets[ticket['id']] = ticket
+        for flight, tickets in zip(flights, flight_tickets):
+            separator = ',' if tickets_output.tell() else ''
+            tickets_output.write(f'{separator}\n"{flight.pk}": {json.dumps([serialized_tickets[ticket.pk] for ticket in tickets])}')
+
+    def __insert(self, model, instances: list) -> None:
+        """
+        Inserts instances, setting their primary keys.
+        Uses COPY on PostgreSQL (unless disabled), which is several times faster than a multi-row INSERT.
+        """
+        if not instances:
+            return
+        if not self.__use_copy:
+            model.objects.bulk_create(instances)
+            return
+        table = model._meta.db_table
+        fields = model._meta.concrete_fields
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            # Reserve the primary keys from the table's sequence, so the rows can reference each other
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)",
+                [quote(table), model._meta.pk.column, len(instances)]
+            )
+            for instance, (pk,) in zip(instances, cursor.fetchall()):
+                instance.pk = pk
+            columns = ', '.join(quote(field.column) for field in fields)
+            with cursor.copy(f"COPY {quote(table)} ({columns}) FROM STDIN") as copy:
+                for instance in instances:
+                    copy.write_row([field.get_db_prep_save(getattr(instance, field.attname), connection) for field in fields])
+
+    def __batches(self, items: list):
+        iterator = iter(items)
+        while batch := list(islice(iterator, self.__batch_size)):
+            yield batch
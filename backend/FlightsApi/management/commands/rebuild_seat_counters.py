@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from FlightsApi.repository import Repository as R
+
+
+class Command(BaseCommand):
+    help = "Recalculates every flight's booked seats counter from its non-cancelled tickets."
+
+    def handle(self, *args, **options):
+        corrected = R.rebuild_booked_seats()
+        self.stdout.write(self.style.SUCCESS(f"Corrected the booked seats counter of {corrected} flight(s)."))
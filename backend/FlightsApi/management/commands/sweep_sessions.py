@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from FlightsApi.sessions import SessionStore
+
+
+class Command(BaseCommand):
+    help = "Deletes the expired sessions a batch at a time, once or every --interval seconds."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Sessions to delete at a time.")
+        parser.add_argument('--interval', type=int, default=0, help="Seconds between sweeps, 0 sweeps once.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0 or options['interval'] < 0:
+            raise CommandError("--batch-size must be positive, and --interval can't be negative.")
+        while True:
+            deleted = SessionStore.clear_expired(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired session(s)."))
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,121 @@
+# Python builtin imports
+from contextlib import ExitStack
+from time import perf_counter
+import json
+import logging
+import time
+
+# Django imports
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+# App imports
+from .repository.replicas import ReadRouting, current_routing
+from .utils.profiling import RequestProfile, current_profile
+
+logger = logging.getLogger('django')
+
+
+class ProfilingMiddleware():
+    """
+    Profiles API requests - SQL query count, DB time, serialization time, render time and response size.
+    Reported in a Server-Timing header and a structured log line, requests over settings.PROFILING_QUERY_BUDGET
+    queries are logged as warnings.
+    Removed from the middleware chain unless settings.PROFILING_ENABLED is set.
+    """
+    def __init__(self, get_response) -> None:
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.query_budget = getattr(settings, 'PROFILING_QUERY_BUDGET', 20)
+        self.path_prefix = getattr(settings, 'PROFILING_PATH_PREFIX', '/api/')
+
+    def __call__(self, request):
+        if not request.path.startswith(self.path_prefix):
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        start = perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile))
+                response = self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        total_time = perf_counter() - start
+
+        over_budget = profile.queries > self.query_budget
+        # Streamed responses are sent after the middleware returns
+        size = None if response.streaming else len(response.content)
+        response['Server-Timing'] = self.__server_timing(profile, total_time, over_budget)
+
+        report = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': profile.queries,
+            'query_budget': self.query_budget,
+            'over_budget': over_budget,
+            'db_ms': round(profile.db_time * 1000, 3),
+            **{f'{section}_ms': round(seconds * 1000, 3) for section, seconds in profile.sections.items()},
+            'total_ms': round(total_time * 1000, 3),
+            'response_bytes': size
+        }
+        if over_budget:
+            logger.warning("Query budget exceeded: %s", json.dumps(report))
+        else:
+            logger.info("Request profile: %s", json.dumps(report))
+        return response
+
+    def process_template_response(self, request, response):
+        """
+        Times the rendering of DRF responses, done after the view returns.
+        """
+        profile = current_profile.get()
+        if profile is not None:
+            start = perf_counter()
+            response.add_post_render_callback(lambda response: profile.add('render', perf_counter() - start))
+        return response
+
+    @staticmethod
+    def __server_timing(profile: RequestProfile, total_time: float, over_budget: bool) -> str:
+        """
+        Builds the Server-Timing header's value, durations are in milliseconds.
+        """
+        metrics = [f'db;dur={profile.db_time * 1000:.3f};desc="{profile.queries} queries"']
+        metrics.extend(f'{section};dur={seconds * 1000:.3f}' for section, seconds in profile.sections.items())
+        metrics.append(f'total;dur={total_time * 1000:.3f}')
+        if over_budget:
+            metrics.append('query-budget;desc="exceeded"')
+        return ', '.join(metrics)
+
+
+class ReplicaMiddleware():
+    """
+    Pins a session's reads to the primary database for settings.REPLICA_STICKY_SECONDS after it writes, so its next requests
+    see its writes despite the replicas' lag (see FlightsApi.repository.replicas).
+    Removed from the middleware chain unless settings.DATABASE_REPLICAS is set.
+    """
+    # Session key of the time until which the session reads from the primary
+    SESSION_KEY = '_primary_until'
+
+    def __init__(self, get_response) -> None:
+        if not getattr(settings, 'DATABASE_REPLICAS', None):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.sticky_seconds = getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+
+    def __call__(self, request):
+        routing = ReadRouting(pinned=request.session.get(self.SESSION_KEY, 0) > time.time())
+        token = current_routing.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_routing.reset(token)
+        # Sessions are only kept for logged in users, anonymous writes don't create one
+        if routing.wrote and request.session.session_key is not None:
+            request.session[self.SESSION_KEY] = time.time() + self.sticky_seconds
+        return response
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.1 on 2026-10-17 12:00
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def populate_booked_seats(apps, schema_editor):
+    Flight = apps.get_model('FlightsApi', 'Flight')
+    Ticket = apps.get_model('FlightsApi', 'Ticket')
+    booked = Ticket.objects.filter(flight=OuterRef('pk'), is_cancelled=False) \
+                            .values('flight').annotate(total=Sum('seat_count')).values('total')
+    Flight.objects.update(booked_seats=Coalesce(Subquery(booked), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FlightsApi', '0008_alter_ticket_unique_together'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='flight',
+            name='booked_seats',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(populate_booked_seats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.1 on 2026-10-17 02:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FlightsApi', '0009_flight_booked_seats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='flight',
+            index=models.Index(fields=['origin_country', 'departure_datetime'], name='flight_origin_departure_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='flight',
+            index=models.Index(fields=['destination_country', 'arrival_datetime'], name='flight_dest_arrival_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='flight',
+            index=models.Index(fields=['departure_datetime', 'id'], name='flight_departure_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='flight',
+            index=models.Index(fields=['arrival_datetime'], name='flight_arrival_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='flight',
+            index=models.Index(condition=models.Q(('is_cancelled', False)), fields=['origin_country', 'destination_country', 'departure_datetime'], name='flight_route_active_idx'),
+        ),
+    ]
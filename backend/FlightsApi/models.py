@@ -102,8 +102,31 @@ class Flight(models.Model):
     departure_datetime = models.DateTimeField()
     arrival_datetime = models.DateTimeField()
     total_seats = models.IntegerField()
+    booked_seats = models.IntegerField(default=0)
     is_cancelled = models.BooleanField(default=False)
     
+    class Meta:
+        indexes = [
+            # Departure boards and flights by origin
+            models.Index(fields=['origin_country', 'departure_datetime'], name='flight_origin_departure_idx'),
+            # Arrival boards and flights by destination
+            models.Index(fields=['destination_country', 'arrival_datetime'], name='flight_dest_arrival_idx'),
+            # Flights by departure date and cursor pagination order
+            models.Index(fields=['departure_datetime', 'id'], name='flight_departure_idx'),
+            # Flights by arrival date
+            models.Index(fields=['arrival_datetime'], name='flight_arrival_idx'),
+            # Route search, which hides cancelled flights from customers and anonymous users
+            models.Index(
+                fields=['origin_country', 'destination_country', 'departure_datetime'],
+                name='flight_route_active_idx',
+                condition=models.Q(is_cancelled=False)
+            ),
+        ]
+    
+    @property
+    def remaining_seats(self) -> int:
+        return self.total_seats - self.booked_seats
+    
     def __repr__(self) -> str:
         return f"<Flight #{self.pk}: {self.origin_country}->{self.destination_country} @ {self.departure_datetime}>"
     
@@ -0,0 +1,118 @@
+# Python builtin imports
+from typing import List, Union
+import hashlib
+import json
+import logging
+import threading
+import time
+
+# Django imports
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# App imports
+from ..models import Country
+from . import fast_serializers
+
+logger = logging.getLogger('django')
+
+
+class CountryRegistry():
+    """
+    An in-memory copy of the (practically static) countries table, loaded once per process.
+    Invalidated by signals when a country is saved or deleted (see FlightsApi.signals).
+    Changes made by other processes are picked up after settings.COUNTRY_REGISTRY_TIMEOUT seconds.
+    """
+    __lock = threading.Lock()
+    # (Serialized countries ordered by ID, Countries by ID, ETag, Load time), or None if not loaded
+    __state = None
+
+    @staticmethod
+    def __load() -> tuple:
+        """
+        Returns the registry's state, loading the countries if they're not loaded or expired.
+        """
+        state = CountryRegistry.__state
+        timeout = getattr(settings, 'COUNTRY_REGISTRY_TIMEOUT', 3600)
+        if state is not None and time.monotonic() - state[3] < timeout:
+            return state
+        with CountryRegistry.__lock:
+            # Another thread might have loaded them while this one waited
+            state = CountryRegistry.__state
+            if state is not None and time.monotonic() - state[3] < timeout:
+                return state
+            return CountryRegistry.__store(fast_serializers.COUNTRY.serialize_query(CountryRegistry.__query()))
+
+    @staticmethod
+    async def aload() -> None:
+        """
+        Loads the countries with the async ORM if they're not loaded or expired, so the other methods don't query.
+        Doesn't wait for the lock (or threads loading them), concurrent loads are harmless.
+        """
+        state = CountryRegistry.__state
+        if state is not None and time.monotonic() - state[3] < getattr(settings, 'COUNTRY_REGISTRY_TIMEOUT', 3600):
+            return
+        CountryRegistry.__store(await fast_serializers.COUNTRY.aserialize_query(CountryRegistry.__query()))
+
+    @staticmethod
+    def __query():
+        # Read from the primary - a replica may not have the change that invalidated the registry yet, which would be kept
+        # long after the replica catches up
+        return Country.objects.using(DEFAULT_DB_ALIAS).order_by('id')
+
+    @staticmethod
+    def __store(countries: List[dict]) -> tuple:
+        """
+        Replaces the registry's state with the loaded countries.
+        """
+        etag = hashlib.md5(json.dumps(countries, sort_keys=True).encode()).hexdigest()
+        state = (countries, {country['id']: country for country in countries}, etag, time.monotonic())
+        CountryRegistry.__state = state
+        logger.debug("Loaded %d countries to the registry", len(countries))
+        return state
+
+    @staticmethod
+    def all() -> List[dict]:
+        """Gets all countries.
+
+        Returns:
+            List[dict]: Copies of the serialized countries, ordered by ID.
+        """
+        return [dict(country) for country in CountryRegistry.__load()[0]]
+
+    @staticmethod
+    def get(id: int) -> Union[dict, None]:
+        """Gets a country by ID.
+
+        Args:
+            id (int): ID of the country.
+
+        Returns:
+            Union[dict, None]: A copy of the serialized country, or None if it doesn't exist.
+        """
+        country = CountryRegistry.__load()[1].get(id)
+        return dict(country) if country is not None else None
+
+    @staticmethod
+    def exists(id: int) -> bool:
+        """Checks if a country exists.
+
+        Args:
+            id (int): ID of the country.
+        """
+        return id in CountryRegistry.__load()[1]
+
+    @staticmethod
+    def etag() -> str:
+        """
+        A hash of all the countries, that changes whenever any of them does.
+        """
+        return CountryRegistry.__load()[2]
+
+    @staticmethod
+    def invalidate() -> None:
+        """
+        Drops the loaded countries, they're reloaded on the next access.
+        """
+        logger.debug("Invalidating the country registry")
+        CountryRegistry.__state = None
@@ -61,6 +61,11 @@ class OutOfBoundsException(UnacceptableInput):
     An exception to raise when attempting to access the database with data that exceeds the accepted input
     """
 
+class FlightNotBookableException(UnacceptableInput):
+    """
+    An exception to raise when attempting to book seats on a flight that cannot accommodate them.
+    """
+
 class UserAlreadyInGroupException(RepositoryException):
     """
     An exceptions to raise when attempted to add a group to an already assigned user.
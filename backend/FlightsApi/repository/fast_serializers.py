@@ -0,0 +1,239 @@
+from itertools import islice
+from typing import Iterable, Iterator, List, Union
+
+from asgiref.sync import sync_to_async
+from django.db.models import F, QuerySet
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+
+from .serializers import CountrySerializer, UserSerializer,\
+                            AdminSerializer, AirlineCompanySerializer,\
+                            CustomerSerializer, FlightSerializer,\
+                            FlightDetailSerializer, TicketSerializer,\
+                            GroupSerializer
+from ..utils.profiling import profiled
+
+
+# Kinds of compiled fields
+_VALUE = 0
+_PRIMARY_KEY = 1
+_NESTED = 2
+_MANY = 3
+
+
+class ValuesSerializer():
+    """
+    A read-only serializer that produces the same output as a DRF ModelSerializer, from '.values()' rows.
+    The DRF serializer's fields are introspected once (on first use) into a list of column extractors,
+    so serializing a row doesn't build a serializer or model instance.
+    Many to many fields are fetched with a single extra query per page.
+    """
+    def __init__(self, serializer_class: type, annotations: Union[dict, None] = None):
+        """
+        Create a ValuesSerializer for a ModelSerializer class.
+
+        Args:
+            serializer_class (type): The ModelSerializer to mimic.
+            annotations (dict, optional): Expressions for read-only fields that aren't database columns (ie. model properties),
+                                          by field name. Defaults to None.
+        """
+        self.__serializer_class = serializer_class
+        self.__annotations = annotations or {}
+        self.__fields = None
+        self.__columns = None
+        self.__pk_name = None
+
+    def __compile(self) -> None:
+        """
+        Introspects the serializer's fields into column extractors.
+        """
+        if self.__fields is not None:
+            return
+        columns = []
+        self.__fields = self.__compile_serializer(self.__serializer_class(), '', columns, True)
+        # The primary key is needed to fetch many to many fields, and the ordering fields for cursors
+        self.__pk_name = self.__serializer_class.Meta.model._meta.pk.name
+        if self.__pk_name not in columns:
+            columns.append(self.__pk_name)
+        self.__columns = columns
+
+    def __compile_serializer(self, serializer: serializers.Serializer, prefix: str, columns: list, is_root: bool) -> list:
+        """
+        Compiles the readable fields of a serializer to (name, kind, column, extractor) tuples, collecting the columns to fetch.
+        """
+        fields = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if is_root and name in self.__annotations:
+                column = ValuesSerializer.annotation_name(name)
+                fields.append((name, _VALUE, column, field.to_representation))
+            elif isinstance(field, ManyRelatedField):
+                if not is_root:
+                    raise TypeError(f"Nested many to many field '{name}' is not supported.")
+                fields.append((name, _MANY, field.source, None))
+                continue
+            elif isinstance(field, PrimaryKeyRelatedField):
+                column = prefix + field.source.replace('.', '__')
+                fields.append((name, _PRIMARY_KEY, column, None))
+            elif isinstance(field, serializers.BaseSerializer):
+                nested_prefix = prefix + field.source.replace('.', '__') + '__'
+                nested_fields = self.__compile_serializer(field, nested_prefix, columns, False)
+                # A missing relation leaves all of its columns empty
+                column = nested_prefix + field.Meta.model._meta.pk.name
+                if column not in columns:
+                    columns.append(column)
+                fields.append((name, _NESTED, column, nested_fields))
+                continue
+            elif isinstance(field, serializers.RelatedField):
+                raise TypeError(f"Related field '{name}' of type {type(field).__name__} is not supported.")
+            else:
+                column = prefix + field.source.replace('.', '__')
+                fields.append((name, _VALUE, column, field.to_representation))
+            if column not in columns:
+                columns.append(column)
+        return fields
+
+    @staticmethod
+    def annotation_name(name: str) -> str:
+        """
+        The name a field's annotation is fetched by. Avoids clashing with model properties of the same name.
+        """
+        return f'values_{name}'
+
+    def values(self, query: QuerySet) -> QuerySet:
+        """
+        Turns a model query to a query of the rows required for serialization.
+
+        Args:
+            query (QuerySet): A query of the serializer's model.
+
+        Returns:
+            QuerySet: A query of dictionaries, that can still be filtered, ordered and sliced.
+        """
+        self.__compile()
+        if self.__annotations:
+            query = query.annotate(**{ValuesSerializer.annotation_name(name): expression for name, expression in self.__annotations.items()})
+        return query.values(*self.__columns)
+
+    @profiled('serialize')
+    def serialize(self, rows: Iterable[dict]) -> List[dict]:
+        """
+        Serializes rows fetched with values().
+
+        Args:
+            rows (Iterable[dict]): Rows from a query returned by values().
+
+        Returns:
+            List[dict]: The serialized rows.
+        """
+        self.__compile()
+        rows = list(rows)
+        many = self.__fetch_many_related(rows)
+        return [ValuesSerializer.__serialize_row(row, self.__fields, many, row[self.__pk_name]) for row in rows]
+
+    def serialize_query(self, query: QuerySet) -> List[dict]:
+        """
+        Fetches and serializes the rows of a model query.
+        """
+        return self.serialize(self.values(query))
+
+    async def aserialize(self, rows: List[dict]) -> List[dict]:
+        """
+        Async serialize() - many to many fields are fetched with the (sync) ORM in a thread, other rows are serialized as is.
+        """
+        self.__compile()
+        if any(kind == _MANY for _, kind, _, _ in self.__fields):
+            return await sync_to_async(self.serialize)(rows)
+        return self.serialize(rows)
+
+    async def aserialize_query(self, query: QuerySet) -> List[dict]:
+        """
+        Fetches the rows of a model query with the async ORM and serializes them.
+        """
+        return await self.aserialize([row async for row in self.values(query)])
+
+    def serialize_chunks(self, query: QuerySet, chunk_size: int = 2000) -> Iterator[List[dict]]:
+        """
+        Fetches and serializes the rows of a model query lazily, chunk_size rows at a time.
+        The rows are read through a server-side cursor where the database supports it, so memory use doesn't grow with the query's size.
+
+        Args:
+            query (QuerySet): A query of the serializer's model.
+            chunk_size (int, optional): Rows per chunk. Defaults to 2000.
+
+        Yields:
+            List[dict]: The serialized rows of each chunk.
+        """
+        rows = self.values(query).iterator(chunk_size=chunk_size)
+        while chunk := list(islice(rows, chunk_size)):
+            yield self.serialize(chunk)
+
+    def field_names(self) -> List[str]:
+        """
+        The names of the serialized fields, nested fields are flattened to dotted names (ie. 'origin_country_details.name').
+        """
+        self.__compile()
+        return ValuesSerializer.__field_names(self.__fields, '')
+
+    @staticmethod
+    def __field_names(fields: list, prefix: str) -> List[str]:
+        names = []
+        for name, kind, _, extractor in fields:
+            if kind == _NESTED:
+                names.extend(ValuesSerializer.__field_names(extractor, f'{prefix}{name}.'))
+            else:
+                names.append(prefix + name)
+        return names
+
+    @staticmethod
+    def __serialize_row(row: dict, fields: list, many: dict, pk) -> dict:
+        result = {}
+        for name, kind, column, extractor in fields:
+            if kind == _MANY:
+                result[name] = many[name].get(pk, [])
+                continue
+            value = row[column]
+            if value is None:
+                result[name] = None
+            elif kind == _VALUE:
+                result[name] = extractor(value)
+            elif kind == _PRIMARY_KEY:
+                result[name] = value
+            else:
+                result[name] = ValuesSerializer.__serialize_row(row, extractor, many, pk)
+        return result
+
+    def __fetch_many_related(self, rows: list) -> dict:
+        """
+        Fetches the related primary keys of the many to many fields for the given rows, by field name and row primary key.
+        """
+        many = {}
+        many_fields = [field for field in self.__fields if field[1] == _MANY]
+        if not many_fields or not rows:
+            return many
+        model = self.__serializer_class.Meta.model
+        ids = [row[self.__pk_name] for row in rows]
+        for name, _, source, _ in many_fields:
+            model_field = model._meta.get_field(source)
+            through = model_field.remote_field.through
+            source_column = f'{model_field.m2m_field_name()}_id'
+            target_column = f'{model_field.m2m_reverse_field_name()}_id'
+            related = {}
+            # Ordered like the relation's rows were added
+            for row_id, related_id in through.objects.filter(**{f'{source_column}__in': ids})\
+                                                    .order_by('pk').values_list(source_column, target_column):
+                related.setdefault(row_id, []).append(related_id)
+            many[name] = related
+        return many
+
+
+COUNTRY = ValuesSerializer(CountrySerializer)
+USER = ValuesSerializer(UserSerializer)
+GROUP = ValuesSerializer(GroupSerializer)
+ADMIN = ValuesSerializer(AdminSerializer)
+AIRLINECOMPANY = ValuesSerializer(AirlineCompanySerializer)
+CUSTOMER = ValuesSerializer(CustomerSerializer)
+FLIGHT = ValuesSerializer(FlightSerializer, {'remaining_seats': F('total_seats') - F('booked_seats')})
+FLIGHT_DETAIL = ValuesSerializer(FlightDetailSerializer, {'remaining_seats': F('total_seats') - F('booked_seats')})
+TICKET = ValuesSerializer(TicketSerializer)
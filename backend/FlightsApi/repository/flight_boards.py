@@ -0,0 +1,398 @@
+# Python builtin imports
+from bisect import bisect_left, bisect_right, insort
+from datetime import timedelta
+from enum import Enum, unique
+from functools import partial
+from typing import Iterable, List, Tuple
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+
+# Django imports
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+# App imports
+from ..models import Flight
+from . import fast_serializers
+from .serializers import FlightSerializer
+
+logger = logging.getLogger('django')
+
+
+@unique
+class Board(Enum):
+    ARRIVALS = 'arrivals'
+    DEPARTURES = 'departures'
+
+    @property
+    def time_field(self) -> str:
+        """
+        The flight's time shown on the board, which the board is ordered by.
+        """
+        match (self):
+            case Board.ARRIVALS:
+                return 'arrival_datetime'
+            case Board.DEPARTURES:
+                return 'departure_datetime'
+
+    @property
+    def country_field(self) -> str:
+        """
+        The flight's country the board belongs to.
+        """
+        match (self):
+            case Board.ARRIVALS:
+                return 'destination_country_id'
+            case Board.DEPARTURES:
+                return 'origin_country_id'
+
+    @property
+    def ordering(self) -> tuple:
+        """
+        A unique ordering of the board's flights, used by cursor pagination.
+        """
+        return (self.time_field, 'id')
+
+
+def _digest(flight: dict) -> bytes:
+    """
+    A digest of a serialized flight, the same in every process that serializes the same flight.
+    """
+    encoded = DjangoJSONEncoder(sort_keys=True, separators=(',', ':')).encode(flight)
+    return hashlib.blake2b(encoded.encode(), digest_size=8).digest()
+
+
+class _State():
+    """
+    A loaded board - the flights of a country from its load time up to the window and the timeout after it,
+    so it can keep sliding until it's reloaded.
+    """
+    __slots__ = ('board', 'country_id', 'entries', 'flights', 'digests', 'horizon', 'loaded_at')
+
+    def __init__(self, board: Board, country_id: int, flights: List[dict], timestamps: List[float], horizon: float) -> None:
+        self.board = board
+        self.country_id = country_id
+        # [(Timestamp, flight ID)], sorted
+        self.entries = [(timestamp, flight['id']) for timestamp, flight in zip(timestamps, flights)]
+        # Flight ID -> serialized flight
+        self.flights = {flight['id']: flight for flight in flights}
+        # Flight ID -> digest of the serialized flight, which the ETags are made of
+        self.digests = {flight['id']: _digest(flight) for flight in flights}
+        self.horizon = horizon
+        self.loaded_at = time.monotonic()
+
+    def window(self, now: float, hours: int) -> Tuple[int, int]:
+        """
+        The range of entries shown on the board at the given time.
+        """
+        return bisect_left(self.entries, (now,)), bisect_right(self.entries, (now + hours * 3600, float('inf')))
+
+    def etag(self, start: int, end: int) -> str:
+        """
+        A tag of the flights in a range of entries, made of their contents - so it's the same in every process
+        (and after restarts) that shows the same flights, and changes whenever they do.
+        """
+        tag = hashlib.blake2b(digest_size=16)
+        for _, id in self.entries[start:end]:
+            tag.update(self.digests[id])
+        return tag.hexdigest()
+
+    def upsert(self, id: int, flight: Flight, serialized: dict, digest: bytes) -> None:
+        """
+        Adds, replaces or removes a flight as it is now, by whether it's on the board.
+        """
+        self.remove(id)
+        timestamp = getattr(flight, self.board.time_field).timestamp()
+        if getattr(flight, self.board.country_field) == self.country_id and time.time() <= timestamp <= self.horizon:
+            insort(self.entries, (timestamp, id))
+            self.flights[id] = serialized
+            self.digests[id] = digest
+
+    def remove(self, id: int) -> None:
+        if self.flights.pop(id, None) is not None:
+            del self.digests[id]
+            self.entries = [entry for entry in self.entries if entry[1] != id]
+
+    def add_booked_seats(self, id: int, seat_count: int) -> None:
+        flight = self.flights.get(id)
+        if flight is not None:
+            booked_seats = max(flight['booked_seats'] + seat_count, 0)
+            self.flights[id] = {**flight, 'booked_seats': booked_seats, 'remaining_seats': flight['total_seats'] - booked_seats}
+            self.digests[id] = _digest(self.flights[id])
+
+
+class FlightBoards():
+    """
+    In-memory arrival and departure boards - the flights arriving to/departing from a country in the next
+    settings.FLIGHT_BOARD_HOURS hours, loaded once per board and process.
+    Kept up to date incrementally as flights are saved, deleted and booked in this process (see FlightsApi.signals),
+    changes made by other processes are picked up after settings.FLIGHT_BOARD_TIMEOUT seconds.
+    Every change notifies the threads waiting for one (see wait()).
+    """
+    __lock = threading.RLock()
+    __changed = threading.Condition(__lock)
+    __load_lock = threading.Lock()
+    # (Board, country ID) -> _State
+    __boards = {}
+    # Flight changes made while a board is loaded, replayed on the loaded board (None when not loading)
+    __pending = None
+    # Coroutines waiting for a change - (event loop, asyncio.Event), set from any thread
+    __waiters_lock = threading.Lock()
+    __waiters = set()
+
+    @staticmethod
+    def __hours() -> int:
+        return getattr(settings, 'FLIGHT_BOARD_HOURS', 12)
+
+    @staticmethod
+    def __is_fresh(state: _State) -> bool:
+        return state is not None and time.monotonic() - state.loaded_at < getattr(settings, 'FLIGHT_BOARD_TIMEOUT', 300)
+
+    @staticmethod
+    def __load(board: Board, country_id: int) -> _State:
+        """
+        Returns a board's state, loading it if it's not loaded or expired.
+        Loaded without the lock, so the other boards and the changes aren't held up by the query - while an expired
+        board is reloaded, the other threads keep using it.
+        """
+        state = FlightBoards.__boards.get((board, country_id))
+        if FlightBoards.__is_fresh(state):
+            return state
+        if not FlightBoards.__load_lock.acquire(blocking=state is None):
+            return state
+        try:
+            state = FlightBoards.__boards.get((board, country_id))
+            if FlightBoards.__is_fresh(state):
+                return state
+            with FlightBoards.__lock:
+                FlightBoards.__pending = []
+            try:
+                now = timezone.now()
+                horizon = now + timedelta(hours=FlightBoards.__hours(), seconds=getattr(settings, 'FLIGHT_BOARD_TIMEOUT', 300))
+                # Read from the primary - a replica may not have the changes made since the board was loaded yet
+                query = Flight.objects.using(DEFAULT_DB_ALIAS).filter(**{
+                    board.country_field: country_id,
+                    f'{board.time_field}__gte': now,
+                    f'{board.time_field}__lte': horizon
+                }).order_by(*board.ordering)
+                serializer = fast_serializers.FLIGHT
+                rows = list(serializer.values(query))
+                flights = serializer.serialize(rows)
+                timestamps = [row[board.time_field].timestamp() for row in rows]
+                state = _State(board, country_id, flights, timestamps, horizon.timestamp())
+            finally:
+                with FlightBoards.__lock:
+                    pending, FlightBoards.__pending = FlightBoards.__pending, None
+            with FlightBoards.__lock:
+                if pending is None:
+                    # Invalidated while loading, the flights may have been read before the change
+                    return state
+                # Bookings made while loading may or may not have been read, they're picked up on the next reload
+                for change in pending:
+                    change(state)
+                FlightBoards.__boards[(board, country_id)] = state
+                FlightBoards.__notify()
+            logger.debug("Loaded %d flights to the %s board of country %d", len(state.flights), board.value, country_id)
+            return state
+        finally:
+            FlightBoards.__load_lock.release()
+
+    @staticmethod
+    def get(board: Board, country_id: int) -> Tuple[List[dict], str]:
+        """Gets the flights currently on a board.
+
+        Args:
+            board (Board): ARRIVALS or DEPARTURES.
+            country_id (int): ID of the country.
+
+        Returns:
+            Tuple[List[dict], str]: Copies of the serialized flights ordered by the board's time, and the board's ETag.
+        """
+        state = FlightBoards.__load(board, country_id)
+        with FlightBoards.__lock:
+            start, end = state.window(time.time(), FlightBoards.__hours())
+            flights = [dict(state.flights[id]) for _, id in state.entries[start:end]]
+            return flights, state.etag(start, end)
+
+    @staticmethod
+    def etag(board: Board, country_id: int) -> str:
+        """
+        A tag of the flights currently on a board, that changes whenever they do.
+        """
+        state = FlightBoards.__load(board, country_id)
+        with FlightBoards.__lock:
+            return state.etag(*state.window(time.time(), FlightBoards.__hours()))
+
+    @staticmethod
+    def wait(board: Board, country_id: int, etag: str, timeout: float) -> bool:
+        """Waits until a board no longer matches an ETag - a flight changed, or entered or left the board's window.
+
+        Args:
+            board (Board): ARRIVALS or DEPARTURES.
+            country_id (int): ID of the country.
+            etag (str): The ETag of the board as it was last seen.
+            timeout (float): Maximum seconds to wait.
+
+        Returns:
+            bool: Whether the board changed.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            state = FlightBoards.__load(board, country_id)
+            with FlightBoards.__lock:
+                if FlightBoards.__boards.get((board, country_id)) is not state:
+                    # Reloaded or invalidated since
+                    continue
+                # Checked and waited for under the lock, so a change can't be missed in between
+                changed, moves_in = FlightBoards.__compare(state, etag)
+                if changed:
+                    return True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                FlightBoards.__changed.wait(min(remaining, moves_in))
+
+    @staticmethod
+    async def await_change(board: Board, country_id: int, etag: str, timeout: float) -> bool:
+        """Async wait() - waits on the event loop rather than holding a thread, loaded boards are checked without a query.
+
+        Args:
+            board (Board): ARRIVALS or DEPARTURES.
+            country_id (int): ID of the country.
+            etag (str): The ETag of the board as it was last seen.
+            timeout (float): Maximum seconds to wait.
+
+        Returns:
+            bool: Whether the board changed.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        waiter = (loop, asyncio.Event())
+        with FlightBoards.__waiters_lock:
+            FlightBoards.__waiters.add(waiter)
+        try:
+            while True:
+                waiter[1].clear()
+                if FlightBoards.__is_loaded(board, country_id):
+                    changed, moves_in = FlightBoards.__check(board, country_id, etag)
+                else:
+                    # Loading queries the database
+                    changed, moves_in = await sync_to_async(FlightBoards.__check)(board, country_id, etag)
+                if changed:
+                    return True
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return False
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), min(remaining, moves_in))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with FlightBoards.__waiters_lock:
+                FlightBoards.__waiters.discard(waiter)
+
+    @staticmethod
+    def __is_loaded(board: Board, country_id: int) -> bool:
+        return FlightBoards.__is_fresh(FlightBoards.__boards.get((board, country_id)))
+
+    @staticmethod
+    def __check(board: Board, country_id: int, etag: str) -> Tuple[bool, float]:
+        """
+        Checks if a board changed from an ETag, and if not - in how many seconds its window moves.
+        """
+        state = FlightBoards.__load(board, country_id)
+        with FlightBoards.__lock:
+            return FlightBoards.__compare(state, etag)
+
+    @staticmethod
+    def __compare(state: _State, etag: str) -> Tuple[bool, float]:
+        """
+        __check() of a loaded board, call with the lock.
+        """
+        hours = FlightBoards.__hours()
+        now = time.time()
+        start, end = state.window(now, hours)
+        if state.etag(start, end) != etag:
+            return True, 0
+        # The next flight to leave the window, or to enter it
+        moves = [float('inf')]
+        if start < len(state.entries):
+            moves.append(state.entries[start][0] - now)
+        if end < len(state.entries):
+            moves.append(state.entries[end][0] - hours * 3600 - now)
+        # Wakes up a little after the move, past the window's edge
+        return False, max(min(moves) + 0.01, 0.01)
+
+    @staticmethod
+    def __notify() -> None:
+        """
+        Wakes up the threads and coroutines waiting for a change.
+        """
+        FlightBoards.__changed.notify_all()
+        with FlightBoards.__waiters_lock:
+            for loop, event in FlightBoards.__waiters:
+                loop.call_soon_threadsafe(event.set)
+
+    @staticmethod
+    def update(flights: Iterable[Flight]) -> None:
+        """
+        Adds, replaces or removes flights in the loaded boards as they are now. Call once the change is committed.
+        """
+        changes = []
+        for flight in flights:
+            serialized = FlightBoards.__serialize(flight)
+            changes.append(partial(_State.upsert, id=flight.id, flight=flight, serialized=serialized, digest=_digest(serialized)))
+        FlightBoards.__change(changes)
+
+    @staticmethod
+    def remove(id: int) -> None:
+        """
+        Removes a deleted flight from the loaded boards. Call once the deletion is committed.
+        """
+        FlightBoards.__change([partial(_State.remove, id=id)])
+
+    @staticmethod
+    def add_booked_seats(id: int, seat_count: int) -> None:
+        """
+        Updates a flight's seats after booking (or releasing, with a negative count). Call once the booking is committed.
+        """
+        with FlightBoards.__lock:
+            for state in FlightBoards.__boards.values():
+                state.add_booked_seats(id, seat_count)
+            FlightBoards.__notify()
+
+    @staticmethod
+    def invalidate() -> None:
+        """
+        Drops the loaded boards, they're reloaded on the next access.
+        """
+        logger.debug("Invalidating the flight boards")
+        with FlightBoards.__lock:
+            FlightBoards.__boards = {}
+            # A board that's being loaded may have been read before the change, it isn't kept
+            FlightBoards.__pending = None
+            FlightBoards.__notify()
+
+    @staticmethod
+    def __change(changes: list) -> None:
+        """
+        Applies changes (functions of a _State) to the loaded boards, and to the board that's being loaded.
+        """
+        with FlightBoards.__lock:
+            for state in FlightBoards.__boards.values():
+                for change in changes:
+                    change(state)
+            if FlightBoards.__pending is not None:
+                FlightBoards.__pending.extend(changes)
+            FlightBoards.__notify()
+
+    @staticmethod
+    def __serialize(flight: Flight) -> dict:
+        # Same as the values serializer's output, without a query - the relations are primary keys
+        return dict(FlightSerializer(flight).data)
@@ -0,0 +1,311 @@
+# Python builtin imports
+from bisect import bisect_left, insort
+from collections import namedtuple
+from datetime import datetime
+from functools import partial
+from typing import Iterable, Iterator, List, Tuple
+import heapq
+import logging
+import math
+import threading
+import time
+
+# Django imports
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+# App imports
+from ..models import Flight
+
+logger = logging.getLogger('django')
+
+
+# A flight in the graph, times are POSIX timestamps
+Leg = namedtuple('Leg', ('id', 'origin', 'destination', 'departure', 'arrival', 'remaining_seats'))
+
+# The flight columns the graph is built from, see FlightGraph.row()
+ROW_FIELDS = ('id', 'origin_country_id', 'destination_country_id', 'departure_datetime', 'arrival_datetime', 'total_seats', 'booked_seats', 'is_cancelled')
+
+
+class _Graph():
+    """
+    A time-expanded graph of upcoming flights - the nodes are departures, and a flight connects to the departures
+    from its destination within the connection window after it lands. The edges aren't stored, they're found by
+    binary search in the departures of each country and route, sorted by time.
+    Changes replace the lists and dictionaries they change instead of changing them, so a copy() can be changed while
+    the original is searched. Seat changes only replace the flight's leg, in place.
+    """
+    def __init__(self) -> None:
+        # Flight ID -> Leg
+        self.legs = {}
+        # Origin country ID -> [(departure, flight ID)], sorted
+        self.departures = {}
+        # (Origin country ID, destination country ID) -> [(departure, flight ID)], sorted
+        self.routes = {}
+        # Destination country ID -> {Origin country ID: amount of flights}
+        self.inbound = {}
+        self.loaded_at = time.monotonic()
+
+    def upsert(self, row: tuple) -> None:
+        """
+        Adds, replaces or removes (if it's cancelled or departed) a flight by its ROW_FIELDS values.
+        """
+        id, origin, destination, departure, arrival, total_seats, booked_seats, is_cancelled = row
+        self.remove(id)
+        if is_cancelled or origin == destination or departure <= timezone.now():
+            return
+        leg = Leg(id, origin, destination, departure.timestamp(), arrival.timestamp(), total_seats - booked_seats)
+        self.legs[id] = leg
+        for index, key in ((self.departures, origin), (self.routes, (origin, destination))):
+            entries = list(index.get(key, ()))
+            insort(entries, (leg.departure, id))
+            index[key] = entries
+        inbound = dict(self.inbound.get(destination, {}))
+        inbound[origin] = inbound.get(origin, 0) + 1
+        self.inbound[destination] = inbound
+
+    def remove(self, id: int) -> None:
+        leg = self.legs.pop(id, None)
+        if leg is None:
+            return
+        for index, key in ((self.departures, leg.origin), (self.routes, (leg.origin, leg.destination))):
+            entries = list(index[key])
+            del entries[bisect_left(entries, (leg.departure, id))]
+            if entries:
+                index[key] = entries
+            else:
+                del index[key]
+        inbound = dict(self.inbound[leg.destination])
+        inbound[leg.origin] -= 1
+        if not inbound[leg.origin]:
+            del inbound[leg.origin]
+        self.inbound[leg.destination] = inbound
+
+    def add_booked_seats(self, id: int, seat_count: int) -> None:
+        # A single entry is replaced, searches see the old leg or the new one
+        leg = self.legs.get(id)
+        if leg is not None:
+            self.legs[id] = leg._replace(remaining_seats=leg.remaining_seats - seat_count)
+
+    def copy(self) -> '_Graph':
+        """
+        A copy that can be changed without changing this graph, sharing its lists until they're changed.
+        """
+        graph = _Graph()
+        graph.legs = dict(self.legs)
+        graph.departures = dict(self.departures)
+        graph.routes = dict(self.routes)
+        graph.inbound = dict(self.inbound)
+        graph.loaded_at = self.loaded_at
+        return graph
+
+    @staticmethod
+    def build(rows: Iterable[tuple]) -> '_Graph':
+        """
+        Builds a graph from ROW_FIELDS values of upcoming, non-cancelled flights, sorting each index once.
+        """
+        graph = _Graph()
+        for id, origin, destination, departure, arrival, total_seats, booked_seats, is_cancelled in rows:
+            if is_cancelled or origin == destination:
+                continue
+            leg = Leg(id, origin, destination, departure.timestamp(), arrival.timestamp(), total_seats - booked_seats)
+            graph.legs[id] = leg
+            graph.departures.setdefault(origin, []).append((leg.departure, id))
+            graph.routes.setdefault((origin, destination), []).append((leg.departure, id))
+            inbound = graph.inbound.setdefault(destination, {})
+            inbound[origin] = inbound.get(origin, 0) + 1
+        for index in (graph.departures, graph.routes):
+            for entries in index.values():
+                entries.sort()
+        return graph
+
+    def window(self, entries: list, start: float, end: float, seats: int, horizon: list) -> Iterator[Leg]:
+        """
+        The legs with enough seats that depart in [start, end) and before the horizon, from a sorted departures list.
+        """
+        legs = self.legs
+        for index in range(bisect_left(entries, (start,)), len(entries)):
+            departure, id = entries[index]
+            if departure >= end or departure >= horizon[0]:
+                return
+            leg = legs[id]
+            if leg.remaining_seats >= seats:
+                yield leg
+
+    def itineraries(self, origin: int, destination: int, start: float, end: float, max_stops: int, min_connection: float, max_connection: float, seats: int, horizon: list) -> Iterator[Tuple[Leg, ...]]:
+        """
+        Finds the itineraries from origin to destination that depart in [start, end), with up to max_stops connections.
+        Flights that depart at or after horizon[0] aren't followed - the caller lowers it as it finds itineraries that
+        arrive earlier, since an itinerary with such a flight can only arrive after it.
+        """
+        # Countries with flights to the destination - the only ones the last connection can be in
+        last_stops = self.inbound.get(destination, {})
+        empty = []
+        for first in self.window(self.departures.get(origin, empty), start, end, seats, horizon):
+            stop = first.destination
+            if stop == destination:
+                yield (first,)
+                continue
+            if max_stops < 1:
+                continue
+            connection_start, connection_end = first.arrival + min_connection, first.arrival + max_connection
+            if stop in last_stops:
+                for last in self.window(self.routes[(stop, destination)], connection_start, connection_end, seats, horizon):
+                    yield (first, last)
+            if max_stops < 2:
+                continue
+            for second in self.window(self.departures.get(stop, empty), connection_start, connection_end, seats, horizon):
+                second_stop = second.destination
+                if second_stop not in last_stops or second_stop == origin:
+                    continue
+                for last in self.window(self.routes[(second_stop, destination)], second.arrival + min_connection, second.arrival + max_connection, seats, horizon):
+                    yield (first, second, last)
+
+
+class FlightGraph():
+    """
+    An in-memory graph of the upcoming, non-cancelled flights, loaded once per process and searched for connecting itineraries.
+    Kept up to date incrementally as flights are saved, deleted and booked in this process (see FlightsApi.signals),
+    changes made by other processes are picked up after settings.FLIGHT_GRAPH_TIMEOUT seconds.
+    Seat counts in the graph are only used to prune the search - itineraries should be checked against the database.
+    Flights added or removed replace the loaded graph with a changed copy, so searches don't hold the lock and don't
+    block them. Seat changes, which are far more frequent, update the loaded graph in place.
+    """
+    __lock = threading.RLock()
+    __load_lock = threading.Lock()
+    # The loaded graph, or None if not loaded
+    __state = None
+    # Flight changes (functions of a _Graph) made while the graph is reloaded, replayed on the reloaded graph (None when not reloading)
+    __pending = None
+
+    @staticmethod
+    def __load() -> _Graph:
+        """
+        Returns the graph, loading it if it's not loaded or expired.
+        While an expired graph is reloaded, the other threads keep searching it.
+        """
+        state = FlightGraph.__state
+        timeout = getattr(settings, 'FLIGHT_GRAPH_TIMEOUT', 300)
+        if state is not None and time.monotonic() - state.loaded_at < timeout:
+            return state
+        if not FlightGraph.__load_lock.acquire(blocking=state is None):
+            return state
+        try:
+            state = FlightGraph.__state
+            if state is not None and time.monotonic() - state.loaded_at < timeout:
+                return state
+            with FlightGraph.__lock:
+                FlightGraph.__pending = []
+            try:
+                # Read from the primary - a replica may not have the changes made since the graph was loaded yet
+                rows = Flight.objects.using(DEFAULT_DB_ALIAS).filter(is_cancelled=False, departure_datetime__gt=timezone.now()) \
+                                     .values_list(*ROW_FIELDS).iterator(chunk_size=5000)
+                state = _Graph.build(rows)
+            finally:
+                with FlightGraph.__lock:
+                    pending, FlightGraph.__pending = FlightGraph.__pending, None
+            with FlightGraph.__lock:
+                for change in pending:
+                    change(state)
+                FlightGraph.__state = state
+            logger.debug("Loaded %d flights to the flight graph", len(state.legs))
+            return state
+        finally:
+            FlightGraph.__load_lock.release()
+
+    @staticmethod
+    def row(flight: Flight) -> tuple:
+        """
+        The ROW_FIELDS values of a flight, as it is now.
+        """
+        return tuple(getattr(flight, field) for field in ROW_FIELDS)
+
+    @staticmethod
+    def search(origin: int, destination: int, start: datetime, end: datetime, max_stops: int, min_connection: int, max_connection: int, seats: int, limit: int) -> List[Tuple[Leg, ...]]:
+        """Finds the itineraries between two countries, by the earliest arrival, then the fewest stops, then the latest departure.
+
+        Args:
+            origin (int): ID of the origin country.
+            destination (int): ID of the destination country.
+            start (datetime): The earliest departure of the first flight.
+            end (datetime): The first flight departs before this.
+            max_stops (int): Maximum connections (0 to 2).
+            min_connection (int): Minimum minutes between landing and the connecting flight's departure.
+            max_connection (int): Maximum minutes between landing and the connecting flight's departure.
+            seats (int): Seats required on each flight.
+            limit (int): Maximum amount of itineraries.
+
+        Returns:
+            List[Tuple[Leg, ...]]: The legs of each itinerary.
+        """
+        # Changes replace the graph with a changed copy, so it's searched without the lock
+        graph = FlightGraph.__load()
+        start = max(start, timezone.now())
+        # The best itineraries found, as a heap of (negated key, legs) with the worst at the top
+        found = []
+        # Once there are enough, itineraries with a flight departing after the worst one's arrival can't replace it
+        horizon = [math.inf]
+        itineraries = graph.itineraries(
+            origin, destination, start.timestamp(), end.timestamp(), max_stops, min_connection * 60, max_connection * 60, seats, horizon
+        )
+        for legs in itineraries:
+            key = (-legs[-1].arrival, -len(legs), legs[0].departure)
+            if len(found) < limit:
+                heapq.heappush(found, (key, legs))
+            elif key > found[0][0]:
+                heapq.heapreplace(found, (key, legs))
+            else:
+                continue
+            if len(found) == limit:
+                horizon[0] = -found[0][0][0]
+        return [legs for key, legs in sorted(found, key=lambda item: item[0], reverse=True)]
+
+    @staticmethod
+    def update(rows: Iterable[tuple]) -> None:
+        """
+        Adds, replaces or removes (if cancelled) flights by their ROW_FIELDS values. Call once the change is committed.
+        """
+        with FlightGraph.__lock:
+            rows = list(rows)
+            if FlightGraph.__state is not None:
+                state = FlightGraph.__state.copy()
+                for row in rows:
+                    state.upsert(row)
+                FlightGraph.__state = state
+            if FlightGraph.__pending is not None:
+                FlightGraph.__pending.extend(partial(_Graph.upsert, row=row) for row in rows)
+
+    @staticmethod
+    def remove(id: int) -> None:
+        """
+        Removes a deleted flight. Call once the deletion is committed.
+        """
+        with FlightGraph.__lock:
+            if FlightGraph.__state is not None:
+                state = FlightGraph.__state.copy()
+                state.remove(id)
+                FlightGraph.__state = state
+            if FlightGraph.__pending is not None:
+                FlightGraph.__pending.append(partial(_Graph.remove, id=id))
+
+    @staticmethod
+    def add_booked_seats(id: int, seat_count: int) -> None:
+        """
+        Updates a flight's seats after booking (or releasing, with a negative count). Call once the booking is committed.
+        """
+        with FlightGraph.__lock:
+            if FlightGraph.__state is not None:
+                FlightGraph.__state.add_booked_seats(id, seat_count)
+            if FlightGraph.__pending is not None:
+                # A booking committed just before the reload read the flight is counted twice, until the next reload
+                FlightGraph.__pending.append(partial(_Graph.add_booked_seats, id=id, seat_count=seat_count))
+
+    @staticmethod
+    def invalidate() -> None:
+        """
+        Drops the loaded graph, it's reloaded on the next search.
+        """
+        logger.debug("Invalidating the flight graph")
+        with FlightGraph.__lock:
+            FlightGraph.__state = None
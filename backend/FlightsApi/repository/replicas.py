@@ -0,0 +1,96 @@
+# Python builtin imports
+from contextvars import ContextVar
+from functools import wraps
+from inspect import iscoroutinefunction, unwrap
+import random
+
+# Django imports
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class ReadRouting():
+    """
+    Where a request reads from - the primary, once it wrote (or if its session wrote recently).
+    """
+    __slots__ = ('pinned', 'wrote')
+
+    def __init__(self, pinned: bool = False) -> None:
+        self.pinned = pinned
+        self.wrote = False
+
+
+# The routing of the current request (see FlightsApi.middleware.ReplicaMiddleware), None outside of requests
+current_routing: ContextVar = ContextVar('current_routing', default=None)
+# Whether the current call reads from the replicas (see reads_replica)
+replica_reads: ContextVar = ContextVar('replica_reads', default=False)
+
+
+def reads_replica(func):
+    """
+    Routes the reads of a read-only repository method to a replica (settings.DATABASE_REPLICAS), whose data may lag
+    behind the primary's. Requests that wrote, their session's next requests and transactions read from the primary.
+    The method must return evaluated results - lazy querysets are routed when they're evaluated, after it returns.
+
+    Args:
+        func (function): A function to decorate
+    """
+    if iscoroutinefunction(unwrap(func)):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            token = replica_reads.set(True)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                replica_reads.reset(token)
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        token = replica_reads.set(True)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            replica_reads.reset(token)
+    return wrapper
+
+
+class ReplicaRouter():
+    """
+    Sends the reads of the repository's read-only methods (see reads_replica) to a random replica in
+    settings.DATABASE_REPLICAS, and everything else - writes, bookings, seat checks and sessions - to the primary.
+    A write pins the rest of the request to the primary, so it reads its own writes. The in-memory caches (countries,
+    boards and the flight graph) always load from the primary.
+    The replicas are copies of the primary, which they aren't migrated with.
+    """
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', ())
+        if not replicas or not replica_reads.get():
+            return DEFAULT_DB_ALIAS
+        routing = current_routing.get()
+        if routing is not None and routing.pinned:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # Reads in a transaction see its writes
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        # Outside of requests (ie. management commands and threads) there's no routing to pin - setting one here
+        # would never be reset, and pin the context to the primary for good
+        routing = current_routing.get()
+        if routing is not None:
+            routing.pinned = routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replicas have the primary's rows
+        databases = {DEFAULT_DB_ALIAS, *getattr(settings, 'DATABASE_REPLICAS', ())}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in getattr(settings, 'DATABASE_REPLICAS', ()):
+            return False
+        return None
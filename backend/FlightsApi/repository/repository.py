@@ -1,14 +1,25 @@
 # Python builtins
 import logging
 from datetime import timedelta
+from functools import partial
+from itertools import chain, islice
 from datetime import date as Date
 
-from typing import Union, Iterable, List, Dict, Tuple
+from typing import Union, Iterable, Iterator, List, Dict, Tuple
 from enum import Enum, unique
 
 # Django imports
+from django.conf import settings
 from django.contrib.auth.models import Group
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum, OuterRef, Subquery, QuerySet
+from django.db.models.functions import Coalesce, Greatest
 from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.serializers import ModelSerializer
 
 
 # [L] Models
@@ -21,10 +32,15 @@ from .serializers import CountrySerializer, UserSerializer,\
 
 # [L] Repository
 from .errors import *
-from .repository_utils import Paginate
+from . import fast_serializers
+from .country_registry import CountryRegistry
+from .flight_graph import FlightGraph
+from .flight_boards import FlightBoards, Board
+from .replicas import reads_replica
+from .repository_utils import Paginate, day_range
 
 # [L] Utilities
-from ..utils import accepts, log_action
+from ..utils import accepts, instrument
 
 logger = logging.getLogger('django')
 
@@ -92,10 +108,49 @@ class DBTables(Enum):
                 logger.error(message)
                 raise NotFoundModelOrSerializerException(message)
 
+    @property
+    def values_serializer(self):
+        """
+        A read-only serializer with the same output as the table's serializer, used to serialize lists of rows quickly.
+        """
+        match (self.value):
+            case DBTables.COUNTRY.value:
+                return fast_serializers.COUNTRY
+            case DBTables.USER.value:
+                return fast_serializers.USER
+            case DBTables.GROUP.value:
+                return fast_serializers.GROUP
+            case DBTables.ADMIN.value:
+                return fast_serializers.ADMIN
+            case DBTables.AIRLINECOMPANY.value:
+                return fast_serializers.AIRLINECOMPANY
+            case DBTables.CUSTOMER.value:
+                return fast_serializers.CUSTOMER
+            case DBTables.FLIGHT.value:
+                return fast_serializers.FLIGHT
+            case DBTables.TICKET.value:
+                return fast_serializers.TICKET
+            case other:
+                message = f"Serializer could not be found for {self.name}."
+                logger.error(message)
+                raise NotFoundModelOrSerializerException(message)
+
+    @property
+    def ordering(self):
+        """
+        A unique ordering of the table's rows, used by cursor pagination.
+        """
+        match (self.value):
+            case DBTables.FLIGHT.value:
+                return ('departure_datetime', 'id')
+            case other:
+                return ('id',)
+
 
 class Repository():
     @staticmethod
-    @log_action
+    @instrument
+    @reads_replica
     @accepts(DBTables, int)
     def get_by_id(dbtable: DBTables, id: int) -> dict:
         """
@@ -115,6 +170,10 @@ class Repository():
         if id <= 0:
             raise OutOfBoundsException("ID must be larger than 0.")
         
+        if dbtable == DBTables.COUNTRY:
+            # Countries are kept in memory
+            return CountryRegistry.get(id) or {}
+        
         # Get and return item by id
         query = dbtable.model.objects.filter(pk=id).first()
         if query:
@@ -126,7 +185,38 @@ class Repository():
         return {}
 
     @staticmethod
-    @log_action
+    @instrument
+    @reads_replica
+    @accepts(DBTables, int)
+    async def aget_by_id(dbtable: DBTables, id: int) -> dict:
+        """
+        Async get_by_id() - gets an item from a certain table by id with the async ORM.
+
+        Args:
+            dbtable (DBTables): A DBTables objects corresponding with the right table/model.
+            id (int): id of the row to get.
+
+        Returns:
+            dict: A dictionary of the row. Blank dictionary if not found.
+        
+        Raises:
+            OutOfBoundsException for bad ID values.
+        """
+        # Validate arguments
+        if id <= 0:
+            raise OutOfBoundsException("ID must be larger than 0.")
+        
+        if dbtable == DBTables.COUNTRY:
+            # Countries are kept in memory
+            await CountryRegistry.aload()
+            return CountryRegistry.get(id) or {}
+        
+        # The values serializer has the same output as the table's serializer, without lazy loading relations
+        result = await dbtable.values_serializer.aserialize_query(dbtable.model.objects.filter(pk=id))
+        return result[0] if result else {}
+
+    @staticmethod
+    @instrument
     @accepts(str)
     def get_or_create_group(name: str) -> dict:
         """
@@ -144,7 +234,8 @@ class Repository():
         return DBTables.GROUP.serializer(group).data
     
     @staticmethod
-    @log_action
+    @instrument
+    @reads_replica
     @accepts(DBTables)
     def get_all(dbtable: DBTables, paginator: Paginate = Paginate()) -> List[dict]:
         """
@@ -157,15 +248,56 @@ class Repository():
         Returns:
             list[dict]: List of all serialized rows from model.
         """
+        if dbtable == DBTables.COUNTRY:
+            # Countries are kept in memory
+            return paginator.paginate_list(CountryRegistry.all(), dbtable.ordering)
         # Get the instances
-        paginator.total = dbtable.model.objects.count()
-        all_objects = dbtable.model.objects.all()[paginator.slice]
+        all_objects = paginator.paginate(dbtable.values_serializer.values(dbtable.model.objects.all()), dbtable.ordering)
         # Serialize them
-        result = [dbtable.serializer(obj).data for obj in all_objects]
+        result = dbtable.values_serializer.serialize(all_objects)
         return result
 
     @staticmethod
-    @log_action
+    @instrument
+    @reads_replica
+    @accepts(DBTables)
+    async def aget_all(dbtable: DBTables, paginator: Paginate = Paginate()) -> List[dict]:
+        """
+        Async get_all() - gets all rows from certain table with the async ORM.
+
+        Args:
+            dbtable (DBTables): A DBTables objects corresponding with the right table/model.
+            paginator (Paginate - Optional): A Paginate object if required.
+
+        Returns:
+            list[dict]: List of all serialized rows from model.
+        """
+        if dbtable == DBTables.COUNTRY:
+            # Countries are kept in memory
+            await CountryRegistry.aload()
+            return paginator.paginate_list(CountryRegistry.all(), dbtable.ordering)
+        rows = await paginator.apaginate(dbtable.values_serializer.values(dbtable.model.objects.all()), dbtable.ordering)
+        return await dbtable.values_serializer.aserialize(rows)
+
+    @staticmethod
+    @accepts(DBTables)
+    def export(dbtable: DBTables, chunk_size: int = 2000) -> Tuple[List[str], Iterator[dict]]:
+        """
+        Streams all rows from certain table, fetched chunk_size at a time through a server-side cursor as they're consumed.
+
+        Args:
+            dbtable (DBTables): A DBTables objects corresponding with the right table/model.
+            chunk_size (int, optional): Rows to fetch at a time. Defaults to 2000.
+
+        Returns:
+            Tuple[List[str], Iterator[dict]]: The rows' field names (nested fields as dotted names), and the serialized rows.
+        """
+        serializer = dbtable.values_serializer
+        chunks = serializer.serialize_chunks(dbtable.model.objects.order_by(*dbtable.ordering), chunk_size)
+        return serializer.field_names(), chain.from_iterable(chunks)
+
+    @staticmethod
+    @instrument
     @accepts(DBTables)
     def add(dbtable: DBTables, **fields) -> Tuple[dict, bool]:
         """
@@ -179,17 +311,23 @@ class Repository():
         """
         # Create the object
         deserialized_data = dbtable.serializer(data=fields)
-        # Validate the data and return the result and a success/failure flag
-        if deserialized_data.is_valid():
-            deserialized_data.save()
-            # If data is valid return a serialized instance of it
-            return deserialized_data.data, True
-        else:
-            # If there were errors in the creation of the instance return them
-            return deserialized_data.errors, False
+        with transaction.atomic():
+            # Validate the data and return the result and a success/failure flag
+            if deserialized_data.is_valid():
+                if dbtable == DBTables.TICKET:
+                    # Hold the ticket's seats in the same transaction as its creation
+                    ticket = deserialized_data.validated_data
+                    if not ticket.get('is_cancelled', False):
+                        Repository.reserve_seats(ticket['flight'].pk, ticket['seat_count'])
+                deserialized_data.save()
+                # If data is valid return a serialized instance of it
+                return deserialized_data.data, True
+            else:
+                # If there were errors in the creation of the instance return them
+                return deserialized_data.errors, False
     
     @staticmethod
-    @log_action
+    @instrument
     @accepts(DBTables, int)
     def update(dbtable: DBTables, id: int, **updated_values) -> Tuple[dict, bool]:
         """
@@ -202,53 +340,261 @@ class Repository():
             
         Raises:
             FetchError for not found rows.
+            FlightNotBookableException if a ticket update requires seats the flight doesn't have.
             
         Returns:
             Tuple[dict, bool]: Updated instance, success flag
         """
-        # Get the item
-        instance = dbtable.model.objects.filter(id=id).first()
-        if not instance:
-            raise FetchError(f"Failed to find an instance of '{dbtable.name}' with ID #{id}")
-        # Update the data
-        deserialized_data = dbtable.serializer(instance=instance, data=updated_values, partial=True)
-        # Validate the data and return the result and a success/failure flag
-        if deserialized_data.is_valid():
+        with transaction.atomic():
+            # Get the item, locking it so seat counters aren't overwritten by concurrent bookings
+            instance = dbtable.model.objects.select_for_update().filter(id=id).first()
+            if not instance:
+                raise FetchError(f"Failed to find an instance of '{dbtable.name}' with ID #{id}")
+            # Update the data
+            deserialized_data = dbtable.serializer(instance=instance, data=updated_values, partial=True)
+            # Validate the data and return the result and a success/failure flag
+            if not deserialized_data.is_valid():
+                errors = deserialized_data.errors
+                return errors, False
+            
+            # Keep the flights' seat counters in sync with the change
+            match (dbtable):
+                case DBTables.TICKET:
+                    Repository.__sync_ticket_seats(instance, deserialized_data.validated_data)
+                case DBTables.FLIGHT:
+                    errors = Repository.__sync_flight_seats(instance, deserialized_data.validated_data)
+                    if errors:
+                        return errors, False
+            
             new_obj = deserialized_data.save()
             return dbtable.serializer(new_obj).data, True
+    
+    @staticmethod
+    def __sync_ticket_seats(ticket: Ticket, updated_values: dict) -> None:
+        """Moves a ticket's seats between flight counters according to its pending update.
+
+        Args:
+            ticket (Ticket): The locked ticket instance, before the update.
+            updated_values (dict): Validated values about to be applied to the ticket.
+        """
+        old_seats = 0 if ticket.is_cancelled else ticket.seat_count
+        new_flight = updated_values.get('flight', ticket.flight)
+        new_seats = 0 if updated_values.get('is_cancelled', ticket.is_cancelled) else updated_values.get('seat_count', ticket.seat_count)
+        
+        if new_flight.pk == ticket.flight_id:
+            # Only reserve/release the difference
+            difference = new_seats - old_seats
+            if difference > 0:
+                Repository.reserve_seats(ticket.flight_id, difference)
+            elif difference < 0:
+                Repository.release_seats(ticket.flight_id, -difference)
         else:
-            errors = deserialized_data.errors
-            return errors, False
+            if old_seats:
+                Repository.release_seats(ticket.flight_id, old_seats)
+            if new_seats:
+                Repository.reserve_seats(new_flight.pk, new_seats)
     
     @staticmethod
-    @log_action
+    def __sync_flight_seats(flight: Flight, updated_values: dict) -> Union[dict, None]:
+        """Applies a flight's pending update to its tickets and seat counter.
+
+        Args:
+            flight (Flight): The locked flight instance, before the update.
+            updated_values (dict): Validated values about to be applied to the flight.
+
+        Returns:
+            Union[dict, None]: Validation errors, or None if the update may proceed.
+        """
+        if updated_values.get('is_cancelled') and not flight.is_cancelled:
+            # Cancelling a flight cancels its tickets and frees their seats
+            flight.tickets.filter(is_cancelled=False).update(is_cancelled=True)
+            flight.booked_seats = 0
+        elif updated_values.get('total_seats', flight.total_seats) < flight.booked_seats:
+            return {'total_seats': [f'Cannot be lower than the amount of booked seats ({flight.booked_seats}).']}
+        return None
+    
+    @staticmethod
+    @instrument
     @accepts(DBTables)
-    def add_all(dbtable: DBTables, new_rows: Iterable[dict]) -> Tuple[List[dict], List[dict]]:
+    def add_all(dbtable: DBTables, new_rows: Iterable[dict], batch_size: int = 1000) -> Tuple[List[dict], List[tuple]]:
         """
-        Add all rows to database.
+        Validates rows and adds the valid ones to the database in bulk, in a single transaction.
+        Rows are validated and inserted (bulk_create) a batch at a time.
+        If a batch fails to insert (ie. duplicates within the batch) it's inserted row by row, so only the offending rows fail.
 
         Args:
             dbtable (DBTables): Table to add the rows to.
-            new_rows (list): Model objects to add to the database.
+            new_rows (Iterable[dict]): Fields of the rows to add.
+            batch_size (int, optional): Amount of rows validated and inserted at a time. Defaults to 1000.
+        
+        Raises:
+            OutOfBoundsException: If the batch size is not positive.
         
         Returns:
-            Tuple[List[dict], List[dict]]: A tuple of successfully added and failed additions.
+            Tuple[List[dict], List[tuple]]: A tuple of the successfully added rows, and (fields, errors) tuples of the failed rows.
         """
+        if batch_size <= 0:
+            raise OutOfBoundsException("Batch size must be positive.")
         created = []
         failed = []
-        for fields in new_rows:
-            # Add a new instance
-            new_instance = Repository.add(dbtable, **fields)
-            # Route the result to the right list
-            if new_instance[1]:
-                created.append(new_instance[0])
-            else:
-                failed.append((fields, new_instance[0]))
-        # Return all created objects
+        # A single serializer validates all the rows, so its fields are only built once
+        validator = dbtable.serializer()
+        with transaction.atomic():
+            rows = iter(new_rows)
+            while batch := list(islice(rows, batch_size)):
+                valid = Repository.__validate_batch(validator, batch, failed)
+                if dbtable == DBTables.TICKET:
+                    # Hold the tickets' seats in the same transaction as their creation
+                    valid = Repository.__reserve_batch_seats(valid, failed)
+                created_ids = Repository.__insert_batch(dbtable, valid, failed)
+                # Serialize the new rows in a single query
+                created.extend(dbtable.values_serializer.serialize_query(dbtable.model.objects.filter(pk__in=created_ids).order_by('pk')))
         return created, failed
     
     @staticmethod
-    @log_action
+    def __validate_batch(validator: ModelSerializer, batch: List[dict], failed: list) -> List[tuple]:
+        """Validates a batch of rows, with a single query per related field.
+
+        Args:
+            validator (ModelSerializer): A serializer of the rows' table.
+            batch (List[dict]): Fields of the rows.
+            failed (list): A list to add the (fields, errors) of invalid rows to.
+
+        Returns:
+            List[tuple]: (fields, validated data) of the valid rows.
+        """
+        # Fetch the related instances of the whole batch, instead of a query per row and field
+        related_fields = {}
+        for field in validator.fields.values():
+            if isinstance(field, PrimaryKeyRelatedField) and not field.read_only:
+                related_fields.setdefault(field.queryset.model, []).append(field)
+        for model, model_fields in related_fields.items():
+            keys = set()
+            for field in model_fields:
+                for fields in batch:
+                    try:
+                        keys.add(model._meta.pk.to_python(fields[field.field_name]))
+                    except (KeyError, TypeError, DjangoValidationError):
+                        # Missing and invalid keys are reported by the validation itself
+                        pass
+            instances = model_fields[0].queryset.in_bulk(keys)
+            for field in model_fields:
+                field.to_internal_value = partial(Repository.__related_instance, field, instances)
+        valid = []
+        for fields in batch:
+            try:
+                valid.append((fields, validator.run_validation(fields)))
+            except ValidationError as e:
+                failed.append((fields, e.detail))
+        return valid
+    
+    @staticmethod
+    def __related_instance(field: PrimaryKeyRelatedField, instances: dict, data):
+        """Converts a primary key to one of the prefetched instances, failing like PrimaryKeyRelatedField would."""
+        if isinstance(data, bool):
+            field.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            instance = instances.get(field.queryset.model._meta.pk.to_python(data))
+        except (TypeError, DjangoValidationError):
+            field.fail('incorrect_type', data_type=type(data).__name__)
+        if instance is None:
+            field.fail('does_not_exist', pk_value=data)
+        return instance
+    
+    @staticmethod
+    def __reserve_batch_seats(valid: List[tuple], failed: list) -> List[tuple]:
+        """Reserves the seats of a batch of validated tickets, a single update per flight when all of its tickets fit.
+
+        Args:
+            valid (List[tuple]): (fields, validated data) of the tickets.
+            failed (list): A list to add the (fields, errors) of unbookable tickets to.
+
+        Returns:
+            List[tuple]: (fields, validated data) of the tickets that got their seats.
+        """
+        reserved = []
+        tickets_by_flight = {}
+        for fields, ticket in valid:
+            if ticket.get('is_cancelled', False):
+                reserved.append((fields, ticket))
+            elif ticket['seat_count'] <= 0:
+                failed.append((fields, {'seat_count': ['Seat count must be positive.']}))
+            else:
+                tickets_by_flight.setdefault(ticket['flight'].pk, []).append((fields, ticket))
+        for flight_id, tickets in tickets_by_flight.items():
+            try:
+                Repository.reserve_seats(flight_id, sum(ticket['seat_count'] for _, ticket in tickets))
+                reserved.extend(tickets)
+            except FlightNotBookableException:
+                # Not all of them fit, book the tickets one by one
+                for fields, ticket in tickets:
+                    try:
+                        Repository.reserve_seats(flight_id, ticket['seat_count'])
+                        reserved.append((fields, ticket))
+                    except FlightNotBookableException as e:
+                        failed.append((fields, {'non_field_errors': [f'Cannot book flight because {e}.']}))
+        return reserved
+    
+    @staticmethod
+    def __insert_batch(dbtable: DBTables, valid: List[tuple], failed: list) -> List[int]:
+        """Inserts a batch of validated rows with bulk_create, falling back to inserting row by row.
+
+        Args:
+            dbtable (DBTables): Table to add the rows to.
+            valid (List[tuple]): (fields, validated data) of the rows.
+            failed (list): A list to add the (fields, errors) of rows that failed to insert to.
+
+        Returns:
+            List[int]: IDs of the inserted rows.
+        """
+        many_to_many = [field.name for field in dbtable.model._meta.many_to_many]
+        rows = []
+        for fields, data in valid:
+            data = dict(data)
+            related = {name: data.pop(name) for name in many_to_many if name in data}
+            if dbtable == DBTables.USER:
+                # Same as UserSerializer.create
+                data['password'] = make_password(data.get('password'))
+            rows.append((fields, dbtable.model(**data), related))
+        if not rows:
+            return []
+        try:
+            with transaction.atomic():
+                dbtable.model.objects.bulk_create([instance for _, instance, _ in rows])
+                Repository.__add_many_related(dbtable, rows)
+                if dbtable == DBTables.FLIGHT:
+                    # bulk_create doesn't send post_save signals
+                    transaction.on_commit(partial(FlightGraph.update, [FlightGraph.row(instance) for _, instance, _ in rows]))
+                    transaction.on_commit(partial(FlightBoards.update, [instance for _, instance, _ in rows]))
+            return [instance.pk for _, instance, _ in rows]
+        except IntegrityError:
+            logger.info(f"Bulk insert to {dbtable.name} failed, inserting the batch row by row.")
+        created_ids = []
+        for fields, instance, related in rows:
+            try:
+                with transaction.atomic():
+                    instance.pk = None
+                    instance.save()
+                    Repository.__add_many_related(dbtable, [(fields, instance, related)])
+                created_ids.append(instance.pk)
+            except IntegrityError as e:
+                failed.append((fields, {'non_field_errors': [str(e)]}))
+                if dbtable == DBTables.TICKET and not instance.is_cancelled:
+                    Repository.release_seats(instance.flight_id, instance.seat_count)
+        return created_ids
+    
+    @staticmethod
+    def __add_many_related(dbtable: DBTables, rows: List[tuple]) -> None:
+        """Adds the many to many relations of inserted rows, a single insert per field."""
+        for field in dbtable.model._meta.many_to_many:
+            through = field.remote_field.through
+            through.objects.bulk_create([
+                through(**{f'{field.m2m_field_name()}_id': instance.pk, f'{field.m2m_reverse_field_name()}_id': related_instance.pk})
+                for _, instance, related in rows for related_instance in related.get(field.name, [])
+            ])
+    
+    @staticmethod
+    @instrument
     @accepts(DBTables, int)
     def remove(dbtable: DBTables, id: int) -> bool:
         """
@@ -261,21 +607,25 @@ class Repository():
         Returns:
             bool: True if succeeded, otherwise false.
         """
-        # Get the item
-        instance = dbtable.model.objects.filter(id=id).first()
-            
-        if instance:
-            # If an item was found, delete it
-            deleted = instance.delete()
-            if deleted[0] > 0:
-                # If succeeded return True
-                return True
-        else:
-            # If not found or failed return False
-            return False
+        with transaction.atomic():
+            # Get the item
+            instance = dbtable.model.objects.select_for_update().filter(id=id).first()
+                
+            if instance:
+                if dbtable == DBTables.TICKET and not instance.is_cancelled:
+                    # Free the seats held by the deleted ticket
+                    Repository.release_seats(instance.flight_id, instance.seat_count)
+                # If an item was found, delete it
+                deleted = instance.delete()
+                if deleted[0] > 0:
+                    # If succeeded return True
+                    return True
+            else:
+                # If not found or failed return False
+                return False
     
     @staticmethod
-    @log_action
+    @instrument
     @accepts(DBTables, int)
     def get_by_user_id(dbtable: DBTables, user_id: int):
         if not dbtable in (DBTables.ADMIN, DBTables.AIRLINECOMPANY, DBTables.CUSTOMER, DBTables.USER):
@@ -287,7 +637,7 @@ class Repository():
             return {}
             
     @staticmethod
-    @log_action
+    @instrument
     @accepts(str)
     def get_airline_by_username(username: str) -> Tuple[Dict, bool]:
         """
@@ -309,7 +659,7 @@ class Repository():
             return {}, False
     
     @staticmethod
-    @log_action
+    @instrument
     @accepts(str)
     def get_customer_by_username(username: str) -> Tuple[Dict, bool]:
         """
@@ -331,7 +681,7 @@ class Repository():
             return {}, False
     
     @staticmethod
-    @log_action
+    @instrument
     @accepts(str)
     def get_user_by_username(username: str) -> Tuple[dict, bool]:
         """
@@ -352,9 +702,10 @@ class Repository():
             return {}, False
     
     @staticmethod
-    @log_action
+    @instrument
+    @reads_replica
     @accepts((int, type(None)), (int, type(None)), (Date, type(None)), (int, type(None)), bool)
-    def get_flights_by_parameters(origin_country_id: Union[int, None], destination_country_id: Union[int, None], date: Union[Date, None], airline_id: Union[int, None], allow_cancelled: bool, paginator: Paginate = Paginate()) -> List[dict]:
+    def get_flights_by_parameters(origin_country_id: Union[int, None], destination_country_id: Union[int, None], date: Union[Date, None], airline_id: Union[int, None], allow_cancelled: bool, paginator: Paginate = Paginate(), expand: bool = False, min_seats: Union[int, None] = None) -> List[dict]:
         """
         Returns a list of flights that fit the parameters.
 
@@ -364,10 +715,80 @@ class Repository():
             date (date - Optional): date of departure. If None ignores this while filtering.
             airline_id (int - Optional): id field of the operating airline. If None ignores this while filtering.
             paginator (Paginate - Optional): A Paginate object if required.
+            expand (bool - Optional): Embed the airline's name and both countries in each flight.
+                                      Loaded with joins, so the query count does not grow with the page size. Defaults to False.
+            min_seats (int - Optional): Minimum amount of remaining seats. Checked against the flights' booked seat counters,
+                                        so availability doesn't add queries. If None ignores this while filtering.
 
         Returns:
             List[dict]: A list of dictionaries of flights.
         """
+        query = Repository.__flights_query(origin_country_id, destination_country_id, date, airline_id, allow_cancelled, min_seats)
+        if expand:
+            # The airline and countries are joined into the same query as the flights
+            serializer = fast_serializers.FLIGHT_DETAIL
+        else:
+            serializer = DBTables.FLIGHT.values_serializer
+        # Paginate the results
+        query = paginator.paginate(serializer.values(query), DBTables.FLIGHT.ordering)
+        # Serialize the results
+        flights = serializer.serialize(query)
+        return flights
+
+    @staticmethod
+    @instrument
+    @reads_replica
+    @accepts((int, type(None)), (int, type(None)), (Date, type(None)), (int, type(None)), bool)
+    async def aget_flights_by_parameters(origin_country_id: Union[int, None], destination_country_id: Union[int, None], date: Union[Date, None], airline_id: Union[int, None], allow_cancelled: bool, paginator: Paginate = Paginate(), expand: bool = False, min_seats: Union[int, None] = None) -> List[dict]:
+        """
+        Async get_flights_by_parameters() - returns a list of flights that fit the parameters, fetched with the async ORM.
+
+        Args:
+            origin_country_id (int - Optional): id field of the origin country. If None ignores this while filtering.
+            destination_country_id (int - Optional): id field of the destination country. If None ignores this while filtering.
+            date (date - Optional): date of departure. If None ignores this while filtering.
+            airline_id (int - Optional): id field of the operating airline. If None ignores this while filtering.
+            paginator (Paginate - Optional): A Paginate object if required.
+            expand (bool - Optional): Embed the airline's name and both countries in each flight. Defaults to False.
+            min_seats (int - Optional): Minimum amount of remaining seats. If None ignores this while filtering.
+
+        Returns:
+            List[dict]: A list of dictionaries of flights.
+        """
+        query = Repository.__flights_query(origin_country_id, destination_country_id, date, airline_id, allow_cancelled, min_seats)
+        serializer = fast_serializers.FLIGHT_DETAIL if expand else DBTables.FLIGHT.values_serializer
+        rows = await paginator.apaginate(serializer.values(query), DBTables.FLIGHT.ordering)
+        return await serializer.aserialize(rows)
+
+    @staticmethod
+    @accepts((int, type(None)), (int, type(None)), (Date, type(None)), (int, type(None)), bool)
+    def export_flights_by_parameters(origin_country_id: Union[int, None], destination_country_id: Union[int, None], date: Union[Date, None], airline_id: Union[int, None], allow_cancelled: bool, expand: bool = False, min_seats: Union[int, None] = None, chunk_size: int = 2000) -> Tuple[List[str], Iterator[dict]]:
+        """
+        Streams all the flights that fit the parameters, like get_flights_by_parameters without pagination.
+        The flights are fetched chunk_size at a time through a server-side cursor, as they're consumed.
+
+        Args:
+            origin_country_id (int - Optional): id field of the origin country. If None ignores this while filtering.
+            destination_country_id (int - Optional): id field of the destination country. If None ignores this while filtering.
+            date (date - Optional): date of departure. If None ignores this while filtering.
+            airline_id (int - Optional): id field of the operating airline. If None ignores this while filtering.
+            expand (bool - Optional): Embed the airline's name and both countries in each flight. Defaults to False.
+            min_seats (int - Optional): Minimum amount of remaining seats. If None ignores this while filtering.
+            chunk_size (int - Optional): Flights to fetch at a time. Defaults to 2000.
+
+        Returns:
+            Tuple[List[str], Iterator[dict]]: The flights' field names (nested fields as dotted names), and the serialized flights.
+        """
+        query = Repository.__flights_query(origin_country_id, destination_country_id, date, airline_id, allow_cancelled, min_seats)
+        serializer = fast_serializers.FLIGHT_DETAIL if expand else DBTables.FLIGHT.values_serializer
+        chunks = serializer.serialize_chunks(query.order_by(*DBTables.FLIGHT.ordering), chunk_size)
+        return serializer.field_names(), chain.from_iterable(chunks)
+
+    @staticmethod
+    def __flights_query(origin_country_id: Union[int, None], destination_country_id: Union[int, None], date: Union[Date, None], airline_id: Union[int, None], allow_cancelled: bool, min_seats: Union[int, None]) -> QuerySet:
+        """
+        Builds the query of the flights that fit the parameters, see get_flights_by_parameters.
+        """
         query = Flight.objects.all()
         if origin_country_id:
             # Get all flights that take off from origin_country
@@ -377,21 +798,90 @@ class Repository():
             query = query.filter(destination_country__id = destination_country_id)
         if date:
             # Of those flights get any that depart on the specified date
-            query = query.filter(departure_datetime__date = date)
+            day_start, day_end = day_range(date)
+            query = query.filter(departure_datetime__gte=day_start, departure_datetime__lt=day_end)
         if airline_id:
             # Of those flights get those that are operated by the specified airline
             query = query.filter(airline__id = airline_id)        
         if not allow_cancelled:
             query = query.filter(is_cancelled=False)
-        # Paginate the results
-        paginator.total = query.count()
-        query = query.all()[paginator.slice]
-        # Serialize the results
-        flights = [DBTables.FLIGHT.serializer(flight).data for flight in query]
-        return flights
+        if min_seats:
+            # Of those flights get the ones with enough seats left
+            query = query.filter(booked_seats__lte=F('total_seats') - min_seats)
+        return query
+
+    @staticmethod
+    @instrument
+    @accepts(int, int, Date, Date)
+    def get_itineraries(origin_country_id: int, destination_country_id: int, date_from: Date, date_to: Date, max_stops: int = 2, min_connection: int = 45, max_connection: int = 360, seats: int = 1, limit: int = 50, expand: bool = False) -> List[dict]:
+        """
+        Finds direct and connecting itineraries between two countries in the flight graph (see FlightGraph),
+        by the earliest arrival, then the fewest stops, then the latest departure.
+        The itineraries' flights are fetched in a single query, which also confirms they still have enough seats.
+
+        Args:
+            origin_country_id (int): id field of the origin country.
+            destination_country_id (int): id field of the destination country.
+            date_from (date): The first day the itinerary's first flight can depart on.
+            date_to (date): The last day the itinerary's first flight can depart on, up to settings.ITINERARY_MAX_DAYS days from date_from.
+            max_stops (int - Optional): Maximum connections, 0 to 2. Defaults to 2.
+            min_connection (int - Optional): Minimum minutes between landing and the connecting flight's departure. Defaults to 45.
+            max_connection (int - Optional): Maximum minutes between landing and the connecting flight's departure, up to settings.ITINERARY_MAX_CONNECTION. Defaults to 360.
+            seats (int - Optional): Seats required on each flight. Defaults to 1.
+            limit (int - Optional): Maximum amount of itineraries. Defaults to 50.
+            expand (bool - Optional): Embed the airline's name and both countries in each flight. Defaults to False.
+
+        Raises:
+            ValueError: If the countries are the same, the dates are out of order or too far apart, or any of the numbers is out of its range.
+
+        Returns:
+            List[dict]: The itineraries - their flights, stops, departure and arrival, total duration and connection times (in minutes).
+        """
+        if origin_country_id == destination_country_id:
+            raise ValueError("Origin and destination countries must be different.")
+        if date_to < date_from:
+            raise ValueError("The end date must not be before the start date.")
+        # The amount of itineraries grows with the first flights' and the connections' time windows
+        max_days = getattr(settings, 'ITINERARY_MAX_DAYS', 3)
+        if (date_to - date_from).days >= max_days:
+            raise ValueError(f"Itineraries can be searched up to {max_days} days at a time.")
+        if not 0 <= max_stops <= 2:
+            raise ValueError("Maximum stops must be between 0 and 2.")
+        if not 0 <= min_connection <= max_connection:
+            raise ValueError("Connection times must be positive, and the minimum must not be larger than the maximum.")
+        max_connection_limit = getattr(settings, 'ITINERARY_MAX_CONNECTION', 1440)
+        if max_connection > max_connection_limit:
+            raise ValueError(f"Connection times must be up to {max_connection_limit} minutes.")
+        if seats <= 0 or limit <= 0:
+            raise ValueError("Seats and limit must be larger than 0.")
+
+        itineraries = FlightGraph.search(
+            origin_country_id, destination_country_id, day_range(date_from)[0], day_range(date_to)[1],
+            max_stops, min_connection, max_connection, seats, limit
+        )
+        if not itineraries:
+            return []
+        serializer = fast_serializers.FLIGHT_DETAIL if expand else DBTables.FLIGHT.values_serializer
+        flight_ids = {leg.id for legs in itineraries for leg in legs}
+        flights = {flight['id']: flight for flight in serializer.serialize_query(Flight.objects.filter(id__in=flight_ids, is_cancelled=False))}
+
+        result = []
+        for legs in itineraries:
+            if any(leg.id not in flights or flights[leg.id]['remaining_seats'] < seats for leg in legs):
+                # Booked or cancelled since the graph was updated
+                continue
+            result.append({
+                'flights': [flights[leg.id] for leg in legs],
+                'stops': len(legs) - 1,
+                'departure_datetime': flights[legs[0].id]['departure_datetime'],
+                'arrival_datetime': flights[legs[-1].id]['arrival_datetime'],
+                'duration': round((legs[-1].arrival - legs[0].departure) / 60),
+                'connections': [round((next_leg.departure - leg.arrival) / 60) for leg, next_leg in zip(legs, legs[1:])]
+            })
+        return result
     
     @staticmethod
-    @log_action
+    @instrument
     @accepts(int)
     def get_flights_by_airline_id(airline_id: int, paginator: Paginate) -> List[dict]:
         """
@@ -407,69 +897,49 @@ class Repository():
         # Create the query
         query = Flight.objects.filter(airline__pk=airline_id)
         # Paginate the results
-        paginator.total = query.count()
-        query = query.all()[paginator.slice]
+        query = paginator.paginate(DBTables.FLIGHT.values_serializer.values(query), DBTables.FLIGHT.ordering)
         # Serialize the results
-        flights = [DBTables.FLIGHT.serializer(flight).data for flight in query]
+        flights = DBTables.FLIGHT.values_serializer.serialize(query)
         return flights
     
     @staticmethod
-    @log_action
+    @instrument
+    @reads_replica
     @accepts(int)
     def get_arrival_flights(country_id: int, paginator: Paginate) -> List[dict]:
         """
-        Get all flights arriving to a country in the next 12 hours.
+        Get all flights arriving to a country in the next 12 hours (settings.FLIGHT_BOARD_HOURS), from its arrivals board.
 
         Args:
             country_id (int): ID of the country.
             paginator (Paginate - Optional): A Paginate object if required.
 
         Returns:
-            List[dict]: A list of dictionaries of flights.
+            List[dict]: A list of dictionaries of flights, ordered by arrival.
         """
-        # Create a query
-        query = Flight.objects.filter(destination_country__id=country_id)
-        query = query.filter(arrival_datetime__gte=timezone.now())
-        query = query.filter(arrival_datetime__lte=timezone.now() + timedelta(hours=12))
-        
-        # Paginate the results
-        paginator.total = query.count()
-        query = query.all()[paginator.slice]
-        # Serialize the results
-        flights = [DBTables.FLIGHT.serializer(flight).data for flight in query]
-        return flights
+        flights, _ = FlightBoards.get(Board.ARRIVALS, country_id)
+        return paginator.paginate_list(flights, Board.ARRIVALS.ordering)
     
     @staticmethod
-    @log_action
+    @instrument
+    @reads_replica
     @accepts(int)
     def get_departure_flights(country_id: int, paginator: Paginate) -> List[dict]:
         """
-        Get all flights leaving a country in the next 12 hours.
+        Get all flights leaving a country in the next 12 hours (settings.FLIGHT_BOARD_HOURS), from its departures board.
 
         Args:
             country_id (int): ID of the country.
             paginator (Paginate - Optional): A Paginate object if required.
 
         Returns:
-            List[dict]: A list of dictionaries of flights.
+            List[dict]: A list of dictionaries of flights, ordered by departure.
         """
-        # Fetch the country
-        country = Country.objects.filter(pk=country_id).first()
-        if not country:
-            return []
-        # Create a query
-        query = Flight.objects.filter(origin_country__id=country_id)
-        query = query.filter(departure_datetime__gte=timezone.now())
-        query = query.filter(departure_datetime__lte=timezone.now() + timedelta(hours=12))
-        # Paginate the results
-        paginator.total = query.count()
-        query = query.all()[paginator.slice]
-        # Serialize the results
-        flights = [DBTables.FLIGHT.serializer(flight).data for flight in query]
-        return flights
+        flights, _ = FlightBoards.get(Board.DEPARTURES, country_id)
+        return paginator.paginate_list(flights, Board.DEPARTURES.ordering)
     
     @staticmethod
-    @log_action
+    @instrument
     @accepts(int)
     def get_tickets_by_customer(customer_id: int, paginator: Paginate) -> List[dict]:
         """
@@ -485,14 +955,13 @@ class Repository():
         # Create the query
         query = Ticket.objects.filter(customer__id=customer_id)
         # Paginate the results
-        paginator.total = query.count()
-        query = query.all()[paginator.slice]
+        query = paginator.paginate(DBTables.TICKET.values_serializer.values(query))
         # Serialize the results
-        tickets = [DBTables.TICKET.serializer(ticket).data for ticket in query]
+        tickets = DBTables.TICKET.values_serializer.serialize(query)
         return tickets
     
     @staticmethod
-    @log_action
+    @instrument
     @accepts(int)
     def get_airlines_by_country(country_id: int, paginator: Paginate) -> List[dict]:
         """
@@ -508,14 +977,14 @@ class Repository():
         # Create the query
         query = AirlineCompany.objects.filter(country__id=country_id)
         # Paginate the results
-        paginator.total = query.count()
-        query = query.all()[paginator.slice]
+        query = paginator.paginate(DBTables.AIRLINECOMPANY.values_serializer.values(query))
         # Serialize the results
-        airlines = [DBTables.AIRLINECOMPANY.serializer(airline).data for airline in query]
+        airlines = DBTables.AIRLINECOMPANY.values_serializer.serialize(query)
         return airlines
     
     @staticmethod
-    @log_action
+    @instrument
+    @reads_replica
     @accepts(str)
     def get_airlines_by_name(name: str,  paginator: Paginate, allow_deactivated = False) -> List[dict]:
         """
@@ -536,15 +1005,35 @@ class Repository():
             query = query.filter(user__is_active=True)
         
         # Paginate the results
-        paginator.total = query.count()
-        query = query.all()[paginator.slice]
+        query = paginator.paginate(DBTables.AIRLINECOMPANY.values_serializer.values(query))
         # Serialized the results
-        airlines = [DBTables.AIRLINECOMPANY.serializer(airline).data for airline in query]
+        airlines = DBTables.AIRLINECOMPANY.values_serializer.serialize(query)
         return airlines
+
+    @staticmethod
+    @instrument
+    @reads_replica
+    @accepts(str)
+    async def aget_airlines_by_name(name: str,  paginator: Paginate, allow_deactivated = False) -> List[dict]:
+        """
+        Async get_airlines_by_name() - gets all airlines whos name contains a str with the async ORM.
+
+        Args:
+            name (str): A search string.
+            paginator (Paginate - Optional): A Paginate object if required.
+
+        Returns:
+            List[dict]: A List of airline dictionaries.
+        """
+        query = AirlineCompany.objects.filter(name__icontains=name)
+        if not allow_deactivated:
+            query = query.filter(user__is_active=True)
+        rows = await paginator.apaginate(DBTables.AIRLINECOMPANY.values_serializer.values(query))
+        return await DBTables.AIRLINECOMPANY.values_serializer.aserialize(rows)
     
     
     @staticmethod
-    @log_action
+    @instrument
     @accepts(int)
     def get_flights_by_origin(country_id: int, paginator: Paginate) -> List[dict]:
         """Get flights that take off from a certain country.
@@ -559,14 +1048,13 @@ class Repository():
         # Create the query
         query = Flight.objects.filter(origin_country__id=country_id)
         # Paginate the results
-        paginator.total = query.count()
-        query = query.all()[paginator.slice]
+        query = paginator.paginate(DBTables.FLIGHT.values_serializer.values(query), DBTables.FLIGHT.ordering)
         # Serialize the results
-        flights = [DBTables.FLIGHT.serializer(flight).data for flight in query]
+        flights = DBTables.FLIGHT.values_serializer.serialize(query)
         return flights
     
     @staticmethod
-    @log_action
+    @instrument
     @accepts(int)
     def get_flights_by_destination(country_id: int, paginator: Paginate) -> List[dict]:
         """Get flights that land in a certain country.
@@ -581,14 +1069,13 @@ class Repository():
         # Create the query
         query = Flight.objects.filter(destination_country__id=country_id)
         # Paginate the results
-        paginator.total = query.count()
-        query = query.all()[paginator.slice]
+        query = paginator.paginate(DBTables.FLIGHT.values_serializer.values(query), DBTables.FLIGHT.ordering)
         # Serialize the results
-        flights = [DBTables.FLIGHT.serializer(flight).data for flight in query]
+        flights = DBTables.FLIGHT.values_serializer.serialize(query)
         return flights
     
     @staticmethod
-    @log_action
+    @instrument
     @accepts(Date)
     def get_flights_by_departure_date(date: Date, paginator: Paginate) -> List[dict]:
         """Get flights that depart on a certain date.
@@ -601,16 +1088,16 @@ class Repository():
             List[dict]: A List of flight dictionaries.
         """
         # Create the query
-        query = Flight.objects.filter(departure_datetime__date=date)
+        day_start, day_end = day_range(date)
+        query = Flight.objects.filter(departure_datetime__gte=day_start, departure_datetime__lt=day_end)
         # Paginate the results
-        paginator.total = query.count()
-        query = query.all()[paginator.slice]
+        query = paginator.paginate(DBTables.FLIGHT.values_serializer.values(query), DBTables.FLIGHT.ordering)
         # Serialize the results
-        flights = [DBTables.FLIGHT.serializer(flight).data for flight in query]
+        flights = DBTables.FLIGHT.values_serializer.serialize(query)
         return flights
     
     @staticmethod
-    @log_action
+    @instrument
     @accepts(Date)
     def get_flights_by_arrival_date(date: Date, paginator: Paginate) -> List[dict]:
         """Get flights that arrive on a certain date.
@@ -623,16 +1110,16 @@ class Repository():
             List[dict]: A List of flight dictionaries.
         """
         # Create the query
-        query = Flight.objects.filter(arrival_datetime__date=date)
+        day_start, day_end = day_range(date)
+        query = Flight.objects.filter(arrival_datetime__gte=day_start, arrival_datetime__lt=day_end)
         # Paginate the results
-        paginator.total = query.count()
-        query = query.all()[paginator.slice]
+        query = paginator.paginate(DBTables.FLIGHT.values_serializer.values(query), DBTables.FLIGHT.ordering)
         # Serialize the results
-        flights = [DBTables.FLIGHT.serializer(flight).data for flight in query]
+        flights = DBTables.FLIGHT.values_serializer.serialize(query)
         return flights
     
     @staticmethod
-    @log_action
+    @instrument
     @accepts(int)
     def get_flights_by_customer(customer_id: int, paginator: Paginate) -> List[dict]:
         """Fetch all flights for a customer.
@@ -647,14 +1134,13 @@ class Repository():
         # Create the query
         query = Flight.objects.filter(tickets__customer__id=customer_id)
         # Paginate the results
-        paginator.total = query.count()
-        query = query.all()[paginator.slice]
+        query = paginator.paginate(DBTables.FLIGHT.values_serializer.values(query), DBTables.FLIGHT.ordering)
         # Serialize the results
-        flights = [DBTables.FLIGHT.serializer(flight).data for flight in query]
+        flights = DBTables.FLIGHT.values_serializer.serialize(query)
         return flights
 
     @staticmethod
-    @log_action
+    @instrument
     @accepts(int)
     def get_tickets_by_flight(flight_id: int):
         """Get all tickets from a flight
@@ -666,12 +1152,12 @@ class Repository():
             list[dict]: A list of all tickets
         """
         query = Ticket.objects.filter(flight__id=flight_id).all()
-        tickets = [DBTables.TICKET.serializer(ticket).data for ticket in query]
+        tickets = DBTables.TICKET.values_serializer.serialize_query(query)
         return tickets
         
 
     @staticmethod
-    @log_action
+    @instrument
     @accepts(DBTables, int)
     def instance_exists(dbtable: DBTables, id: int) -> bool:
         """Check if an instance exists
@@ -683,6 +1169,8 @@ class Repository():
         Returns:
             bool: True if exsits, False otherwise
         """
+        if dbtable == DBTables.COUNTRY:
+            return CountryRegistry.exists(id)
         exists = dbtable.model.objects.filter(pk=id).exists()
         return exists
     
@@ -698,11 +1186,10 @@ class Repository():
         Returns:
             Tuple[bool, str]: A Tuple of Bookable(bool), Reason(str)
         """
-        flight_exists = Repository.instance_exists(DBTables.FLIGHT, id)
-        if not flight_exists:
+        flight = Flight.objects.filter(pk=id).first()
+        if not flight:
             return False, 'the flight does not exist'
         
-        flight = Flight.objects.get(pk=id)
         if flight.is_cancelled:
             return False, 'the flight was cancelled'
         
@@ -710,49 +1197,152 @@ class Repository():
         if flight_happened:
             return False, 'the flight has already taken off'
         
-        all_tickets = Repository.get_tickets_by_flight(id)
-        total_booked_seats = 0
-        # Count how many seats were booked
-        for ticket in all_tickets:
-            total_booked_seats +=  0 if ticket['is_cancelled'] else ticket['seat_count']
         # Check if there are enough seats to fulfill this order
-        if total_booked_seats + seat_count > flight.total_seats:
-            return False, f'the flight only has {flight.total_seats - total_booked_seats} seat(s) left'
+        if flight.booked_seats + seat_count > flight.total_seats:
+            return False, f'the flight only has {flight.remaining_seats} seat(s) left'
         
         return True, 'the flight can be booked'
     
     @staticmethod
-    @accepts(DBTables)
-    def get_users_by_usertype(usertype: DBTables) -> List[dict]:
-        if not usertype in (DBTables.ADMIN, DBTables.AIRLINECOMPANY, DBTables.CUSTOMER):
-            raise ValueError("User type must be one of the following: ADMIN, AIRLINECOMPANY, CUSTOMER")
-        # Get the users
+    @instrument
+    @accepts(int, int)
+    def reserve_seats(flight_id: int, seat_count: int) -> None:
+        """Adds seats to a flight's booked seats counter.
+        The check and the increment are a single conditional UPDATE, so concurrent bookings can never oversell a flight.
+
+        Args:
+            flight_id (int): ID of the flight
+            seat_count (int): Amount of seats to reserve
+
+        Raises:
+            OutOfBoundsException: If the seat count is not larger than 0.
+            FlightNotBookableException: If the flight cannot accommodate the seats.
+        """
+        if seat_count <= 0:
+            raise OutOfBoundsException("Seat count must be larger than 0.")
+        
+        reserved = Flight.objects.filter(
+            pk=flight_id,
+            is_cancelled=False,
+            departure_datetime__gt=timezone.now(),
+            booked_seats__lte=F('total_seats') - seat_count
+        ).update(booked_seats=F('booked_seats') + seat_count)
         
+        if not reserved:
+            # Find out why the flight couldn't be booked
+            bookable, reason = Repository.is_flight_bookable(flight_id, seat_count)
+            raise FlightNotBookableException(reason if not bookable else 'the flight could not be reserved')
+        transaction.on_commit(partial(FlightGraph.add_booked_seats, flight_id, seat_count))
+        transaction.on_commit(partial(FlightBoards.add_booked_seats, flight_id, seat_count))
+    
+    @staticmethod
+    @instrument
+    @accepts(int, int)
+    def release_seats(flight_id: int, seat_count: int) -> None:
+        """Removes seats from a flight's booked seats counter.
+
+        Args:
+            flight_id (int): ID of the flight
+            seat_count (int): Amount of seats to release
+        """
+        Flight.objects.filter(pk=flight_id).update(booked_seats=Greatest(F('booked_seats') - seat_count, 0))
+        transaction.on_commit(partial(FlightGraph.add_booked_seats, flight_id, -seat_count))
+        transaction.on_commit(partial(FlightBoards.add_booked_seats, flight_id, -seat_count))
+    
+    @staticmethod
+    @instrument
+    def rebuild_booked_seats() -> int:
+        """Recalculates every flight's booked seats counter from its non-cancelled tickets.
+
+        Returns:
+            int: The amount of flights whose counter was corrected.
+        """
+        booked = Ticket.objects.filter(flight=OuterRef('pk'), is_cancelled=False) \
+                                .values('flight').annotate(total=Sum('seat_count')).values('total')
+        with transaction.atomic():
+            drifted = Flight.objects.annotate(actual=Coalesce(Subquery(booked), 0)).exclude(booked_seats=F('actual'))
+            corrected = Flight.objects.filter(pk__in=drifted.values('pk')) \
+                                      .update(booked_seats=Coalesce(Subquery(booked), 0))
+            if corrected:
+                transaction.on_commit(FlightGraph.invalidate)
+                transaction.on_commit(FlightBoards.invalidate)
+            return corrected
+    
+    @staticmethod
+    @instrument
+    @accepts(DBTables)
+    def get_users_by_usertype(usertype: DBTables, paginator: Paginate = Paginate()) -> List[dict]:
+        """
+        Gets the users of a type (group), each with its profile under the type's key ('admin', 'airline' or 'customer').
+
+        Args:
+            usertype (DBTables): ADMIN, AIRLINECOMPANY or CUSTOMER.
+            paginator (Paginate, optional): A Paginate object if required.
+
+        Raises:
+            ValueError: If the user type is not one of the above, or the pagination cursor is invalid.
+
+        Returns:
+            List[dict]: The serialized users, ordered by ID.
+        """
+        group, key = Repository.__user_group(usertype)
+        serializer = DBTables.USER.values_serializer
+        users = paginator.paginate(serializer.values(User.objects.filter(groups__name=group).order_by('id')), DBTables.USER.ordering)
+        return Repository.__attach_profiles(serializer.serialize(users), usertype, key)
+
+    @staticmethod
+    @accepts(DBTables)
+    def export_users_by_usertype(usertype: DBTables, chunk_size: int = 2000) -> Tuple[List[str], Iterator[dict]]:
+        """
+        Streams the users of a type (group) with their profiles, like get_users_by_usertype without pagination.
+        The users are fetched chunk_size at a time through a server-side cursor as they're consumed, with a query for each chunk's profiles.
+
+        Args:
+            usertype (DBTables): ADMIN, AIRLINECOMPANY or CUSTOMER.
+            chunk_size (int, optional): Users to fetch at a time. Defaults to 2000.
+
+        Raises:
+            ValueError: If the user type is not one of the above.
+            OutOfBoundsException: If the chunk size isn't positive.
+
+        Returns:
+            Tuple[List[str], Iterator[dict]]: The users' field names (the profile's as dotted names), and the serialized users, ordered by ID.
+        """
+        # Validated right away, the users are fetched as they're consumed
+        group, key = Repository.__user_group(usertype)
+        if chunk_size <= 0:
+            raise OutOfBoundsException("Chunk size must be larger than 0.")
+        serializer = DBTables.USER.values_serializer
+        chunks = serializer.serialize_chunks(User.objects.filter(groups__name=group).order_by('id'), chunk_size)
+        fields = serializer.field_names() + [f'{key}.{name}' for name in usertype.values_serializer.field_names()]
+        return fields, chain.from_iterable(Repository.__attach_profiles(users, usertype, key) for users in chunks)
+
+    @staticmethod
+    def __user_group(usertype: DBTables) -> Tuple[str, str]:
+        """
+        Returns the group name of a user type, and the key of its profile in the serialized users.
+        """
         match (usertype):
             case DBTables.ADMIN:
-                users = User.objects.filter(groups__name="admin")
-                users = [DBTables.USER.serializer(user).data for user in users]
-                for user in users:
-                    admin = Admin.objects.filter(user__id=user['id']).first()
-                    user['admin'] = DBTables.ADMIN.serializer(admin).data if admin else None
-                    
+                return 'admin', 'admin'
             case DBTables.AIRLINECOMPANY:
-                users = User.objects.filter(groups__name="airline")
-                users = [DBTables.USER.serializer(user).data for user in users]
-                for user in users:
-                    airline = AirlineCompany.objects.filter(user__id=user['id']).first()
-                    user['airline'] = DBTables.AIRLINECOMPANY.serializer(airline).data if airline else None
-
+                return 'airline', 'airline'
             case DBTables.CUSTOMER:
-                users = User.objects.filter(groups__name="customer")
-                users = [DBTables.USER.serializer(user).data for user in users]
-                for user in users:
-                    customer = Customer.objects.filter(user__id=user['id']).first()
-                    user['customer'] = DBTables.CUSTOMER.serializer(customer).data if customer else None
+                return 'customer', 'customer'
             case other:
                 raise ValueError("User type must be one of the following: ADMIN, AIRLINECOMPANY, CUSTOMER")
-        
-        # Serialize the users
+
+    @staticmethod
+    def __attach_profiles(users: List[dict], usertype: DBTables, key: str) -> List[dict]:
+        """
+        Adds the users' profiles (or None) under the key, fetching all of them in one query.
+        """
+        if not users:
+            return users
+        profiles = usertype.values_serializer.serialize_query(usertype.model.objects.filter(user_id__in=[user['id'] for user in users]))
+        profiles = {profile['user']: profile for profile in profiles}
+        for user in users:
+            user[key] = profiles.get(user['id'])
         return users
     
     
@@ -805,7 +1395,7 @@ class Repository():
         return DBTables.USER.serializer(user).data
 
     # @staticmethod
-    # @log_action
+    # @instrument
     # def authenticate(request, username: str, password: str):
     #     user = authenticate(request, username=username, password=password)
     #     if user:
@@ -1,30 +1,71 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, List, Tuple, Union
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+
+def day_range(day: date) -> Tuple[datetime, datetime]:
+    """
+    Creates a half-open datetime range [start, end) covering a day in the current timezone.
+    Filtering a datetime column by this range (instead of '__date') lets the database use the column's indexes.
+
+    Args:
+        day (date): The day to cover.
+
+    Returns:
+        Tuple[datetime, datetime]: The start of the day, and the start of the following day.
+    """
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
 class Paginate():
     """
     A 1 indexed pagination class.
+    Paginates by page number (OFFSET/LIMIT), or by an opaque cursor (keyset pagination) when a cursor is given.
     """
-    def __init__(self, per_page: int = 50, page_number: int = 1, total: int = 0):
+    def __init__(self, per_page: int = 50, page_number: int = 1, total: int = 0, cursor: Union[str, None] = None, count_total: bool = True):
         """
         Create a Paginate object. If any of the arguments is zero or below, doesn't paginate.
 
         Args:
             per_page (int, optional): Number of items per page. Defaults to 50.
             page_number (int, optional): Page number. Defaults to 1.
+            cursor (str, optional): A cursor returned by a previous page, or an empty string for the first page.
+                                    If None paginates by page number. Defaults to None.
+            count_total (bool, optional): Whether to count the total amount of results. Defaults to True.
         """
         self.__per_page = per_page if per_page > 0 else 50
         self.__page_number = page_number if page_number > 0 else 1
         self.__total = total if total >= 0 else 0
-        
+        self.__cursor = cursor
+        self.__next_cursor = None
+        self.__count_total = count_total
+
     @property
     def total(self):
         return self.__total
-        
+
     @total.setter
     def total(self, value):
         if value >= 0:
             self.__total = value
         else:
             raise ValueError("Pagination total cannot be lower than 0.")
-    
+
+    @property
+    def is_cursor_based(self):
+        return self.__cursor is not None
+
+    @property
+    def next_cursor(self):
+        return self.__next_cursor
+
     @property
     def slice(self):
         """
@@ -39,16 +80,176 @@ class Paginate():
         start = (self.__page_number - 1) * self.__per_page
         stop = self.__page_number * self.__per_page
         return slice(start, stop)
-    
+
+    def paginate(self, query: QuerySet, ordering: Iterable[str] = ('id',)) -> Union[QuerySet, List]:
+        """
+        Applies the pagination to a query, counting the total amount of results if required.
+
+        Args:
+            query (QuerySet): The query to paginate.
+            ordering (Iterable[str], optional): Unique ordering of the results, the same for offset and cursor pages. Defaults to ('id',).
+
+        Raises:
+            ValueError: If the cursor is invalid.
+
+        Returns:
+            Union[QuerySet, List]: The requested page of the query.
+        """
+        if self.__count_total:
+            self.total = query.count()
+        ordering = tuple(ordering)
+        if not self.is_cursor_based:
+            return query.order_by(*ordering)[self.slice]
+
+        return self.__cursor_page(list(self.__cursor_query(query, ordering)), ordering)
+
+    async def apaginate(self, query: QuerySet, ordering: Iterable[str] = ('id',)) -> List:
+        """
+        Async paginate() - counts and fetches the requested page with the async ORM.
+
+        Args:
+            query (QuerySet): The query to paginate.
+            ordering (Iterable[str], optional): Unique ordering of the results, the same for offset and cursor pages. Defaults to ('id',).
+
+        Raises:
+            ValueError: If the cursor is invalid.
+
+        Returns:
+            List: The rows of the requested page.
+        """
+        if self.__count_total:
+            self.total = await query.acount()
+        ordering = tuple(ordering)
+        if not self.is_cursor_based:
+            return [row async for row in query.order_by(*ordering)[self.slice]]
+
+        return self.__cursor_page([row async for row in self.__cursor_query(query, ordering)], ordering)
+
+    def __cursor_query(self, query: QuerySet, ordering: tuple) -> QuerySet:
+        """
+        Limits a query to the rows of the cursor's page, and an extra row to find out if there's a next page.
+        """
+        # Keyset pagination - continue right after the last row of the previous page
+        query = query.order_by(*ordering)
+        if self.__cursor:
+            try:
+                query = query.filter(Paginate.__keyset_filter(ordering, Paginate.decode_cursor(self.__cursor, len(ordering))))
+            except (ValidationError, TypeError) as e:
+                # The cursor's values don't fit the ordered fields
+                raise ValueError("Pagination cursor is invalid.") from e
+        return query[:self.__per_page + 1]
+
+    def paginate_list(self, rows: List[dict], ordering: Iterable[str] = ('id',)) -> List[dict]:
+        """
+        Applies the pagination to an in-memory list of serialized rows.
+
+        Args:
+            rows (List[dict]): The rows to paginate.
+            ordering (Iterable[str], optional): Unique ordering of the rows, the same for offset and cursor pages. Defaults to ('id',).
+
+        Raises:
+            ValueError: If the cursor is invalid.
+
+        Returns:
+            List[dict]: The requested page of the rows.
+        """
+        if self.__count_total:
+            self.total = len(rows)
+        ordering = tuple(ordering)
+        # Usually already sorted, which sorting only has to confirm
+        rows = sorted(rows, key=lambda row: [row[field] for field in ordering])
+        if not self.is_cursor_based:
+            return rows[self.slice]
+
+        if self.__cursor:
+            values = Paginate.decode_cursor(self.__cursor, len(ordering))
+            try:
+                rows = [row for row in rows if [row[field] for field in ordering] > values]
+            except TypeError as e:
+                # The cursor's values don't fit the ordered fields
+                raise ValueError("Pagination cursor is invalid.") from e
+        return self.__cursor_page(rows[:self.__per_page + 1], ordering)
+
+    def __cursor_page(self, rows: list, ordering: tuple) -> list:
+        """
+        Trims the extra row fetched past the page, setting the next cursor if there was one.
+        """
+        if len(rows) > self.__per_page:
+            rows = rows[:self.__per_page]
+            last_row = rows[-1]
+            # Rows can be model instances, or dictionaries from a values() query
+            if isinstance(last_row, dict):
+                self.__next_cursor = Paginate.encode_cursor([last_row[field] for field in ordering])
+            else:
+                self.__next_cursor = Paginate.encode_cursor([getattr(last_row, field) for field in ordering])
+        return rows
+
+    @staticmethod
+    def __keyset_filter(ordering: tuple, values: list) -> Q:
+        """
+        Creates a filter for rows that come after the given values in the given (ascending) ordering.
+        """
+        condition = Q()
+        for index, field in enumerate(ordering):
+            # Equal on all previous fields, greater on this one
+            equal_fields = {ordering[i]: values[i] for i in range(index)}
+            condition |= Q(**equal_fields, **{f'{field}__gt': values[index]})
+        return condition
+
+    @staticmethod
+    def encode_cursor(values: list) -> str:
+        """
+        Encodes the ordering values of a row into an opaque cursor.
+        """
+        # Dates are kept at full precision so rows that share a millisecond aren't skipped
+        values = [value.isoformat() if isinstance(value, date) else value for value in values]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str, length: Union[int, None] = None) -> list:
+        """
+        Decodes a cursor into the ordering values of a row.
+
+        Raises:
+            ValueError: If the cursor is invalid.
+        """
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (binascii.Error, UnicodeError, json.JSONDecodeError) as e:
+            raise ValueError("Pagination cursor is invalid.") from e
+        if not isinstance(values, list) or not values or (length is not None and len(values) != length):
+            raise ValueError("Pagination cursor is invalid.")
+        return values
+
+    @staticmethod
+    def is_valid_cursor(cursor: str) -> bool:
+        """
+        Checks if a string is a valid cursor (an empty string being the first page).
+        """
+        if not cursor:
+            return True
+        try:
+            Paginate.decode_cursor(cursor)
+        except ValueError:
+            return False
+        return True
+
     # The combination of __getitem__() and keys() in an object allows for unpacking as a dictionary (ie. { **Paginate() } )
     def __getitem__(self, key):
         if key == "page":
             return self.__page_number
         elif key == "limit":
             return self.__per_page
-        
+
     def keys(self):
         return ('page', 'limit', 'total')
-    
+
     def get_dict(self):
-        return {'limit': self.__per_page, 'page': self.__page_number, 'total': self.__total}
\ No newline at end of file
+        result = {'limit': self.__per_page}
+        if self.is_cursor_based:
+            result.update({'cursor': self.__cursor, 'next_cursor': self.__next_cursor})
+        else:
+            result.update({'page': self.__page_number})
+        if self.__count_total:
+            result.update({'total': self.__total})
+        return result
@@ -44,9 +44,23 @@ class CustomerSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 class FlightSerializer(serializers.ModelSerializer):
+    remaining_seats = serializers.IntegerField(read_only=True)
+    
     class Meta:
         model = Flight
         fields = "__all__"
+        # Maintained by the repository alongside ticket changes
+        read_only_fields = ('booked_seats',)
+
+
+class FlightDetailSerializer(FlightSerializer):
+    """
+    A read-only flight serializer that embeds the airline's name and both countries.
+    The flight's airline and countries should be fetched alongside it (select_related) to avoid extra queries.
+    """
+    airline_name = serializers.CharField(source='airline.name', read_only=True)
+    origin_country_details = CountrySerializer(source='origin_country', read_only=True)
+    destination_country_details = CountrySerializer(source='destination_country', read_only=True)
 
 
         
@@ -0,0 +1,36 @@
+# Django imports
+from django.conf import settings
+from django.contrib.sessions.backends import cached_db
+from django.core.cache import caches
+from django.utils import timezone
+
+
+class SessionStore(cached_db.SessionStore):
+    """
+    Sessions read from the session cache (settings.SESSION_CACHE_ALIAS) and written through to the database, which they're
+    only read from when they're not cached - an authenticated request doesn't query the session table.
+    The cache must be shared by the worker processes, or a session deleted by one (ie. on logout) stays valid in the others.
+    Expired sessions are deleted a batch at a time (see the sweep_sessions command).
+    """
+    @classmethod
+    def clear_expired(cls, batch_size: int = 1000) -> int:
+        """Deletes the expired sessions from the database and the cache, a batch at a time so the table isn't locked for long.
+
+        Args:
+            batch_size (int, optional): Sessions to delete at a time. Defaults to 1000.
+
+        Returns:
+            int: Amount of deleted sessions.
+        """
+        model = cls.get_model_class()
+        cache = caches[settings.SESSION_CACHE_ALIAS]
+        deleted = 0
+        while True:
+            now = timezone.now()
+            keys = list(model.objects.filter(expire_date__lt=now).values_list('session_key', flat=True)[:batch_size])
+            if not keys:
+                return deleted
+            # A session that was extended in the meantime isn't expired anymore
+            deleted += model.objects.filter(session_key__in=keys, expire_date__lt=now).delete()[0]
+            # The cache doesn't return expired sessions, but they take its space until they're read again
+            cache.delete_many([cls.cache_key_prefix + key for key in keys])
@@ -0,0 +1,92 @@
+from copy import copy
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from .models import Country, User, Admin, AirlineCompany, Customer, Flight
+from .facades.identity_cache import IdentityCache
+from .repository.country_registry import CountryRegistry
+from .repository.flight_graph import FlightGraph
+from .repository.flight_boards import FlightBoards
+
+
+def invalidate_identity(user_id: int) -> None:
+    """
+    Invalidates a user's identity, and again on commit - a request that resolved it before the change was visible
+    would keep the old one (in its session) until it expires.
+    """
+    IdentityCache.invalidate(user_id)
+    transaction.on_commit(partial(IdentityCache.invalidate, user_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_identity(sender, instance, **kwargs):
+    """
+    A user's username or status changed.
+    """
+    if kwargs.get('update_fields') == frozenset({'last_login'}):
+        # Logging in doesn't change the identity
+        return
+    invalidate_identity(instance.pk)
+
+
+@receiver(post_save, sender=Admin)
+@receiver(post_delete, sender=Admin)
+@receiver(post_save, sender=AirlineCompany)
+@receiver(post_delete, sender=AirlineCompany)
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+def invalidate_profile_identity(sender, instance, **kwargs):
+    """
+    A user's profile (entity ID/name) changed.
+    """
+    invalidate_identity(instance.user_id)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_group_identity(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    A user's groups (role) changed - either through user.groups or group.user_set.
+    """
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        invalidate_identity(instance.pk)
+    elif action == 'pre_clear':
+        # The group is about to lose all of its users
+        for user_id in instance.user_set.values_list('pk', flat=True):
+            invalidate_identity(user_id)
+    else:
+        for user_id in pk_set:
+            invalidate_identity(user_id)
+
+
+@receiver(post_save, sender=Country)
+@receiver(post_delete, sender=Country)
+def invalidate_country_registry(sender, instance, **kwargs):
+    """
+    A country changed. Invalidated again on commit, in case the registry was reloaded before the change was visible.
+    """
+    CountryRegistry.invalidate()
+    transaction.on_commit(CountryRegistry.invalidate)
+
+
+@receiver(post_save, sender=Flight)
+def update_flight_graph(sender, instance, **kwargs):
+    """
+    A flight was added, changed or cancelled. Applied to the graph and the boards once committed, as it is now.
+    """
+    transaction.on_commit(partial(FlightGraph.update, [FlightGraph.row(instance)]))
+    transaction.on_commit(partial(FlightBoards.update, [copy(instance)]))
+
+
+@receiver(post_delete, sender=Flight)
+def remove_from_flight_graph(sender, instance, **kwargs):
+    """
+    A flight was deleted.
+    """
+    transaction.on_commit(partial(FlightGraph.remove, instance.pk))
+    transaction.on_commit(partial(FlightBoards.remove, instance.pk))
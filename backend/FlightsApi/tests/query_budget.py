@@ -0,0 +1,46 @@
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.test.utils import CaptureQueriesContext
+
+
+class _AssertMaxQueriesContext(CaptureQueriesContext):
+    def __init__(self, test_case, budget: int, connection) -> None:
+        self.test_case = test_case
+        self.budget = budget
+        super().__init__(connection)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super().__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return
+        executed = len(self)
+        self.test_case.assertLessEqual(
+            executed, self.budget,
+            "%d queries executed, the budget is %d\nCaptured queries were:\n%s" % (
+                executed, self.budget,
+                '\n'.join(f'{i}. {query["sql"]}' for i, query in enumerate(self.captured_queries, start=1))
+            )
+        )
+
+
+class QueryBudgetMixin():
+    """
+    Assertions on the amount of SQL queries a piece of code makes, for django.test.TestCase subclasses.
+    Unlike assertNumQueries, the budget is an upper bound, so optimizations don't break the tests - lower the budget instead.
+    """
+    def assertMaxQueries(self, budget: int, func=None, *args, using: str = DEFAULT_DB_ALIAS, **kwargs):
+        """Asserts that at most `budget` queries are executed when calling func(*args, **kwargs),
+        or inside a with block if func is omitted.
+
+        Args:
+            budget (int): The maximum amount of queries.
+            func (function, optional): A function to call. Defaults to None.
+            using (str, optional): The database alias. Defaults to DEFAULT_DB_ALIAS.
+
+        Returns:
+            The function's result, or the context manager if func is omitted.
+        """
+        context = _AssertMaxQueriesContext(self, budget, connections[using])
+        if func is None:
+            return context
+        with context:
+            return func(*args, **kwargs)
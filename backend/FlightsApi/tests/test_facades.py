@@ -1,13 +1,21 @@
+import time
 from unittest import TestCase
 from unittest.mock import patch
 
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import TestCase as DjangoTestCase, RequestFactory
+
 from FlightsApi.repository.repository_utils import Paginate
 
 from datetime import datetime, timedelta
 
 from FlightsApi.facades import AdministratorFacade, AirlineFacade, CustomerFacade, AnonymousFacade # Imports to test
 from FlightsApi.facades.facade_base import FacadeBase
+from FlightsApi.facades.identity_cache import IdentityCache, SessionIdentity
+from FlightsApi.sessions import SessionStore
 from FlightsApi.repository import Paginate, DBTables, errors as RepoErrors
+from FlightsApi.models import User, Admin
 
 
 class TestFacadeBase(TestCase):
@@ -821,6 +829,39 @@ class TestAirlineFacade(TestCase):
             self.assertEqual(result[0], 400) 
             self.assertIn('fieldError', result[1]['error'])
             
+    
+    @patch('FlightsApi.facades.airline_facade.R')
+    def test_add_flights(self, mock_repo):
+        time1 = datetime.now()
+        time2 = time1 + timedelta(days=1)
+        flights = [(row, {'origin_country': row, 'destination_country': 1, 'departure_datetime': time1, 'arrival_datetime': time2, 'total_seats': 1}) for row in (1, 3, 4)]
+        invalid_rows = [{'row': 2, 'errors': "Total seats is required."}]
+        
+        with self.subTest('Partial success'):
+            # The second valid row fails to be added
+            mock_repo.add_all.side_effect = lambda table, rows: ([{'id': rows[0]['origin_country']}, {'id': rows[2]['origin_country']}], [(rows[1], {'airline': ['Some error']})])
+            result = self.facade.add_flights(flights, invalid_rows)
+            self.assertEqual(result[0], 201)
+            self.assertDictEqual(result[1], {'data': {'created': 2, 'failed': 2, 'rows': [
+                {'row': 1, 'data': {'id': 1}},
+                {'row': 2, 'errors': "Total seats is required."},
+                {'row': 3, 'errors': {'airline': ['Some error']}},
+                {'row': 4, 'data': {'id': 4}},
+            ]}})
+            added_rows = mock_repo.add_all.call_args[0][1]
+            self.assertTrue(all(row['airline'] == 1 for row in added_rows))
+        
+        with self.subTest('Nothing added'):
+            mock_repo.add_all.side_effect = lambda table, rows: ([], [])
+            result = self.facade.add_flights([], invalid_rows)
+            self.assertEqual(result[0], 400)
+            self.assertEqual(result[1]['errors']['failed'], 1)
+        
+        with self.subTest('Unexpected exception'):
+            mock_repo.add_all.side_effect = Exception('Some error')
+            result = self.facade.add_flights(flights)
+            self.assertEqual(result[0], 500)
+            self.assertIn('unexpected error', result[1]['error'])
             
     @patch('FlightsApi.facades.airline_facade.R')
     def test_update_flight_success(self, mock_repo):
@@ -1265,4 +1306,54 @@ class TestAnonymousFacade(TestCase):
             self.assertEqual(result[0], 400) 
             self.assertIn('fieldError', result[1]['error'])
     
-    
\ No newline at end of file
+    
+
+class TestFacadeResolutionCache(DjangoTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = User.objects.create_user("testadmin", "test@admin.com", "test1234")
+        self.user.groups.add(Group.objects.get_or_create(name='admin')[0])
+        self.admin = Admin.objects.create(first_name="Test", last_name="Admin", user=self.user)
+        self.request = RequestFactory().get('/api/whoami/')
+        self.request.user = self.user
+        return super().setUp()
+    
+    def test_cached_resolution(self):
+        facade = AnonymousFacade.login(self.request)
+        self.assertIsInstance(facade, AdministratorFacade)
+        with self.assertNumQueries(0):
+            facade = AnonymousFacade.login(self.request)
+        self.assertIsInstance(facade, AdministratorFacade)
+        self.assertEqual(self.admin.id, facade.entity_id)
+        self.assertEqual("Test Admin", facade.entity_name)
+    
+    def test_profile_change_invalidates(self):
+        AnonymousFacade.login(self.request)
+        self.admin.first_name = "Changed"
+        self.admin.save()
+        self.assertEqual("Changed Admin", AnonymousFacade.login(self.request).entity_name)
+    
+    def test_group_change_invalidates(self):
+        AnonymousFacade.login(self.request)
+        self.user.groups.clear()
+        self.assertIsInstance(AnonymousFacade.login(self.request), AnonymousFacade)
+    
+    def test_invalidated_by_another_process(self):
+        self.request.session = SessionStore()
+        stale = {'role': 'admin', 'user': {'id': self.user.id, 'username': self.user.username}, 'profile': {'id': self.admin.id}}
+        self.assertIsInstance(AnonymousFacade.login(self.request), AdministratorFacade)
+        self.user.groups.clear()
+        # This process' identity cache wasn't invalidated, only the shared invalidation time was
+        IdentityCache.set(self.user.id, stale)
+        self.assertIsInstance(AnonymousFacade.login(self.request), AnonymousFacade)
+        self.assertEqual('anon', IdentityCache.get(self.user.id)['role'])
+    
+    def test_invalidated_on_commit(self):
+        self.request.session = SessionStore()
+        identity = {'role': 'admin', 'user': {'id': self.user.id, 'username': self.user.username}, 'profile': {'id': self.admin.id}}
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.clear()
+            # Resolved by another request before the change was committed
+            SessionIdentity.set(self.request.session, self.user.id, identity, time.time())
+            IdentityCache.set(self.user.id, identity)
+        self.assertIsInstance(AnonymousFacade.login(self.request), AnonymousFacade)
@@ -0,0 +1,176 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from FlightsApi.facades import AnonymousFacade
+from FlightsApi.facades.facade_base import FacadeBase
+from FlightsApi.repository.country_registry import CountryRegistry
+from FlightsApi.models import User, Admin, AirlineCompany, Customer, Country, Flight, Ticket
+
+from .query_budget import QueryBudgetMixin
+
+
+# Rows of each kind - large enough that per-row queries blow any budget
+ROWS = 20
+
+
+class TestFacadeQueryBudgets(QueryBudgetMixin, TestCase):
+    """
+    Pins the maximum amount of queries each facade method makes with ROWS rows of data.
+    When a change makes a method cheaper, lower its budget.
+    """
+    @classmethod
+    def setUpTestData(cls) -> None:
+        groups = {name: Group.objects.get_or_create(name=name)[0] for name in ('admin', 'airline', 'customer')}
+
+        def create_user(username: str, group: str) -> User:
+            # No password - hashing one per user would make up most of the test's time
+            user = User.objects.create_user(username, f'{username}@test.com')
+            user.groups.add(groups[group])
+            return user
+
+        cls.countries = [Country.objects.create(name=f'Country {i}', symbol=f'C{i}', flag=f'flag{i}.png') for i in range(3)]
+        cls.admins = [
+            Admin.objects.create(first_name='Admin', last_name=str(i), user=create_user(f'admin{i}', 'admin'))
+            for i in range(ROWS)
+        ]
+        cls.airlines = [
+            AirlineCompany.objects.create(name=f'Airline {i}', country=cls.countries[i % 3], user=create_user(f'airline{i}', 'airline'))
+            for i in range(ROWS)
+        ]
+        cls.customers = [
+            Customer.objects.create(first_name='Customer', last_name=str(i), address='Address', phone_number=f'+972 {i:07}', user=create_user(f'customer{i}', 'customer'))
+            for i in range(ROWS)
+        ]
+        cls.departure = timezone.now().replace(hour=12, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        cls.flights = [
+            Flight.objects.create(
+                airline=cls.airlines[0], origin_country=cls.countries[0], destination_country=cls.countries[1],
+                departure_datetime=cls.departure + timedelta(minutes=i), arrival_datetime=cls.departure + timedelta(hours=3, minutes=i),
+                total_seats=100, booked_seats=1
+            )
+            for i in range(ROWS)
+        ]
+        cls.tickets = [Ticket.objects.create(flight=flight, customer=cls.customers[0], seat_count=1) for flight in cls.flights]
+
+    def setUp(self) -> None:
+        cache.clear()
+        CountryRegistry.invalidate()
+        self.admin = AnonymousFacade.facade_from_user(self.admins[0].user)
+        self.airline = AnonymousFacade.facade_from_user(self.airlines[0].user)
+        self.customer = AnonymousFacade.facade_from_user(self.customers[0].user)
+
+    def new_flight(self) -> dict:
+        return {
+            'origin_country': self.countries[0].id,
+            'destination_country': self.countries[1].id,
+            'departure_datetime': self.departure,
+            'arrival_datetime': self.departure + timedelta(hours=3),
+            'total_seats': 10
+        }
+
+    def test_facade_resolution(self):
+        cache.clear()
+        self.assertMaxQueries(4, AnonymousFacade.facade_from_user, self.admins[1].user)
+        # Cached
+        self.assertMaxQueries(0, AnonymousFacade.facade_from_user, self.admins[1].user)
+
+    def test_whoami(self):
+        for facade in (self.admin, self.airline, self.customer, AnonymousFacade()):
+            code, _ = self.assertMaxQueries(0, facade.whoami)
+            self.assertEqual(200, code)
+
+    def test_get_flights(self):
+        code, res = self.assertMaxQueries(2, FacadeBase.get_all_flights)
+        self.assertEqual(ROWS, len(res['data']))
+        code, _ = self.assertMaxQueries(1, FacadeBase.get_flight_by_id, self.flights[0].id)
+        self.assertEqual(200, code)
+
+    def test_get_flights_by_parameters(self):
+        for expand in (False, True):
+            with self.subTest(expand=expand):
+                code, res = self.assertMaxQueries(2, FacadeBase.get_flights_by_parameters, origin_country_id=self.countries[0].id, expand=expand)
+                self.assertEqual(ROWS, len(res['data']))
+        with self.subTest('Remaining seats'):
+            code, res = self.assertMaxQueries(2, FacadeBase.get_flights_by_parameters, min_seats=99)
+            self.assertEqual(ROWS, len(res['data']))
+            code, res = self.assertMaxQueries(2, FacadeBase.get_flights_by_parameters, min_seats=100)
+            self.assertEqual(0, len(res.get('data', [])))
+        with self.subTest('Cursor pagination'):
+            code, res = self.assertMaxQueries(1, FacadeBase.get_flights_by_parameters, count_total=False)
+            self.assertEqual(ROWS, len(res['data']))
+
+    def test_get_airlines(self):
+        code, res = self.assertMaxQueries(2, FacadeBase.get_airlines_by_name, 'Airline')
+        self.assertEqual(ROWS, len(res['data']))
+        code, _ = self.assertMaxQueries(1, FacadeBase.get_airline_by_id, self.airlines[0].id)
+        self.assertEqual(200, code)
+
+    def test_get_countries(self):
+        # Loads the country registry
+        code, res = self.assertMaxQueries(1, FacadeBase.get_all_countries)
+        self.assertEqual(3, len(res['data']))
+        self.assertMaxQueries(0, FacadeBase.get_all_countries)
+        self.assertMaxQueries(0, FacadeBase.get_country_by_id, self.countries[0].id)
+
+    def test_get_users_by_usertype(self):
+        for usertype in ('admins', 'airlines', 'customers'):
+            with self.subTest(usertype=usertype):
+                # Count, users, their groups and permissions, and profiles
+                code, res = self.assertMaxQueries(5, self.admin.get_users_by_usertype, usertype)
+                self.assertEqual(ROWS, len(res['data']))
+                code, res = self.assertMaxQueries(4, self.admin.get_users_by_usertype, usertype, limit=5, cursor='', count_total=False)
+                self.assertEqual(5, len(res['data']))
+
+    def test_get_customers(self):
+        code, res = self.assertMaxQueries(2, self.admin.get_all_customers)
+        self.assertEqual(ROWS, len(res['data']))
+        code, _ = self.assertMaxQueries(1, self.admin.get_customer_by_id, self.customers[0].id)
+        self.assertEqual(200, code)
+
+    def test_get_my_tickets(self):
+        code, res = self.assertMaxQueries(4, self.customer.get_my_tickets)
+        self.assertEqual(ROWS, len(res['data']))
+
+    def test_add_ticket(self):
+        customer = AnonymousFacade.facade_from_user(self.customers[1].user)
+        code, _ = self.assertMaxQueries(7, customer.add_ticket, self.flights[0].id, 2)
+        self.assertEqual(201, code)
+
+    def test_cancel_ticket(self):
+        code, _ = self.assertMaxQueries(7, self.customer.cancel_ticket, self.tickets[0].id)
+        self.assertEqual(200, code)
+
+    def test_add_flight(self):
+        flight = self.new_flight()
+        code, _ = self.assertMaxQueries(
+            6, self.airline.add_flight,
+            flight['origin_country'], flight['destination_country'], flight['departure_datetime'], flight['arrival_datetime'], flight['total_seats']
+        )
+        self.assertEqual(201, code)
+
+    def test_add_flights(self):
+        code, res = self.assertMaxQueries(8, self.airline.add_flights, [(row, self.new_flight()) for row in range(1, ROWS + 1)])
+        self.assertEqual(201, code)
+        self.assertEqual(ROWS, res['data']['created'])
+
+    def test_update_flight(self):
+        code, _ = self.assertMaxQueries(5, self.airline.update_flight, self.flights[1].id, total_seats=150)
+        self.assertEqual(200, code)
+
+    def test_cancel_flight(self):
+        code, _ = self.assertMaxQueries(6, self.airline.cancel_flight, self.flights[2].id)
+        self.assertEqual(204, code)
+
+    def test_update_profiles(self):
+        code, _ = self.assertMaxQueries(4, self.airline.update_airline, name='Renamed')
+        self.assertEqual(200, code)
+        code, _ = self.assertMaxQueries(4, self.customer.update_customer, self.customer.entity_id, address='New address')
+        self.assertEqual(200, code)
+
+    def test_deactivate_customer(self):
+        code, _ = self.assertMaxQueries(7, self.admin.deactivate_customer, self.customers[5].id)
+        self.assertEqual(204, code)
@@ -1,14 +1,29 @@
-from django.test import TestCase
+from unittest.mock import patch
+import asyncio
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.sessions.backends.cache import SessionStore
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection, transaction
+from django.contrib.auth.models import Group
+from rest_framework.renderers import JSONRenderer
 
 from ..repository.repository import Repository, DBTables
 from ..repository.errors import *
 from ..repository.repository_utils import Paginate
+from ..repository.country_registry import CountryRegistry
+from ..repository.flight_graph import FlightGraph, _Graph
+from ..repository.flight_boards import FlightBoards, Board
+from ..repository.replicas import ReadRouting, ReplicaRouter, reads_replica, current_routing
+from ..middleware import ReplicaMiddleware
+from ..repository.serializers import FlightDetailSerializer
 
 from ..utils.exceptions import IncorrectTypePassedToFunctionException
 from ..models import User, Admin, AirlineCompany, Customer, Country, Flight, Ticket
 
 from django.utils import timezone
-from datetime import timedelta, date
+from datetime import timedelta, date, datetime, time
 
 
 class TestGetById(TestCase):
@@ -165,6 +180,69 @@ class TestAddAll(TestCase):
             self.assertEqual(0, len(repo_result[0]))
         with self.subTest("Failed addition"):
             self.assertEqual(2, len(repo_result[1]))
+    
+    def test_add_all_users(self):
+        group = Group.objects.create(name="Customer")
+        new_rows = [{'username': f"test{i}", 'email': "a@a.com", 'password': "test", 'groups': [group.id]} for i in range(3)]
+        created, failed = Repository.add_all(DBTables.USER, new_rows, batch_size=2)
+        self.assertListEqual([f"test{i}" for i in range(3)], [user['username'] for user in created])
+        self.assertListEqual([[group.id]] * 3, [user['groups'] for user in created])
+        self.assertTrue(User.objects.get(username="test0").check_password("test"))
+    
+    def test_add_all_duplicates(self):
+        new_rows = [
+            {'username': "test1", 'email': "a@a.com", 'password': "test1"},
+            {'username': "test1", 'email': "b@b.com", 'password': "test2"},
+            {'username': "test2", 'email': "c@c.com", 'password': "test3"},
+        ]
+        created, failed = Repository.add_all(DBTables.USER, new_rows)
+        self.assertListEqual(["test1", "test2"], [user['username'] for user in created])
+        self.assertEqual(1, len(failed))
+        self.assertEqual("b@b.com", failed[0][0]['email'])
+    
+    def test_add_all_flights(self):
+        country = Country.objects.create(name="Israel", symbol="IL", flag="some/slug.jpg")
+        airline = AirlineCompany.objects.create(
+            name="Django Airlines",
+            country=country,
+            user=User.objects.create_user(username="airline1", email="user1@airline.com")
+        )
+        departure = timezone.now() + timedelta(days=1)
+        new_rows = [{
+            'airline': airline.id,
+            'origin_country': country.id,
+            'destination_country': country.id,
+            'departure_datetime': departure + timedelta(hours=i),
+            'arrival_datetime': departure + timedelta(hours=i + 5),
+            'total_seats': 100
+        } for i in range(50)]
+        new_rows.append({**new_rows[0], 'airline': airline.id + 1})
+        # Savepoints, related instances, insert, and fetching the created rows - regardless of the amount of rows
+        with self.assertNumQueries(8):
+            created, failed = Repository.add_all(DBTables.FLIGHT, new_rows)
+        self.assertEqual(50, len(created))
+        self.assertEqual(50, Flight.objects.count())
+        self.assertEqual(1, len(failed))
+        self.assertIn('airline', failed[0][1])
+    
+    def test_add_all_tickets(self):
+        country = Country.objects.create(name="Israel", symbol="IL", flag="some/slug.jpg")
+        airline = AirlineCompany.objects.create(
+            name="Django Airlines",
+            country=country,
+            user=User.objects.create_user(username="airline1", email="user1@airline.com")
+        )
+        customer = Customer.objects.create(first_name="Customer", last_name="Customerovich", address="Street 1", phone_number="0500000000",
+                                           user=User.objects.create_user(username="customer1", email="user1@customer.com"))
+        departure = timezone.now() + timedelta(days=1)
+        flight = Flight.objects.create(airline=airline, origin_country=country, destination_country=country,
+                                       departure_datetime=departure, arrival_datetime=departure + timedelta(hours=5), total_seats=5)
+        new_rows = [{'flight': flight.id, 'customer': customer.id, 'seat_count': seat_count} for seat_count in (2, 4, 3, 0)]
+        created, failed = Repository.add_all(DBTables.TICKET, new_rows)
+        self.assertListEqual([2, 3], [ticket['seat_count'] for ticket in created])
+        self.assertCountEqual([4, 0], [fields['seat_count'] for fields, _ in failed])
+        flight.refresh_from_db()
+        self.assertEqual(5, flight.booked_seats)
 
 
 class TestRemove(TestCase):
@@ -336,6 +414,32 @@ class TestQueries(TestCase):
         with self.subTest("TypeError @ date"):
             self.assertRaises(TypeError, lambda: Repository.get_flights_by_parameters(1, 1, "error"))
     
+    def test_get_flights_by_parameters_expanded(self):
+        flight = self.testing_data['flights'][0]
+        
+        with self.subTest("Embedded details"):
+            result = Repository.get_flights_by_parameters(None, None, None, None, True, Paginate(), expand=True)
+            result_flight = next(item for item in result if item['id'] == flight.id)
+            self.assertEqual(flight.airline.id, result_flight['airline'])
+            self.assertEqual(flight.airline.name, result_flight['airline_name'])
+            self.assertEqual(flight.origin_country.symbol, result_flight['origin_country_details']['symbol'])
+            self.assertEqual(flight.destination_country.name, result_flight['destination_country_details']['name'])
+        
+        with self.subTest("Constant query count"):
+            # Add flights so the page is larger than the setup data
+            for _ in range(10):
+                Flight.objects.create(
+                    airline=flight.airline,
+                    origin_country=flight.origin_country,
+                    destination_country=flight.destination_country,
+                    departure_datetime=flight.departure_datetime,
+                    arrival_datetime=flight.arrival_datetime,
+                    total_seats=1
+                )
+            # One count query and one joined select, regardless of page size
+            with self.assertNumQueries(2):
+                Repository.get_flights_by_parameters(None, None, None, None, True, Paginate(), expand=True)
+    
     def test_get_flights_by_airline_id(self):
         airline = self.testing_data['airlines'][0]
         flight_list = [flight for flight in airline.flights.all()]
@@ -526,4 +630,645 @@ class TestQueries(TestCase):
             
         with self.subTest("TypeError @ country_id"):
             self.assertRaises(TypeError, lambda: Repository.get_flights_by_customer("err"))
-    
\ No newline at end of file
+    
+
+class TestSeatInventory(TestCase):
+    def setUp(self) -> None:
+        return_value = super().setUp() or None
+        country = Country.objects.create(name="Israel", symbol="IL", flag="some/slug.jpg")
+        airline = AirlineCompany.objects.create(
+            name="Django Airlines",
+            country=country,
+            user=User.objects.create_user(username="airline1", email="user1@airline.com")
+        )
+        self.customers = [
+            Customer.objects.create(
+                first_name="some",
+                last_name="testing",
+                address="123 test ave.",
+                phone_number=f"+123 1234 123{i}",
+                user=User.objects.create_user(username=f"customer{i}", email=f"user{i}@customer.com")
+            ) for i in range(3)
+        ]
+        self.flight = Flight.objects.create(
+            airline=airline,
+            origin_country=country,
+            destination_country=country,
+            departure_datetime=timezone.now() + timedelta(days=1),
+            arrival_datetime=timezone.now() + timedelta(days=1, hours=2),
+            total_seats=3
+        )
+        return return_value
+    
+    def book(self, customer, seat_count):
+        return Repository.add(DBTables.TICKET, flight=self.flight.id, customer=customer.id, seat_count=seat_count)
+    
+    def test_booking_updates_counter(self):
+        ticket, success = self.book(self.customers[0], 2)
+        self.assertTrue(success)
+        self.flight.refresh_from_db()
+        self.assertEqual(2, self.flight.booked_seats)
+        self.assertEqual(1, Repository.get_by_id(DBTables.FLIGHT, self.flight.id)['remaining_seats'])
+    
+    def test_no_overselling(self):
+        self.book(self.customers[0], 2)
+        with self.subTest("Not enough seats"):
+            self.assertRaises(FlightNotBookableException, lambda: self.book(self.customers[1], 2))
+            # The rejected ticket was rolled back with its reservation
+            self.assertEqual(1, Ticket.objects.filter(flight=self.flight).count())
+            self.flight.refresh_from_db()
+            self.assertEqual(2, self.flight.booked_seats)
+        with self.subTest("Bad seat count"):
+            self.assertRaises(OutOfBoundsException, lambda: self.book(self.customers[1], 0))
+    
+    def test_cancel_ticket_releases_seats(self):
+        ticket, _ = self.book(self.customers[0], 3)
+        Repository.update(DBTables.TICKET, ticket['id'], is_cancelled=True)
+        self.flight.refresh_from_db()
+        self.assertEqual(0, self.flight.booked_seats)
+        self.assertTrue(self.book(self.customers[1], 3)[1])
+    
+    def test_cancel_flight_cancels_tickets(self):
+        self.book(self.customers[0], 1)
+        self.book(self.customers[1], 1)
+        Repository.update(DBTables.FLIGHT, self.flight.id, is_cancelled=True)
+        self.flight.refresh_from_db()
+        self.assertEqual(0, self.flight.booked_seats)
+        self.assertFalse(Ticket.objects.filter(flight=self.flight, is_cancelled=False).exists())
+    
+    def test_total_seats_below_booked(self):
+        self.book(self.customers[0], 2)
+        self.assertFalse(Repository.update(DBTables.FLIGHT, self.flight.id, total_seats=1)[1])
+    
+    def test_rebuild_booked_seats(self):
+        self.book(self.customers[0], 2)
+        Flight.objects.filter(pk=self.flight.id).update(booked_seats=0)
+        self.assertEqual(1, Repository.rebuild_booked_seats())
+        self.flight.refresh_from_db()
+        self.assertEqual(2, self.flight.booked_seats)
+        self.assertEqual(0, Repository.rebuild_booked_seats())
+    
+    def test_search_by_remaining_seats(self):
+        self.book(self.customers[0], 2)
+        def search(min_seats):
+            return Repository.get_flights_by_parameters(None, None, None, None, True, Paginate(cursor="", count_total=False), min_seats=min_seats)
+        # The seats come with the flights, in one query
+        with self.assertNumQueries(1):
+            flights = search(1)
+        self.assertEqual([(self.flight.id, 2, 1)], [(flight['id'], flight['booked_seats'], flight['remaining_seats']) for flight in flights])
+        self.assertEqual([], search(2))
+        self.assertEqual(1, len(search(None)))
+
+
+class TestCursorPagination(TestCase):
+    def setUp(self) -> None:
+        return_value = super().setUp() or None
+        country = Country.objects.create(name="Israel", symbol="IL", flag="some/slug.jpg")
+        airline = AirlineCompany.objects.create(
+            name="Django Airlines",
+            country=country,
+            user=User.objects.create_user(username="airline1", email="user1@airline.com")
+        )
+        departure = timezone.now() + timedelta(days=1)
+        # Flights share departure times so the ID has to break ties
+        self.flights = [
+            Flight.objects.create(
+                airline=airline,
+                origin_country=country,
+                destination_country=country,
+                departure_datetime=departure + timedelta(hours=i % 3),
+                arrival_datetime=departure + timedelta(hours=5),
+                total_seats=1
+            ) for i in range(7)
+        ]
+        return return_value
+    
+    def test_cursor_pages(self):
+        expected = [flight.id for flight in sorted(self.flights, key=lambda f: (f.departure_datetime, f.id))]
+        result = []
+        cursor = ''
+        while cursor is not None:
+            paginator = Paginate(3, cursor=cursor)
+            result.extend(flight['id'] for flight in Repository.get_flights_by_parameters(None, None, None, None, True, paginator))
+            self.assertEqual(7, paginator.total)
+            cursor = paginator.next_cursor
+        self.assertListEqual(expected, result)
+    
+    def test_offset_pages(self):
+        expected = [flight.id for flight in sorted(self.flights, key=lambda f: (f.departure_datetime, f.id))]
+        result = []
+        for page in range(1, 4):
+            result.extend(flight['id'] for flight in Repository.get_flights_by_parameters(None, None, None, None, True, Paginate(3, page)))
+        self.assertListEqual(expected, result)
+        with self.subTest("Async"):
+            rows = async_to_sync(Repository.aget_all)(DBTables.FLIGHT, Paginate(3, 1))
+            self.assertListEqual(expected[:3], [flight['id'] for flight in rows])
+        with self.subTest("List"):
+            rows = [{'id': id} for id in reversed(expected)]
+            self.assertListEqual([{'id': id} for id in sorted(expected)[3:6]], Paginate(3, 2).paginate_list(rows))
+    
+    def test_skip_count(self):
+        paginator = Paginate(3, cursor='', count_total=False)
+        with self.assertNumQueries(1):
+            Repository.get_all(DBTables.FLIGHT, paginator)
+        self.assertNotIn('total', paginator.get_dict())
+        self.assertIsNotNone(paginator.next_cursor)
+    
+    def test_invalid_cursor(self):
+        with self.subTest("Garbage"):
+            self.assertFalse(Paginate.is_valid_cursor("not a cursor"))
+            self.assertRaises(ValueError, lambda: Repository.get_all(DBTables.FLIGHT, Paginate(cursor="not a cursor")))
+        with self.subTest("Wrong ordering"):
+            cursor = Paginate.encode_cursor([1])
+            self.assertRaises(ValueError, lambda: Repository.get_all(DBTables.FLIGHT, Paginate(cursor=cursor)))
+        with self.subTest("Wrong value types"):
+            cursor = Paginate.encode_cursor(["not a date", 1])
+            self.assertRaises(ValueError, lambda: Repository.get_all(DBTables.FLIGHT, Paginate(cursor=cursor)))
+
+
+class TestQueryPlans(TestCase):
+    """
+    Checks that the flight search and board queries are answered with the flight indexes.
+    """
+    def setUp(self) -> None:
+        return_value = super().setUp() or None
+        if connection.vendor == 'postgresql':
+            # Tiny test tables are cheaper to scan, make the planner prefer indexes like it would on real data
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        # Boards loaded by other tests would answer without a query
+        FlightBoards.invalidate()
+        self.origin = Country.objects.create(name="Israel", symbol="IL", flag="some/slug.jpg")
+        self.destination = Country.objects.create(name="Kazakhstan", symbol="KZ", flag="other/slug.jpg")
+        return return_value
+    
+    def query_plans(self, func) -> str:
+        """Runs a function and returns the query plans of the SELECT queries it executed."""
+        with CaptureQueriesContext(connection) as context:
+            func()
+        explain = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+        plans = []
+        with connection.cursor() as cursor:
+            for query in context.captured_queries:
+                if query['sql'].startswith('SELECT'):
+                    cursor.execute(explain + query['sql'])
+                    plans.extend(str(row) for row in cursor.fetchall())
+        return '\n'.join(plans)
+    
+    def test_route_search(self):
+        plans = self.query_plans(lambda: Repository.get_flights_by_parameters(self.origin.id, self.destination.id, date(2030, 1, 1), None, False, Paginate()))
+        self.assertIn('flight_route_active_idx', plans)
+    
+    def test_departure_board(self):
+        plans = self.query_plans(lambda: Repository.get_departure_flights(self.origin.id, Paginate()))
+        self.assertIn('flight_origin_departure_idx', plans)
+    
+    def test_arrival_board(self):
+        plans = self.query_plans(lambda: Repository.get_arrival_flights(self.destination.id, Paginate()))
+        self.assertIn('flight_dest_arrival_idx', plans)
+    
+    def test_departure_date(self):
+        plans = self.query_plans(lambda: Repository.get_flights_by_departure_date(date(2030, 1, 1), Paginate()))
+        self.assertIn('flight_departure_idx', plans)
+    
+    def test_arrival_date(self):
+        plans = self.query_plans(lambda: Repository.get_flights_by_arrival_date(date(2030, 1, 1), Paginate()))
+        self.assertIn('flight_arrival_idx', plans)
+
+
+class TestValuesSerializers(TestCase):
+    """
+    Checks that the list serializers render exactly like the DRF serializers.
+    """
+    def setUp(self) -> None:
+        return_value = super().setUp() or None
+        group = Group.objects.create(name="Customer")
+        other_group = Group.objects.create(name="Administrator")
+        self.country = Country.objects.create(name="Israel", symbol="IL", flag="some/slug.jpg")
+        user = User.objects.create_user(username="customer1", email="user1@customer.com", password="pass")
+        user.groups.add(other_group, group)
+        admin_user = User.objects.create_user(username="admin1", email="user1@admin.com")
+        Admin.objects.create(first_name="Admin", last_name="Adminovich", user=admin_user)
+        customer = Customer.objects.create(first_name="Customer", last_name="Customerovich", address="Street 1", phone_number="0500000000", user=user)
+        airline = AirlineCompany.objects.create(
+            name="Django Airlines",
+            country=self.country,
+            user=User.objects.create_user(username="airline1", email="user1@airline.com")
+        )
+        departure = timezone.now() + timedelta(days=1)
+        flight = Flight.objects.create(
+            airline=airline,
+            origin_country=self.country,
+            destination_country=self.country,
+            departure_datetime=departure,
+            arrival_datetime=departure + timedelta(hours=5),
+            total_seats=10,
+            booked_seats=2
+        )
+        Ticket.objects.create(flight=flight, customer=customer, seat_count=2)
+        return return_value
+    
+    def assertRendersLike(self, serializer_class, query, result):
+        expected = [serializer_class(obj).data for obj in query]
+        self.assertEqual(JSONRenderer().render(expected), JSONRenderer().render(result))
+    
+    def test_tables(self):
+        for table in DBTables:
+            with self.subTest(table.name):
+                self.assertRendersLike(table.serializer, table.model.objects.order_by(*table.ordering), Repository.get_all(table, Paginate()))
+    
+    def test_expanded_flights(self):
+        result = Repository.get_flights_by_parameters(self.country.id, None, None, None, True, Paginate(), expand=True)
+        self.assertRendersLike(FlightDetailSerializer, Flight.objects.all(), result)
+
+
+class TestCountryRegistry(TestCase):
+    def setUp(self) -> None:
+        return_value = super().setUp() or None
+        # The registry outlives each test's rolled back transaction
+        CountryRegistry.invalidate()
+        self.countries = [
+            Country.objects.create(name="Israel", symbol="IL", flag="some/slug.jpg"),
+            Country.objects.create(name="Kazakhstan", symbol="KZ", flag="other/slug.jpg"),
+            Country.objects.create(name="Japan", symbol="JP", flag="third/slug.jpg"),
+        ]
+        return return_value
+    
+    def test_loaded_once(self):
+        Repository.get_all(DBTables.COUNTRY, Paginate())
+        with self.assertNumQueries(0):
+            self.assertEqual("Israel", Repository.get_by_id(DBTables.COUNTRY, self.countries[0].id)['name'])
+            self.assertTrue(Repository.instance_exists(DBTables.COUNTRY, self.countries[1].id))
+            self.assertFalse(Repository.instance_exists(DBTables.COUNTRY, self.countries[2].id + 1))
+            self.assertDictEqual({}, Repository.get_by_id(DBTables.COUNTRY, self.countries[2].id + 1))
+            self.assertEqual(3, len(Repository.get_all(DBTables.COUNTRY, Paginate())))
+    
+    def test_invalidation(self):
+        etag = CountryRegistry.etag()
+        self.countries[0].name = "Changed"
+        self.countries[0].save()
+        self.assertEqual("Changed", Repository.get_by_id(DBTables.COUNTRY, self.countries[0].id)['name'])
+        self.assertNotEqual(etag, CountryRegistry.etag())
+        deleted_id = self.countries[1].id
+        self.countries[1].delete()
+        self.assertFalse(Repository.instance_exists(DBTables.COUNTRY, deleted_id))
+    
+    def test_pagination(self):
+        with self.subTest("Pages"):
+            paginator = Paginate(2, 2)
+            self.assertListEqual([self.countries[2].id], [country['id'] for country in Repository.get_all(DBTables.COUNTRY, paginator)])
+            self.assertEqual(3, paginator.total)
+        with self.subTest("Cursor"):
+            paginator = Paginate(2, cursor='')
+            first_page = Repository.get_all(DBTables.COUNTRY, paginator)
+            second_page = Repository.get_all(DBTables.COUNTRY, Paginate(2, cursor=paginator.next_cursor))
+            self.assertListEqual([country.id for country in self.countries], [country['id'] for country in first_page + second_page])
+    
+    def test_copies(self):
+        Repository.get_by_id(DBTables.COUNTRY, self.countries[0].id)['name'] = "Changed"
+        self.assertEqual("Israel", Repository.get_by_id(DBTables.COUNTRY, self.countries[0].id)['name'])
+
+
+class TestUsersByUsertype(TestCase):
+    def setUp(self) -> None:
+        return_value = super().setUp() or None
+        group = Group.objects.create(name='customer')
+        self.users = []
+        for i in range(5):
+            user = User.objects.create_user(f"customer{i}", f"customer{i}@test.com")
+            user.groups.add(group)
+            self.users.append(user)
+        # A customer without a profile
+        self.customers = [
+            Customer.objects.create(first_name="Test", last_name=str(i), address="Address", phone_number=f"+972 {i}", user=user)
+            for i, user in enumerate(self.users[:-1])
+        ]
+        # Not a customer
+        User.objects.create_user("other", "other@test.com")
+        return return_value
+    
+    def expected(self, users) -> list:
+        result = []
+        for user in users:
+            serialized = dict(DBTables.USER.serializer(user).data)
+            customer = Customer.objects.filter(user=user).first()
+            serialized['customer'] = DBTables.CUSTOMER.serializer(customer).data if customer else None
+            result.append(serialized)
+        return result
+    
+    def test_same_shape(self):
+        # Count, users, their groups and permissions, and profiles
+        with self.assertNumQueries(5):
+            users = Repository.get_users_by_usertype(DBTables.CUSTOMER, Paginate())
+        self.assertEqual(JSONRenderer().render(self.expected(self.users)), JSONRenderer().render(users))
+        self.assertIsNone(users[-1]['customer'])
+    
+    def test_pagination(self):
+        paginator = Paginate(2, cursor='', count_total=False)
+        first_page = Repository.get_users_by_usertype(DBTables.CUSTOMER, paginator)
+        second_page = Repository.get_users_by_usertype(DBTables.CUSTOMER, Paginate(2, cursor=paginator.next_cursor, count_total=False))
+        self.assertListEqual([user.id for user in self.users[:4]], [user['id'] for user in first_page + second_page])
+        self.assertEqual(0, len(Repository.get_users_by_usertype(DBTables.ADMIN, Paginate())))
+    
+    def test_export(self):
+        fields, users = Repository.export_users_by_usertype(DBTables.CUSTOMER, chunk_size=2)
+        self.assertIn('username', fields)
+        self.assertIn('customer.phone_number', fields)
+        # The users, then 3 chunks' groups, permissions and profiles
+        with self.assertNumQueries(10):
+            users = list(users)
+        self.assertEqual(JSONRenderer().render(self.expected(self.users)), JSONRenderer().render(users))
+    
+    def test_invalid_usertype(self):
+        self.assertRaises(ValueError, lambda: Repository.get_users_by_usertype(DBTables.FLIGHT, Paginate()))
+        self.assertRaises(ValueError, lambda: Repository.export_users_by_usertype(DBTables.USER))
+        self.assertRaises(OutOfBoundsException, lambda: Repository.export_users_by_usertype(DBTables.CUSTOMER, chunk_size=0))
+
+
+class TestItineraries(TestCase):
+    def setUp(self) -> None:
+        return_value = super().setUp() or None
+        FlightGraph.invalidate()
+        self.a, self.b, self.c, self.d = [Country.objects.create(name=f"Country {i}", symbol=f"C{i}", flag=f"flag{i}.png") for i in range(4)]
+        self.airline = AirlineCompany.objects.create(
+            name="Django Airlines", country=self.a, user=User.objects.create_user(username="airline1", email="user1@airline.com")
+        )
+        self.day = timezone.localdate() + timedelta(days=1)
+        self.direct = self.flight(self.a, self.b, 10, 13)
+        # One stop, with an hour to connect
+        self.first, self.second = self.flight(self.a, self.c, 8, 10), self.flight(self.c, self.b, 11, 14)
+        # Departs 20 minutes after landing - too soon to connect
+        self.flight(self.c, self.b, 10.33, 13)
+        # Two stops
+        self.flight(self.c, self.d, 11, 12), self.flight(self.d, self.b, 13, 15)
+        return return_value
+
+    def flight(self, origin, destination, departure, arrival, **fields) -> Flight:
+        at = lambda hours: timezone.make_aware(datetime.combine(self.day, time())) + timedelta(hours=hours)
+        return Flight.objects.create(
+            airline=self.airline, origin_country=origin, destination_country=destination,
+            departure_datetime=at(departure), arrival_datetime=at(arrival), total_seats=fields.pop('total_seats', 10), **fields
+        )
+
+    def search(self, **options) -> list:
+        return Repository.get_itineraries(self.a.id, self.b.id, self.day, self.day, **options)
+
+    def test_connections(self):
+        itineraries = self.search()
+        self.assertListEqual([0, 1, 2], [itinerary['stops'] for itinerary in itineraries])
+        self.assertListEqual([self.first.id, self.second.id], [flight['id'] for flight in itineraries[1]['flights']])
+        self.assertEqual([60], itineraries[1]['connections'])
+        self.assertEqual(6 * 60, itineraries[1]['duration'])
+        self.assertEqual(1, len(self.search(max_stops=0)))
+        self.assertEqual(2, len(self.search(max_stops=1)))
+        self.assertEqual(1, len(self.search(limit=1)))
+        # The short connection is allowed
+        self.assertEqual(4, len(self.search(min_connection=10)))
+        self.assertEqual(0, len(Repository.get_itineraries(self.a.id, self.b.id, self.day + timedelta(days=1), self.day + timedelta(days=3))))
+
+    def test_single_query(self):
+        self.search()
+        # The graph is loaded, only the itineraries' flights are fetched
+        with self.assertNumQueries(1):
+            self.assertEqual(3, len(self.search(expand=True)))
+
+    def test_seat_availability(self):
+        self.search()
+        # Booked by another process - the graph doesn't know yet
+        Flight.objects.filter(pk=self.second.id).update(booked_seats=9)
+        self.assertEqual(3, len(self.search()))
+        self.assertEqual(2, len(self.search(seats=2)))
+
+    def test_incremental_updates(self):
+        self.search()
+        with self.captureOnCommitCallbacks(execute=True):
+            flight = self.flight(self.a, self.b, 9, 11)
+        with self.assertNumQueries(1):
+            self.assertEqual(flight.id, self.search()[0]['flights'][0]['id'])
+        with self.captureOnCommitCallbacks(execute=True):
+            Repository.update(DBTables.FLIGHT, flight.id, is_cancelled=True)
+        self.assertEqual(3, len(self.search()))
+        with self.captureOnCommitCallbacks(execute=True):
+            Repository.remove(DBTables.FLIGHT, self.direct.id)
+        self.assertEqual(2, len(self.search()))
+
+    def test_seat_updates(self):
+        self.search()
+        graph = FlightGraph._FlightGraph__state
+        with self.captureOnCommitCallbacks(execute=True):
+            Repository.reserve_seats(self.direct.id, 10)
+        # Updated in place, without copying the graph
+        self.assertIs(graph, FlightGraph._FlightGraph__state)
+        self.assertEqual(2, len(self.search()))
+        # Booked while the graph is reloaded
+        FlightGraph.invalidate()
+        build = _Graph.build
+
+        def build_while_booking(rows):
+            graph = build(rows)
+            FlightGraph.add_booked_seats(self.first.id, 10)
+            return graph
+        with patch.object(_Graph, 'build', build_while_booking):
+            # The connecting itineraries all start with the booked flight, and the direct one is full
+            self.assertEqual(0, len(self.search()))
+
+    def test_invalid_parameters(self):
+        self.assertRaises(ValueError, lambda: Repository.get_itineraries(self.a.id, self.a.id, self.day, self.day))
+        self.assertRaises(ValueError, lambda: Repository.get_itineraries(self.a.id, self.b.id, self.day, self.day - timedelta(days=1)))
+        self.assertRaises(ValueError, lambda: self.search(max_stops=3))
+        self.assertRaises(ValueError, lambda: self.search(min_connection=100, max_connection=50))
+        self.assertRaises(ValueError, lambda: self.search(seats=0))
+        # Unbounded searches
+        self.assertRaises(ValueError, lambda: Repository.get_itineraries(self.a.id, self.b.id, self.day, self.day + timedelta(days=3)))
+        self.assertRaises(ValueError, lambda: self.search(max_connection=24 * 60 + 1))
+
+    def test_limited_search(self):
+        # More itineraries - stops searching flights that depart after the limit's latest arrival
+        for hour in range(0, 8):
+            self.flight(self.a, self.c, hour, hour + 1), self.flight(self.c, self.b, hour + 2, hour + 20)
+        itineraries = self.search(limit=100)
+        for limit in (1, 3, 5):
+            self.assertListEqual(itineraries[:limit], self.search(limit=limit))
+
+
+class TestFlightBoards(TestCase):
+    def setUp(self) -> None:
+        return_value = super().setUp() or None
+        FlightBoards.invalidate()
+        self.israel = Country.objects.create(name="Israel", symbol="IL", flag="some/slug.jpg")
+        self.kazakhstan = Country.objects.create(name="Kazakhstan", symbol="KZ", flag="other/slug.jpg")
+        self.airline = AirlineCompany.objects.create(
+            name="Django Airlines", country=self.israel, user=User.objects.create_user(username="airline1", email="user1@airline.com")
+        )
+        self.soon = self.flight(departure=1)
+        # Lands after the board's window
+        self.flight(departure=10, arrival=14)
+        # Departs after the board's window
+        self.flight(departure=13)
+        return return_value
+
+    def flight(self, departure: float, arrival: float = None, **fields) -> Flight:
+        now = timezone.now()
+        return Flight.objects.create(
+            airline=self.airline, origin_country=self.israel, destination_country=self.kazakhstan,
+            departure_datetime=now + timedelta(hours=departure), arrival_datetime=now + timedelta(hours=arrival or departure + 3),
+            total_seats=10, **fields
+        )
+
+    def test_windows(self):
+        with self.assertNumQueries(1):
+            departures = Repository.get_departure_flights(self.israel.id, Paginate())
+        self.assertEqual(2, len(departures))
+        self.assertEqual(DBTables.FLIGHT.serializer(self.soon).data, departures[0])
+        arrivals = Repository.get_arrival_flights(self.kazakhstan.id, Paginate())
+        self.assertEqual([self.soon.id], [flight['id'] for flight in arrivals])
+        # Loaded
+        with self.assertNumQueries(0):
+            self.assertEqual(departures, Repository.get_departure_flights(self.israel.id, Paginate()))
+            self.assertEqual(arrivals, Repository.get_arrival_flights(self.kazakhstan.id, Paginate()))
+
+    def test_incremental_updates(self):
+        flights, etag = FlightBoards.get(Board.DEPARTURES, self.israel.id)
+        later = flights[-1]['id']
+        with self.captureOnCommitCallbacks(execute=True):
+            added = self.flight(departure=0.5)
+        with self.assertNumQueries(0):
+            flights, new_etag = FlightBoards.get(Board.DEPARTURES, self.israel.id)
+        self.assertNotEqual(etag, new_etag)
+        self.assertEqual([added.id, self.soon.id, later], [flight['id'] for flight in flights])
+        FlightBoards.invalidate()
+        self.assertEqual(new_etag, FlightBoards.etag(Board.DEPARTURES, self.israel.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Repository.update(DBTables.FLIGHT, added.id, is_cancelled=True)
+        self.assertTrue(FlightBoards.get(Board.DEPARTURES, self.israel.id)[0][0]['is_cancelled'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Repository.reserve_seats(self.soon.id, 2)
+        self.assertEqual(8, FlightBoards.get(Board.DEPARTURES, self.israel.id)[0][1]['remaining_seats'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Repository.remove(DBTables.FLIGHT, added.id)
+        self.assertEqual([self.soon.id, later], [flight['id'] for flight in FlightBoards.get(Board.DEPARTURES, self.israel.id)[0]])
+
+    def test_etag_from_content(self):
+        flights, etag = FlightBoards.get(Board.DEPARTURES, self.israel.id)
+        # Another process, or a restart, that shows the same flights
+        FlightBoards.invalidate()
+        self.assertEqual(etag, FlightBoards.etag(Board.DEPARTURES, self.israel.id))
+        # Changed by another process
+        Flight.objects.filter(pk=self.soon.id).update(booked_seats=3)
+        FlightBoards.invalidate()
+        changed = FlightBoards.etag(Board.DEPARTURES, self.israel.id)
+        self.assertNotEqual(etag, changed)
+        # Updated in this process, as it's loaded by the others
+        with self.captureOnCommitCallbacks(execute=True):
+            Repository.reserve_seats(self.soon.id, 2)
+        booked = FlightBoards.etag(Board.DEPARTURES, self.israel.id)
+        self.assertNotEqual(changed, booked)
+        FlightBoards.invalidate()
+        self.assertEqual(booked, FlightBoards.etag(Board.DEPARTURES, self.israel.id))
+
+    def test_wait(self):
+        flights, etag = FlightBoards.get(Board.DEPARTURES, self.israel.id)
+        self.assertFalse(FlightBoards.wait(Board.DEPARTURES, self.israel.id, etag, 0.05))
+        FlightBoards.update([self.flight(departure=2)])
+        self.assertTrue(FlightBoards.wait(Board.DEPARTURES, self.israel.id, etag, 0.05))
+
+    async def test_await_change(self):
+        flights, etag = await sync_to_async(FlightBoards.get)(Board.DEPARTURES, self.israel.id)
+        self.assertFalse(await FlightBoards.await_change(Board.DEPARTURES, self.israel.id, etag, 0.05))
+        waiting = asyncio.create_task(FlightBoards.await_change(Board.DEPARTURES, self.israel.id, etag, 5))
+        await asyncio.sleep(0.01)
+        # Changes made by other threads wake the event loop up
+        flight = await sync_to_async(self.flight)(departure=2)
+        await asyncio.get_running_loop().run_in_executor(None, FlightBoards.update, [flight])
+        self.assertTrue(await asyncio.wait_for(waiting, 1))
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1', 'replica_2'])
+class TestReadReplicas(SimpleTestCase):
+    # Outside of a TestCase's transaction, which reads from the primary. Queries aren't run, only routed.
+    databases = {'default'}
+
+    def setUp(self) -> None:
+        token = current_routing.set(None)
+        self.addCleanup(current_routing.reset, token)
+
+    @staticmethod
+    @reads_replica
+    def read() -> str:
+        return Flight.objects.all().db
+
+    def test_reads(self):
+        self.assertIn(self.read(), ('replica_1', 'replica_2'))
+        # Only the repository's read-only methods read from the replicas
+        self.assertEqual('default', Flight.objects.all().db)
+        self.assertEqual('default', Flight.objects.select_for_update().db)
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertEqual('default', self.read())
+
+    def test_async_reads(self):
+        @reads_replica
+        async def aread():
+            await asyncio.sleep(0)
+            return Flight.objects.all().db
+        self.assertIn(asyncio.run(aread()), ('replica_1', 'replica_2'))
+
+    def test_read_after_write(self):
+        token = current_routing.set(ReadRouting())
+        self.addCleanup(current_routing.reset, token)
+        self.assertEqual('default', ReplicaRouter().db_for_write(Flight))
+        self.assertEqual('default', self.read())
+
+    def test_write_outside_of_requests(self):
+        # Doesn't pin the context (ie. a management command's) for good
+        self.assertEqual('default', ReplicaRouter().db_for_write(Flight))
+        self.assertIsNone(current_routing.get())
+        self.assertIn(self.read(), ('replica_1', 'replica_2'))
+
+    def test_caches_load_from_primary(self):
+        CountryRegistry.invalidate()
+        FlightBoards.invalidate()
+        FlightGraph.invalidate()
+        self.addCleanup(CountryRegistry.invalidate)
+        # The replicas aren't configured as connections - reading from one would fail
+        with CaptureQueriesContext(connection) as queries:
+            reads_replica(CountryRegistry.all)()
+            reads_replica(FlightBoards.get)(Board.ARRIVALS, 1)
+            reads_replica(FlightGraph.search)(1, 2, timezone.now(), timezone.now() + timedelta(days=1), 0, 0, 0, 1, 1)
+        self.assertEqual(3, len(queries))
+
+    def test_transaction(self):
+        with transaction.atomic():
+            self.assertEqual('default', self.read())
+
+    def test_sticky_session(self):
+        session = SessionStore()
+        session.create()
+        reads = []
+
+        def view(request):
+            reads.append(self.read())
+            if request.method == 'POST':
+                ReplicaRouter().db_for_write(Flight)
+                reads.append(self.read())
+            return HttpResponse()
+        middleware = ReplicaMiddleware(view)
+
+        for method in ('get', 'post', 'get'):
+            request = getattr(RequestFactory(), method)('/api/tickets/')
+            request.session = session
+            middleware(request)
+        self.assertIn(reads[0], ('replica_1', 'replica_2'))
+        self.assertIn(reads[1], ('replica_1', 'replica_2'))
+        # Pinned after the write, and on the session's next request
+        self.assertEqual(['default', 'default'], reads[2:])
+        # Until the pin expires
+        session[ReplicaMiddleware.SESSION_KEY] -= 60
+        request = RequestFactory().get('/api/tickets/')
+        request.session = session
+        middleware(request)
+        self.assertIn(reads[-1], ('replica_1', 'replica_2'))
+        # The request's routing doesn't outlive it
+        self.assertIsNone(current_routing.get())
@@ -1,5 +1,32 @@
 from unittest import TestCase as BasicTestCase
+import asyncio
+from pathlib import Path
+from datetime import timedelta
+import csv
+import json
+import logging
+import tempfile
+import copy
+import io
+import time
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.test import override_settings, TestCase, Client, AsyncClient
+from django.contrib.auth.models import Group
+from asgiref.sync import sync_to_async
+from django.utils import timezone
 from ..utils.typechecking import accepts
+from ..utils.instrumentation import instrument, Instrumentation
+from FlightProject.log_handlers import QueueFileHandler
+from FlightProject.postgresql_pool.base import DatabaseWrapper as PooledDatabaseWrapper
+from ..repository.country_registry import CountryRegistry
+from ..repository.flight_boards import FlightBoards
+from ..sessions import SessionStore
+from ..models import User, Admin, AirlineCompany, Customer, Country, Flight
 from ..utils.exceptions import IncorrectTypePassedToFunctionException
 
 class TestAccepts(BasicTestCase):
@@ -41,4 +68,528 @@ class TestAccepts(BasicTestCase):
             self.assertEqual("Success", self.dummy_func(integer=1, boolean=True, string="1")) # Shuffled
             self.assertRaises(IncorrectTypePassedToFunctionException, lambda: self.dummy_func(integer="err", string="1", boolean=True))
             self.assertRaises(IncorrectTypePassedToFunctionException, lambda: self.dummy_func(integer=1, string="1", boolean="err"))
-            self.assertRaises(IncorrectTypePassedToFunctionException, lambda: self.dummy_func(string="1", integer=1, boolean="err")) # Shuffled
\ No newline at end of file
+            self.assertRaises(IncorrectTypePassedToFunctionException, lambda: self.dummy_func(string="1", integer=1, boolean="err")) # Shuffled
+    
+    def test_accepts_missing_arguments(self):
+        # Left for the function call itself to fail
+        self.assertRaises(TypeError, lambda: self.dummy_func(1, "1"))
+        self.assertRaises(TypeError, lambda: self.dummy_func(1, boolean=True))
+    
+    def test_accepts_positional_only(self):
+        @accepts(int, str, positional_only=True)
+        def local_dummy(integer, string, optional=None):
+            return "Success"
+        self.assertEqual("Success", local_dummy(1, "1", optional=True))
+        self.assertRaises(IncorrectTypePassedToFunctionException, lambda: local_dummy(1, 1))
+        # Checked arguments must be positional
+        self.assertRaises(IncorrectTypePassedToFunctionException, lambda: local_dummy(1, string="1"))
+    
+    def test_accepts_disabled(self):
+        def local_dummy(integer):
+            return "Success"
+        # The checks are compiled out - the function isn't wrapped at all
+        self.assertIs(local_dummy, accepts(int, enabled=False)(local_dummy))
+        with override_settings(TYPE_CHECKS_ENABLED=False):
+            self.assertIs(local_dummy, accepts(int)(local_dummy))
+        self.assertIsNot(local_dummy, accepts(int)(local_dummy))
+
+
+class TestInstrument(BasicTestCase):
+    def setUp(self) -> None:
+        Instrumentation.reset()
+
+    def tearDown(self) -> None:
+        Instrumentation.reset()
+
+    def test_instrument_disabled(self):
+        def local_dummy():
+            return "Success"
+        # Nothing to record - the function isn't wrapped at all
+        with override_settings(INSTRUMENTATION_ENABLED=False):
+            self.assertIs(local_dummy, instrument(local_dummy))
+
+    def test_instrument_enabled(self):
+        with override_settings(INSTRUMENTATION_ENABLED=True):
+            @instrument
+            def local_dummy(fail=False):
+                if fail:
+                    raise ValueError()
+                return "Success"
+        self.assertEqual("Success", local_dummy())
+        self.assertEqual("Success", local_dummy())
+        self.assertRaises(ValueError, lambda: local_dummy(fail=True))
+
+        stats = Instrumentation.snapshot()[local_dummy.__qualname__]
+        self.assertEqual(3, stats['calls'])
+        self.assertEqual(1, stats['errors'])
+        self.assertGreaterEqual(stats['max_ms'], stats['mean_ms'])
+        # Cumulative, every call is in the unbounded bucket
+        histogram = list(stats['histogram_ms'].values())
+        self.assertEqual(sorted(histogram), histogram)
+        self.assertEqual(3, stats['histogram_ms']['+Inf'])
+
+        Instrumentation.reset()
+        self.assertEqual({}, Instrumentation.snapshot())
+
+    def test_instrument_coroutine(self):
+        with override_settings(INSTRUMENTATION_ENABLED=True):
+            @instrument
+            @accepts(float)
+            async def local_dummy(seconds):
+                await asyncio.sleep(seconds)
+                return "Success"
+        self.assertTrue(asyncio.iscoroutinefunction(local_dummy))
+        self.assertEqual("Success", asyncio.run(local_dummy(0.01)))
+        # Measured until the coroutine is done
+        self.assertGreaterEqual(Instrumentation.snapshot()[local_dummy.__qualname__]['max_ms'], 10)
+
+
+class TestQueueFileHandler(BasicTestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = Path(self.directory.name) / 'app.log'
+        self.logger = logging.getLogger('test_queue_file_handler')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.DEBUG)
+
+    def tearDown(self) -> None:
+        for handler in list(self.logger.handlers):
+            self.logger.removeHandler(handler)
+            handler.close()
+        self.directory.cleanup()
+
+    def create_handler(self, **kwargs) -> QueueFileHandler:
+        handler = QueueFileHandler(self.filename, **kwargs)
+        handler.setFormatter(logging.Formatter("%(levelname)s || %(message)s"))
+        self.logger.addHandler(handler)
+        return handler
+
+    def test_writes_records(self):
+        handler = self.create_handler()
+        self.logger.debug("%s: data = %r", 200, {'id': 1})
+        self.logger.error("Failed")
+        handler.close()
+        self.assertEqual("DEBUG || 200: data = {'id': 1}\nERROR || Failed\n", self.filename.read_text())
+
+    def test_rotates(self):
+        handler = self.create_handler(maxBytes=100, backupCount=2)
+        for i in range(20):
+            self.logger.info("Record number %d", i)
+        handler.close()
+        self.assertTrue(self.filename.with_name('app.log.1').exists())
+        self.assertTrue(self.filename.with_name('app.log.2').exists())
+        self.assertFalse(self.filename.with_name('app.log.3').exists())
+        self.assertLessEqual(self.filename.stat().st_size, 100)
+
+    def test_drops_when_full(self):
+        handler = self.create_handler(queue_size=2, block_timeout=0.01)
+        # Nothing is written while the listener is stopped
+        handler.listener.stop()
+        for i in range(3):
+            self.logger.debug("Debug %d", i)
+        self.logger.error("Error")
+        self.assertEqual(2, handler.dropped)
+
+        handler.listener.start()
+        while not handler.queue.empty():
+            time.sleep(0.001)
+        self.logger.info("Info")
+        handler.close()
+        self.assertEqual(0, handler.dropped)
+        self.assertEqual([
+            "DEBUG || Debug 0",
+            "DEBUG || Debug 1",
+            "WARNING || Dropped 2 log records, the log queue was full",
+            "INFO || Info"
+        ], self.filename.read_text().splitlines())
+
+
+class TestConnectionPool(BasicTestCase):
+    def create_wrapper(self, **settings) -> PooledDatabaseWrapper:
+        # Not connected, the pool opens on the first connection
+        settings_dict = copy.deepcopy(connections.settings['default'])
+        settings_dict.update({'ENGINE': 'FlightProject.postgresql_pool', 'NAME': 'flights', 'USER': 'flights', 'CONN_MAX_AGE': 0, **settings})
+        wrapper = PooledDatabaseWrapper(settings_dict, alias='pool_test')
+        self.addCleanup(wrapper.close_pool)
+        return wrapper
+
+    def test_not_pooled(self):
+        wrapper = self.create_wrapper(OPTIONS={})
+        self.assertIsNone(wrapper.pool)
+
+    def test_pool(self):
+        wrapper = self.create_wrapper(OPTIONS={'pool': {'min_size': 2, 'max_size': 5, 'timeout': 3}}, CONN_HEALTH_CHECKS=True)
+        pool = wrapper.pool
+        self.assertIs(pool, wrapper.pool)
+        # Shared by the alias' wrappers in other threads
+        self.assertIs(pool, PooledDatabaseWrapper(wrapper.settings_dict, alias='pool_test').pool)
+        self.assertTrue(pool.closed)
+        self.assertEqual((2, 5, 3), (pool.min_size, pool.max_size, pool.timeout))
+        self.assertIsNotNone(pool._check)
+        self.assertEqual('flights', pool.kwargs['dbname'])
+        self.assertNotIn('pool', pool.kwargs)
+
+        wrapper.close_pool()
+        self.assertIsNot(pool, wrapper.pool)
+
+    def test_persistent_connections(self):
+        wrapper = self.create_wrapper(OPTIONS={'pool': True}, CONN_MAX_AGE=60)
+        with self.assertRaises(ImproperlyConfigured):
+            wrapper.pool
+
+
+@override_settings(PROFILING_ENABLED=True, PROFILING_QUERY_BUDGET=1)
+class TestProfilingMiddleware(TestCase):
+    def setUp(self) -> None:
+        CountryRegistry.invalidate()
+        Country.objects.create(name='Israel')
+
+    def test_profiles_api_requests(self):
+        with self.assertLogs('django', level='INFO') as logs:
+            response = Client().get('/api/countries/')
+        self.assertEqual(200, response.status_code)
+        server_timing = response['Server-Timing']
+        self.assertIn('db;dur=', server_timing)
+        self.assertIn('desc="1 queries"', server_timing)
+        self.assertIn('serialize;dur=', server_timing)
+        self.assertIn('render;dur=', server_timing)
+        self.assertIn('total;dur=', server_timing)
+        self.assertNotIn('query-budget', server_timing)
+        self.assertIn('"queries": 1', logs.output[-1])
+        self.assertIn(f'"response_bytes": {len(response.content)}', logs.output[-1])
+
+    def test_flags_requests_over_budget(self):
+        with self.assertLogs('django', level='WARNING') as logs:
+            response = Client().get('/api/flights/')
+        self.assertIn('query-budget;desc="exceeded"', response['Server-Timing'])
+        self.assertIn('Query budget exceeded', logs.output[-1])
+
+    def test_disabled(self):
+        with self.settings(PROFILING_ENABLED=False):
+            response = Client().get('/api/countries/')
+        self.assertFalse(response.has_header('Server-Timing'))
+
+
+class TestAsyncViews(TestCase):
+    def setUp(self) -> None:
+        CountryRegistry.invalidate()
+        self.countries = [Country.objects.create(name=f'Country {i}', symbol=f'C{i}', flag=f'flag{i}.png') for i in range(2)]
+        self.user = User.objects.create_user('airline', 'airline@test.com')
+        self.user.groups.add(Group.objects.create(name='airline'))
+        self.airline = AirlineCompany.objects.create(name='Airline', country=self.countries[0], user=self.user)
+        departure = timezone.now() + timedelta(days=1)
+        self.flights = [
+            Flight.objects.create(
+                airline=self.airline, origin_country=self.countries[0], destination_country=self.countries[1],
+                departure_datetime=departure + timedelta(hours=i), arrival_datetime=departure + timedelta(hours=i + 3),
+                total_seats=100, is_cancelled=i == 2
+            )
+            for i in range(3)
+        ]
+        # Served through the ASGI handler
+        self.client = AsyncClient()
+
+    async def test_flights(self):
+        response = await self.client.get('/api/flights/', {'origin_country': self.countries[0].id, 'expand': 'true'})
+        self.assertEqual(200, response.status_code)
+        data = response.json()
+        # Anonymous users don't see cancelled flights
+        self.assertListEqual([flight.id for flight in self.flights[:2]], [flight['id'] for flight in data['data']])
+        self.assertEqual('Airline', data['data'][0]['airline_name'])
+        self.assertEqual(2, data['pagination']['total'])
+        response = await self.client.get('/api/flights/', {'cursor': '', 'limit': 1, 'count': 'false'})
+        self.assertEqual(1, len(response.json()['data']))
+        self.assertIsNotNone(response.json()['pagination']['next_cursor'])
+        self.assertEqual(400, (await self.client.get('/api/flights/', {'cursor': 'x'})).status_code)
+
+        response = await self.client.get(f'/api/flight/{self.flights[0].id}/')
+        self.assertEqual(self.flights[0].id, response.json()['data']['id'])
+        self.assertEqual(100, response.json()['data']['remaining_seats'])
+        self.assertEqual(404, (await self.client.get('/api/flight/999/')).status_code)
+
+    async def test_countries(self):
+        response = await self.client.get('/api/countries/')
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(['Country 0', 'Country 1'], [country['name'] for country in response.json()['data']])
+        self.assertIn('max-age=', response['Cache-Control'])
+        response = await self.client.get('/api/countries/', headers={'If-None-Match': response['ETag']})
+        self.assertEqual(304, response.status_code)
+
+    async def test_airlines(self):
+        response = await self.client.get('/api/airlines/', {'name': 'air'})
+        self.assertEqual(['Airline'], [airline['name'] for airline in response.json()['data']])
+        # Censored for anonymous users
+        self.assertNotIn('user', response.json()['data'][0])
+
+    async def test_whoami(self):
+        self.assertFalse((await self.client.get('/api/whoami/')).json()['data']['logged_in'])
+        await sync_to_async(self.client.force_login)(self.user)
+        data = (await self.client.get('/api/whoami/')).json()['data']
+        self.assertEqual(('airline', self.airline.id), (data['type'], data['entity_id']))
+
+    async def test_sync_handlers(self):
+        # Writes on the same views still run, in a thread
+        self.assertEqual(403, (await self.client.post('/api/flights/', {})).status_code)
+        self.assertEqual(405, (await self.client.put('/api/flights/')).status_code)
+
+    @override_settings(FLIGHT_BOARD_STREAM_SECONDS=0)
+    async def test_board_stream(self):
+        await sync_to_async(FlightBoards.invalidate)()
+        response = await self.client.get(f'/api/boards/{self.countries[0].id}/departures/stream/')
+        self.assertEqual('text/event-stream', response['Content-Type'])
+        # An async stream, that doesn't hold a thread while waiting for changes
+        content = b''.join([part async for part in response.streaming_content]).decode()
+        self.assertTrue(content.startswith('retry: 1000\n\nevent: board\n'))
+
+
+class TestSessions(TestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_user('admin', 'admin@test.com', 'test1234')
+        self.user.groups.add(Group.objects.create(name='admin'))
+        self.admin = Admin.objects.create(first_name='Test', last_name='Admin', user=self.user)
+        self.client = Client()
+        self.assertEqual(204, self.client.post('/api/login/', {'username': 'admin', 'password': 'test1234'}).status_code)
+
+    def test_cached_session(self):
+        with CaptureQueriesContext(connections['default']) as queries:
+            data = self.client.get('/api/whoami/').json()['data']
+        self.assertEqual(('admin', 'Test Admin'), (data['type'], data['entity_name']))
+        # The session and the user's role come from the cache, only the user is read to authenticate them
+        self.assertEqual(1, len(queries))
+        self.assertNotIn('django_session', queries[0]['sql'])
+
+    def test_profile_change_invalidates(self):
+        self.client.get('/api/whoami/')
+        self.admin.first_name = 'Changed'
+        self.admin.save()
+        self.assertEqual('Changed Admin', self.client.get('/api/whoami/').json()['data']['entity_name'])
+
+    def test_shared_caches(self):
+        for alias in ('sessions', 'identities'):
+            # Only the app's user can plant the cached (pickled) entries
+            self.assertEqual(0o700, Path(caches[alias]._dir).stat().st_mode & 0o777)
+        self.admin.save()
+        self.assertIsNotNone(caches['identities'].get(f'facade-identity-invalidated:{self.user.id}'))
+
+    def test_logout(self):
+        session_key = self.client.session.session_key
+        self.client.post('/api/logout/')
+        self.assertFalse(SessionStore(session_key).exists(session_key))
+        self.client.cookies['sessionid'] = session_key
+        self.assertFalse(self.client.get('/api/whoami/').json()['data']['logged_in'])
+
+    def test_sweep_sessions(self):
+        expired = []
+        for _ in range(3):
+            session = SessionStore()
+            session.set_expiry(-60)
+            session.save()
+            expired.append(session.session_key)
+        output = io.StringIO()
+        call_command('sweep_sessions', batch_size=2, stdout=output)
+        self.assertIn('Deleted 3 expired session(s).', output.getvalue())
+        self.assertListEqual([self.client.session.session_key], list(Session.objects.values_list('session_key', flat=True)))
+        self.assertFalse(any(caches['sessions'].has_key(SessionStore.cache_key_prefix + key) for key in expired))
+
+
+class TestFlightsBulkView(TestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_user('airline', 'airline@test.com')
+        self.user.groups.add(Group.objects.create(name='airline'))
+        self.countries = [Country.objects.create(name=f'Country {i}', symbol=f'C{i}', flag=f'flag{i}.png') for i in range(2)]
+        self.airline = AirlineCompany.objects.create(name='Airline', country=self.countries[0], user=self.user)
+        self.client = Client()
+        self.client.force_login(self.user)
+        departure = timezone.now() + timedelta(days=1)
+        self.valid = {
+            'origin_country': self.countries[0].id, 'destination_country': self.countries[1].id, 'total_seats': 100,
+            'departure_datetime': departure.isoformat(), 'arrival_datetime': (departure + timedelta(hours=3)).isoformat()
+        }
+
+    def post(self, body, content_type: str):
+        return self.client.post('/api/flights/bulk/', body, content_type=content_type)
+
+    def test_json(self):
+        rows = [
+            self.valid,
+            {**self.valid, 'total_seats': 1.5},
+            {**self.valid, 'total_seats': True},
+            {**self.valid, 'origin_country': [1]},
+            {**self.valid, 'destination_country': {'id': 1}},
+            {**self.valid, 'departure_datetime': 5},
+            {**self.valid, 'arrival_datetime': self.valid['arrival_datetime'][:19]},
+            'flight',
+        ]
+        response = self.post(rows, 'application/json')
+        self.assertEqual(201, response.status_code)
+        report = response.json()['data']
+        self.assertEqual((1, 7), (report['created'], report['failed']))
+        self.assertListEqual(list(range(1, 9)), [row['row'] for row in report['rows']])
+        self.assertEqual("Total seats must be a natural number.", report['rows'][1]['errors'])
+        self.assertEqual("Flight must be an object.", report['rows'][7]['errors'])
+        self.assertEqual(1, Flight.objects.filter(airline=self.airline).count())
+
+    def test_ndjson(self):
+        rows = [self.valid, {**self.valid, 'total_seats': -1}, {**self.valid, 'origin_country': 999}]
+        response = self.post('\n'.join(json.dumps(row) for row in rows), 'application/x-ndjson')
+        self.assertEqual(201, response.status_code)
+        report = response.json()['data']
+        self.assertEqual((1, 2), (report['created'], report['failed']))
+        self.assertIn('data', report['rows'][0])
+        self.assertIn('errors', report['rows'][2])
+        response = self.post(json.dumps(self.valid) + '\n{"origin_country":', 'application/x-ndjson')
+        self.assertEqual(400, response.status_code)
+        self.assertIn('line 2', str(response.json()))
+
+    def test_csv(self):
+        fields = list(self.valid)
+        lines = [','.join(fields), ','.join(str(self.valid[field]) for field in fields)]
+        lines.append(','.join('1.5' if field == 'total_seats' else str(self.valid[field]) for field in fields))
+        response = self.post('\n'.join(lines), 'text/csv')
+        self.assertEqual(201, response.status_code)
+        self.assertEqual((1, 1), (response.json()['data']['created'], response.json()['data']['failed']))
+        # Nothing valid
+        response = self.post('\n'.join(lines[::2]), 'text/csv')
+        self.assertEqual(400, response.status_code)
+
+    def test_invalid_body(self):
+        self.assertEqual(400, self.post(self.valid, 'application/json').status_code)
+        self.client.logout()
+        self.assertEqual(403, self.post([self.valid], 'application/json').status_code)
+
+
+class TestExportViews(TestCase):
+    def setUp(self) -> None:
+        groups = {name: Group.objects.create(name=name) for name in ('admin', 'airline', 'customer')}
+        self.admin = User.objects.create_user('admin', 'admin@test.com')
+        self.admin.groups.add(groups['admin'])
+        Admin.objects.create(first_name='Admin', last_name='Admin', user=self.admin)
+        self.customers = []
+        for i in range(3):
+            user = User.objects.create_user(f'customer{i}', f'customer{i}@test.com')
+            user.groups.add(groups['customer'])
+            self.customers.append(Customer.objects.create(first_name='=cmd', last_name=str(i), address='Address', phone_number=f'050{i}', user=user))
+        airline_user = User.objects.create_user('airline', 'airline@test.com')
+        airline_user.groups.add(groups['airline'])
+        countries = [Country.objects.create(name=f'Country {i}', symbol=f'C{i}', flag=f'flag{i}.png') for i in range(2)]
+        airline = AirlineCompany.objects.create(name='Airline', country=countries[0], user=airline_user)
+        departure = timezone.now() + timedelta(days=1)
+        self.flights = [
+            Flight.objects.create(
+                airline=airline, origin_country=countries[i % 2], destination_country=countries[(i + 1) % 2],
+                departure_datetime=departure + timedelta(hours=i), arrival_datetime=departure + timedelta(hours=i + 3), total_seats=100
+            )
+            for i in range(4)
+        ]
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def test_ndjson(self):
+        response = self.client.get('/api/export/flights/', {'origin_country': self.flights[0].origin_country_id, 'expand': 'true'})
+        self.assertEqual(200, response.status_code)
+        self.assertTrue(response.streaming)
+        self.assertEqual('attachment; filename="flights.ndjson"', response['Content-Disposition'])
+        flights = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertListEqual([self.flights[0].id, self.flights[2].id], [flight['id'] for flight in flights])
+        self.assertEqual('Airline', flights[0]['airline_name'])
+        self.assertEqual('Country 0', flights[0]['origin_country_details']['name'])
+
+    def test_csv(self):
+        response = self.client.get('/api/export/users/customers/', HTTP_ACCEPT='text/csv')
+        self.assertEqual(200, response.status_code)
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        rows = list(csv.DictReader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertListEqual([customer.user.username for customer in self.customers], [row['username'] for row in rows])
+        self.assertEqual('050', rows[0]['customer.phone_number'][:3])
+        # Formulas are escaped
+        self.assertEqual("'=cmd", rows[0]['customer.first_name'])
+
+    def test_format_parameter(self):
+        response = self.client.get('/api/export/customers/', {'format': 'csv'})
+        self.assertEqual('attachment; filename="customers.csv"', response['Content-Disposition'])
+        self.assertEqual(4, len(b''.join(response.streaming_content).decode().splitlines()))
+
+    def test_constant_queries(self):
+        response = self.client.get('/api/export/flights/')
+        # The flights are fetched as they're sent, in one server-side cursor
+        with self.assertNumQueries(1):
+            content = b''.join(response.streaming_content)
+        self.assertEqual(len(self.flights), len(content.decode().splitlines()))
+
+    async def test_asgi(self):
+        client = AsyncClient()
+        await sync_to_async(client.force_login)(self.admin)
+        response = await client.get('/api/export/flights/')
+        self.assertEqual(200, response.status_code)
+        # Streamed a part at a time rather than consumed whole first
+        content = b''.join([part async for part in response])
+        self.assertEqual(len(self.flights), len(content.decode().splitlines()))
+
+    def test_errors(self):
+        response = self.client.get('/api/export/flights/', {'airline': 'x'}, HTTP_ACCEPT='text/csv')
+        self.assertEqual(400, response.status_code)
+        self.assertIn('error', response.json())
+        self.assertEqual(400, self.client.get('/api/export/users/flights/').status_code)
+        self.client.force_login(self.customers[0].user)
+        self.assertEqual(403, self.client.get('/api/export/customers/').status_code)
+
+
+class TestFlightBoardViews(TestCase):
+    def setUp(self) -> None:
+        FlightBoards.invalidate()
+        CountryRegistry.invalidate()
+        self.country = Country.objects.create(name='Israel', symbol='IL', flag='flag.png')
+        destination = Country.objects.create(name='Kazakhstan', symbol='KZ', flag='other.png')
+        airline = AirlineCompany.objects.create(name='Airline', country=self.country, user=User.objects.create_user('airline', 'airline@test.com'))
+        departure = timezone.now() + timedelta(hours=1)
+        self.flights = [
+            Flight.objects.create(
+                airline=airline, origin_country=self.country, destination_country=destination,
+                departure_datetime=departure + timedelta(hours=i), arrival_datetime=departure + timedelta(hours=i + 3), total_seats=100
+            )
+            for i in range(3)
+        ]
+        self.client = Client()
+
+    def test_board(self):
+        url = f'/api/boards/{self.country.id}/departures/'
+        response = self.client.get(url, {'limit': 2})
+        self.assertEqual(200, response.status_code)
+        self.assertIn('max-age=', response['Cache-Control'])
+        self.assertListEqual([flight.id for flight in self.flights[:2]], [flight['id'] for flight in response.json()['data']])
+        # Unchanged
+        with self.assertNumQueries(0):
+            self.assertEqual(304, self.client.get(url, {'limit': 2}, HTTP_IF_NONE_MATCH=response['ETag']).status_code)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.flights[0].delete()
+        self.assertEqual(200, self.client.get(url, {'limit': 2}, HTTP_IF_NONE_MATCH=response['ETag']).status_code)
+        self.assertEqual(0, len(self.client.get(f'/api/boards/{self.country.id}/arrivals/').json().get('data', [])))
+        self.assertEqual(404, self.client.get('/api/boards/999/arrivals/').status_code)
+        self.assertEqual(400, self.client.get(url, {'limit': 'x'}).status_code)
+
+    def test_missing_country(self):
+        for country_id in range(1000, 1005):
+            response = self.client.get(f'/api/boards/{country_id}/arrivals/', HTTP_IF_NONE_MATCH='*')
+            self.assertEqual(404, response.status_code)
+            self.assertFalse(response.has_header('ETag'))
+        # Not loaded for made up countries
+        self.assertEqual({}, FlightBoards._FlightBoards__boards)
+        response = self.client.get(f'/api/boards/{self.country.id}/departures/', {'limit': 'x'})
+        self.assertEqual(400, response.status_code)
+        self.assertFalse(response.has_header('ETag'))
+
+    @override_settings(FLIGHT_BOARD_STREAM_SECONDS=0)
+    def test_stream(self):
+        url = f'/api/boards/{self.country.id}/departures/stream/'
+        response = self.client.get(url)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('text/event-stream', response['Content-Type'])
+        events = b''.join(response.streaming_content).decode().split('\n\n')
+        self.assertEqual('retry: 1000', events[0])
+        event, id, data = events[1].split('\n')
+        self.assertEqual('event: board', event)
+        self.assertListEqual([flight.id for flight in self.flights], [flight['id'] for flight in json.loads(data[len('data: '):])['data']])
+        # A reconnecting client that's seen the board doesn't get it again
+        response = self.client.get(url, HTTP_LAST_EVENT_ID=id[len('id: '):])
+        self.assertEqual('retry: 1000\n\n', b''.join(response.streaming_content).decode())
+        self.assertEqual(404, self.client.get('/api/boards/999/departures/stream/').status_code)
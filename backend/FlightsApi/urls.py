@@ -22,8 +22,21 @@ urlpatterns = [
     path('customer/<int:id>/', CustomerView.as_view(), name="customer"),
     
     path('flights/', FlightsView.as_view(), name="flights"),
+    path('flights/bulk/', FlightsBulkView.as_view(), name="flights_bulk"),
     path('flight/<int:id>/', FlightView.as_view(), name="flight"),
+    path('itineraries/', ItinerariesView.as_view(), name="itineraries"),
+
+    path('boards/<int:country_id>/arrivals/', FlightBoardView.as_view(), {'board': 'arrivals'}, name="arrivals_board"),
+    path('boards/<int:country_id>/departures/', FlightBoardView.as_view(), {'board': 'departures'}, name="departures_board"),
+    path('boards/<int:country_id>/arrivals/stream/', FlightBoardStreamView.as_view(), {'board': 'arrivals'}, name="arrivals_board_stream"),
+    path('boards/<int:country_id>/departures/stream/', FlightBoardStreamView.as_view(), {'board': 'departures'}, name="departures_board_stream"),
     
     path('tickets/', TicketsView.as_view(), name="tickets"),
     path('ticket/<int:id>/', TicketView.as_view(), name="ticket"),
+
+    path('export/customers/', CustomersExportView.as_view(), name="export_customers"),
+    path('export/flights/', FlightsExportView.as_view(), name="export_flights"),
+    path('export/users/<str:usertype>/', UsersExportView.as_view(), name="export_users"),
+
+    path('metrics/repository/', RepositoryMetricsView.as_view(), name="repository_metrics"),
 ]
@@ -1,3 +1,4 @@
-from .general import log_action, is_admin, is_airline, is_customer, StringValidation
+from .general import is_admin, is_airline, is_customer, StringValidation
 from .typechecking import accepts
+from .instrumentation import instrument, Instrumentation
 from .exceptions import *
\ No newline at end of file
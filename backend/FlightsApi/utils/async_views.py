@@ -0,0 +1,121 @@
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.functional import classproperty
+from django.utils.http import quote_etag
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    """
+    An APIView that's served asynchronously - under ASGI, its async handlers wait for the database and for slow clients
+    without holding a thread. Handlers can be async (ie. reads with the async ORM) or sync (ie. writes), sync handlers
+    and DRF's authentication, permission and throttling checks (which may query) run in a thread.
+    Under WSGI, Django runs the view with async_to_sync - it works the same, without the benefits.
+    """
+    @classproperty
+    def view_is_async(cls):
+        # Django requires all of a view's handlers to be either sync or async, this view runs both
+        return True
+
+    async def dispatch(self, request, *args, **kwargs):
+        """
+        APIView.dispatch(), awaiting the handler.
+        """
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            # Authenticates the user, so handlers can use request.user without a query
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            # Get the appropriate handler method
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+def handler_etag(etag_func):
+    """
+    django.views.decorators.http.etag() for the sync handlers of an APIView. Answers safe requests with a matching
+    If-None-Match with a 304, and adds the ETag to successful responses only - Django's decorator adds it to errors too.
+
+    Args:
+        etag_func (function): A function of the handler's arguments (without self) that returns the ETag, or None to
+                              skip the check (ie. for a resource that doesn't exist).
+    """
+    def decorator(handler):
+        @wraps(handler)
+        def inner(self, request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return handler(self, request, *args, **kwargs)
+            etag = etag_func(request, *args, **kwargs)
+            if etag is None:
+                return handler(self, request, *args, **kwargs)
+            etag = quote_etag(etag)
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = handler(self, request, *args, **kwargs)
+                if response.status_code == 200 and not response.has_header('ETag'):
+                    response.headers['ETag'] = etag
+            return response
+        return inner
+    return decorator
+
+
+def async_etag(etag_func):
+    """
+    handler_etag() for the async handlers of an AsyncAPIView, which Django's (sync) decorator doesn't support.
+    Answers safe requests with a matching If-None-Match with a 304, and adds the ETag to successful responses.
+
+    Args:
+        etag_func (function): An async function of the handler's arguments (without self) that returns the ETag, or None
+                              to skip the check.
+    """
+    def decorator(handler):
+        @wraps(handler)
+        async def inner(self, request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return await handler(self, request, *args, **kwargs)
+            etag = await etag_func(request, *args, **kwargs)
+            if etag is None:
+                return await handler(self, request, *args, **kwargs)
+            etag = quote_etag(etag)
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = await handler(self, request, *args, **kwargs)
+                if response.status_code == 200 and not response.has_header('ETag'):
+                    response.headers['ETag'] = etag
+            return response
+        return inner
+    return decorator
+
+
+class SyncStreamingHttpResponse(StreamingHttpResponse):
+    """
+    A StreamingHttpResponse of a sync iterator that's streamed under ASGI as well. Django (4.2) consumes sync iterators
+    whole before sending them under ASGI - this one is consumed a part at a time, in the request's thread.
+    """
+    async def __aiter__(self):
+        parts = iter(self.streaming_content)
+        next_part = sync_to_async(next)
+        while (part := await next_part(parts, None)) is not None:
+            yield part
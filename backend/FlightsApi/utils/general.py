@@ -1,4 +1,3 @@
-from functools import wraps
 from ..models import User
 from logging import getLogger
 from inspect import stack
@@ -21,20 +20,6 @@ def ordinal(n: int):
         suffix = ['th', 'st', 'nd', 'rd', 'th'][min(n % 10, 4)]
     return str(n) + suffix
 
-def log_action(func):
-    """Logs function calls at the debug level
-
-    Args:
-        func (function): A function to decorate
-    """
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        logger.debug(f"Called {func.__name__}")
-        res = func(*args, **kwargs)
-        logger.debug(f"{func.__name__} finished")
-        return res
-    return wrapper
-
 def is_admin(user: User):
     return user.groups.filter(name='admin').exists()
 
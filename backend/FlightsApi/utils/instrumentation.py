@@ -0,0 +1,129 @@
+from bisect import bisect_left
+from functools import wraps
+from inspect import iscoroutinefunction, unwrap
+from time import perf_counter
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+
+# Upper bounds (in milliseconds) of the latency histogram's buckets, the last bucket is unbounded
+LATENCY_BUCKETS_MS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+def instrumentation_enabled() -> bool:
+    """Checks if instrumentation is enabled (settings.INSTRUMENTATION_ENABLED, disabled by default).
+
+    Returns:
+        bool: True if instrumented functions should be measured.
+    """
+    try:
+        return getattr(settings, 'INSTRUMENTATION_ENABLED', False)
+    except ImproperlyConfigured:
+        # Settings aren't available outside of the Django app
+        return False
+
+
+class Instrumentation():
+    """
+    Call counts and latency histograms of the instrumented functions, by their qualified name (ie. 'Repository.get_all').
+    Kept in memory, so each worker process has its own.
+    """
+    __lock = threading.Lock()
+    # Name -> [calls, errors, total seconds, max seconds, bucket counts]
+    __stats = {}
+
+    @staticmethod
+    def record(name: str, seconds: float, failed: bool = False) -> None:
+        """Records a call.
+
+        Args:
+            name (str): Name of the called function.
+            seconds (float): Duration of the call.
+            failed (bool, optional): Whether the call raised an exception. Defaults to False.
+        """
+        bucket = bisect_left(LATENCY_BUCKETS_MS, seconds * 1000)
+        with Instrumentation.__lock:
+            stats = Instrumentation.__stats.get(name)
+            if stats is None:
+                stats = Instrumentation.__stats[name] = [0, 0, 0.0, 0.0, [0] * (len(LATENCY_BUCKETS_MS) + 1)]
+            stats[0] += 1
+            stats[1] += failed
+            stats[2] += seconds
+            if seconds > stats[3]:
+                stats[3] = seconds
+            stats[4][bucket] += 1
+
+    @staticmethod
+    def snapshot() -> dict:
+        """Exports the recorded stats.
+
+        Returns:
+            dict: Stats by function name - calls, errors, total/mean/max latency in milliseconds,
+                  and a cumulative latency histogram (calls that took at most each bucket's milliseconds).
+        """
+        with Instrumentation.__lock:
+            stats = {name: (calls, errors, total, maximum, list(buckets)) for name, (calls, errors, total, maximum, buckets) in Instrumentation.__stats.items()}
+        result = {}
+        for name, (calls, errors, total, maximum, buckets) in sorted(stats.items()):
+            histogram = {}
+            cumulative = 0
+            for bound, count in zip((*map(str, LATENCY_BUCKETS_MS), '+Inf'), buckets):
+                cumulative += count
+                histogram[bound] = cumulative
+            result[name] = {
+                'calls': calls,
+                'errors': errors,
+                'total_ms': round(total * 1000, 3),
+                'mean_ms': round(total * 1000 / calls, 3),
+                'max_ms': round(maximum * 1000, 3),
+                'histogram_ms': histogram
+            }
+        return result
+
+    @staticmethod
+    def reset() -> None:
+        """
+        Clears the recorded stats.
+        """
+        with Instrumentation.__lock:
+            Instrumentation.__stats = {}
+
+
+def instrument(func):
+    """Records the call count and latency of a function, if instrumentation is enabled.
+    Checked once when decorating - when disabled the function is returned as is, without any overhead.
+
+    Args:
+        func (function): A function to decorate
+    """
+    if not instrumentation_enabled():
+        return func
+    name = func.__qualname__
+
+    if iscoroutinefunction(unwrap(func)):
+        # Measures until the coroutine is done, rather than until it's created
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+            except BaseException:
+                Instrumentation.record(name, perf_counter() - start, failed=True)
+                raise
+            Instrumentation.record(name, perf_counter() - start)
+            return result
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except BaseException:
+            Instrumentation.record(name, perf_counter() - start, failed=True)
+            raise
+        Instrumentation.record(name, perf_counter() - start)
+        return result
+    return wrapper
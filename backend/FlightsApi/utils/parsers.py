@@ -0,0 +1,50 @@
+import codecs
+import csv
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parses newline delimited JSON (a JSON object per line) lazily, into a generator of the lines' objects.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        return NDJSONParser.__rows(codecs.iterdecode(stream, encoding))
+
+    @staticmethod
+    def __rows(lines):
+        number = 0
+        try:
+            for number, line in enumerate(lines, start=1):
+                if line.strip():
+                    yield json.loads(line)
+        except ValueError as e:
+            # Invalid JSON or encoding
+            raise ParseError(f'NDJSON parse error in line {number} - {e}')
+
+
+class CSVParser(BaseParser):
+    """
+    Parses CSV with a header row lazily, into a generator of dictionaries by the header's column names.
+    """
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        return CSVParser.__rows(csv.DictReader(codecs.iterdecode(stream, encoding)))
+
+    @staticmethod
+    def __rows(reader: csv.DictReader):
+        try:
+            yield from reader
+        except (csv.Error, ValueError) as e:
+            # Invalid CSV or encoding
+            raise ParseError(f'CSV parse error in line {reader.line_num} - {e}')
@@ -0,0 +1,60 @@
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
+
+
+class RequestProfile():
+    """
+    SQL queries and time spent in each section of a single request.
+    Passed to connection.execute_wrapper() to count the queries (see FlightsApi.middleware.ProfilingMiddleware).
+    """
+    def __init__(self) -> None:
+        self.queries = 0
+        self.db_time = 0.0
+        # Section name -> seconds, excluding the queries made during the section
+        self.sections = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += perf_counter() - start
+            self.queries += 1
+
+    def add(self, section: str, seconds: float) -> None:
+        """Adds time spent in a section.
+
+        Args:
+            section (str): Name of the section.
+            seconds (float): Time spent in it.
+        """
+        self.sections[section] = self.sections.get(section, 0.0) + seconds
+
+
+# The profile of the current request, if it's profiled
+current_profile: ContextVar = ContextVar('current_profile', default=None)
+
+
+def profiled(section: str):
+    """
+    Adds the time spent in the decorated function to the current request's profile, if it's profiled.
+    Queries made by the function are counted as DB time instead.
+
+    Args:
+        section (str): Name of the section to add the time to (ie. 'serialize').
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            profile = current_profile.get()
+            if profile is None:
+                return func(*args, **kwargs)
+            db_time = profile.db_time
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profile.add(section, perf_counter() - start - (profile.db_time - db_time))
+        return wrapper
+    return decorator
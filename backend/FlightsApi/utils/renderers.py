@@ -0,0 +1,131 @@
+import csv
+from typing import Iterable, Iterator, List
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .async_views import SyncStreamingHttpResponse
+
+
+# Rendered rows are sent in pieces of about this size, rather than a (tiny) piece per row
+CHUNK_BYTES = 64 * 1024
+
+# Spreadsheet applications evaluate cells starting with these as formulas
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Newline delimited JSON - a JSON object per line. Exports are streamed with stream_export(),
+    responses that go through the renderer (ie. errors) are rendered as plain JSON.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return JSONRenderer().render(data, accepted_media_type, renderer_context)
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    CSV with a header row. Exports are streamed with stream_export(),
+    responses that go through the renderer (ie. errors) are rendered as plain JSON.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return JSONRenderer().render(data, accepted_media_type, renderer_context)
+
+
+class _Echo():
+    """
+    A file-like object for csv.writer, that returns what's written instead of buffering it.
+    """
+    def write(self, value: str) -> str:
+        return value
+
+
+def stream_export(renderer: BaseRenderer, fields: List[str], rows: Iterable[dict], filename: str) -> SyncStreamingHttpResponse:
+    """Streams rows as an attachment in the renderer's format, rendering them as they're sent.
+
+    Args:
+        renderer (BaseRenderer): An NDJSONRenderer or a CSVRenderer, usually the request's accepted renderer.
+        fields (List[str]): The CSV columns, nested fields as dotted names (ie. 'origin_country_details.name').
+        rows (Iterable[dict]): The serialized rows, consumed lazily.
+        filename (str): The attachment's name, without an extension.
+
+    Raises:
+        ValueError: If the renderer's format isn't supported.
+
+    Returns:
+        SyncStreamingHttpResponse: The response, streamed under both WSGI and ASGI.
+    """
+    match (renderer.format):
+        case NDJSONRenderer.format:
+            content = ndjson_lines(rows)
+        case CSVRenderer.format:
+            content = csv_lines(fields, rows)
+        case other:
+            raise ValueError(f"Can't export in the '{other}' format.")
+    response = SyncStreamingHttpResponse(_buffered(content), content_type=f'{renderer.media_type}; charset={renderer.charset}')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{renderer.format}"'
+    return response
+
+
+def ndjson_lines(rows: Iterable[dict]) -> Iterator[str]:
+    """
+    Renders rows to lines of JSON.
+    """
+    encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    for row in rows:
+        yield encoder.encode(row) + '\n'
+
+
+def csv_lines(fields: List[str], rows: Iterable[dict]) -> Iterator[str]:
+    """
+    Renders rows to CSV lines with a header row of the fields.
+    Nested fields are flattened into their dotted names' columns, and many to many fields are joined by ';'.
+    """
+    writer = csv.writer(_Echo())
+    paths = [field.split('.') for field in fields]
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([_csv_value(_lookup(row, path)) for path in paths])
+
+
+def _lookup(row: dict, path: List[str]):
+    value = row
+    for key in path:
+        if value is None:
+            return None
+        value = value.get(key)
+    return value
+
+
+def _csv_value(value):
+    if isinstance(value, list):
+        value = ';'.join(str(item) for item in value)
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        # Keeps user input (ie. a name of '=cmd|...') from running as a formula when the file is opened
+        return "'" + value
+    return value
+
+
+def _buffered(pieces: Iterable[str]) -> Iterator[bytes]:
+    """
+    Joins rendered pieces into chunks of about CHUNK_BYTES.
+    """
+    buffer = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= CHUNK_BYTES:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
@@ -32,7 +32,8 @@ def no_content_ok():
     return create_facade_response(status.HTTP_204_NO_CONTENT)
 
 def create_facade_response(code, data = None, errors = None, pagination = None):
-    logger.debug(f"{code}: {data = } ||| {errors = }")
+    # Formatted lazily, by the log handler's thread
+    logger.debug("%s: data = %r ||| errors = %r", code, data, errors)
     if status.is_server_error(code):
         added_str = ''
         if errors:
@@ -1,54 +1,106 @@
 from functools import wraps
 from inspect import getargs
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 from .exceptions import IncorrectTypePassedToFunctionException
 from .general import ordinal
 
-def accepts(*types, throw: Exception = IncorrectTypePassedToFunctionException):
+
+def type_checks_enabled() -> bool:
+    """Checks if type checking is enabled (settings.TYPE_CHECKS_ENABLED, enabled by default).
+
+    Returns:
+        bool: False if the checks should be compiled out.
+    """
+    try:
+        return getattr(settings, 'TYPE_CHECKS_ENABLED', True)
+    except ImproperlyConfigured:
+        # Settings aren't available outside of the Django app
+        return True
+
+
+def accepts(*types, throw: Exception = IncorrectTypePassedToFunctionException, positional_only: bool = False, enabled: bool = None):
     """
     Adds a layer of type checking to a function.
     Expects as arguments the types of the decorated function's arguments - do not include kwarg types or args with a default value.
+    The argument layout is computed once when decorating, and the checks are skipped entirely when disabled.
 
     Args:
         *types: The types expected by the function (In identical order)
         throw (Exception, optional): An exception class to raise. Defaults to IncorrectTypePassedToFunction.
+        positional_only (bool, optional): Only check positional arguments, for functions that are never called with the
+                                          checked arguments as kwargs. Fastest, raises if too few positional arguments are passed. Defaults to False.
+        enabled (bool, optional): Whether to check the types. Defaults to settings.TYPE_CHECKS_ENABLED.
     """
     def decorator(func):
         """
         The decorator. This returns the correct wrapper.
         """
+        if not (type_checks_enabled() if enabled is None else enabled) or not types:
+            # Nothing to check, leave the function as is
+            return func
+
+        # Names of the checked arguments, to find those that are passed as kwargs
+        arg_names = getargs(func.__code__)[0][:len(types)]
+        type_count = len(types)
+
+        def fail(arguments):
+            # Find the first argument of the wrong type
+            index = next(index for index, (argument, expected_type) in enumerate(zip(arguments, types)) if not isinstance(argument, expected_type))
+            argument, expected_type = arguments[index], types[index]
+            if isinstance(expected_type, tuple):
+                expected_name = ' or '.join(map(lambda type: type.__name__, expected_type))
+            else:
+                expected_name = expected_type.__name__
+            raise throw(f"Function '{ func.__name__ }' expected '{ expected_name }' at {ordinal(index + 1)} argument but got '{ type(argument).__name__ }' instead.")
+
+        if positional_only:
+            @wraps(func)
+            def positional_wrapper(*args, **kwargs):
+                """The wrapped function, checking positional arguments only.
+
+                Raises:
+                    throw: An exception received from the decorator. Defaults to TypeError.
+
+                Returns:
+                    The result of the decorated function.
+                """
+                if len(args) < type_count:
+                    raise throw(f"Function '{ func.__name__ }' expects its first {type_count} argument(s) to be positional.")
+                for argument, expected_type in zip(args, types):
+                    if not isinstance(argument, expected_type):
+                        fail(args)
+                return func(*args, **kwargs)
+            return positional_wrapper
+
         @wraps(func)
         def wrapper(*args, **kwargs):
             """The wrapped function.
 
             Raises:
                 throw: An exception received from the decorator. Defaults to TypeError.
-                ValueError: if an argument is missing
-                
+
             Returns:
                 The result of the decorated function.
             """
-            # Make sure no arguments are missed because they're passed as kwargs
-            # Get expected arguments
-            expected_args = getargs(func.__code__)[0]
-            # Get expected and actual counts
-            expected_arg_count = len(expected_args)
-            actual_arg_count = len(args)
-            # Make a new list of arguments including any that were missed
-            arg_list = [*args]
-            for arg_index in range(actual_arg_count, expected_arg_count):
-                if expected_args[arg_index] in kwargs:
-                    arg_list.append(kwargs[expected_args[arg_index]])
+            arg_count = len(args)
+            if arg_count >= type_count:
+                # All of the checked arguments are positional
+                for argument, expected_type in zip(args, types):
+                    if not isinstance(argument, expected_type):
+                        fail(args)
+                return func(*args, **kwargs)
             
-            # Compare actual types with expected types
-            for type_index in range(len(types)):
-                argument_for_check = arg_list[type_index]
-                expected_type = types[type_index]
-                if not isinstance(argument_for_check, expected_type):
-                    if isinstance(expected_type, tuple):
-                        expected_name = ' or '.join(map(lambda type: type.__name__, expected_type))
-                    else:
-                        expected_name = expected_type.__name__
-                    raise throw(f"Function '{ func.__name__ }' expected '{ expected_name }' at {ordinal(type_index + 1)} argument but got '{ type(argument_for_check).__name__ }' instead.")
+            # Make sure no arguments are missed because they're passed as kwargs
+            arguments = list(args)
+            for name in arg_names[arg_count:]:
+                if name not in kwargs:
+                    # Missing, the function call itself will fail
+                    break
+                arguments.append(kwargs[name])
+            for argument, expected_type in zip(arguments, types):
+                if not isinstance(argument, expected_type):
+                    fail(arguments)
             return func(*args, **kwargs)
         return wrapper
     return decorator
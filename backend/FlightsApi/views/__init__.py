@@ -1,7 +1,10 @@
 from .admin_views import AdminView, AdminsView
 from .airline_views import AirlineView, AirlinesView
 from .customer_views import CustomerView, CustomersView
-from .flight_views import FlightView, FlightsView
+from .flight_views import FlightView, FlightsView, FlightsBulkView, ItinerariesView
 from .ticket_views import TicketView, TicketsView
 from .country_views import CountryView, CountriesView
-from .user_views import LoginView, LogoutView, WhoAmIView, CSRFTokenView, UsersView
\ No newline at end of file
+from .user_views import LoginView, LogoutView, WhoAmIView, CSRFTokenView, UsersView
+from .board_views import FlightBoardView, FlightBoardStreamView
+from .metrics_views import RepositoryMetricsView
+from .export_views import CustomersExportView, FlightsExportView, UsersExportView
\ No newline at end of file
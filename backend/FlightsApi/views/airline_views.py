@@ -7,17 +7,18 @@ from rest_framework.response import Response
 
 from FlightsApi.utils.response_utils import forbidden_response, bad_request_response
 from FlightsApi.utils import StringValidation
+from FlightsApi.utils.async_views import AsyncAPIView
 
 logger = logging.getLogger('django')
 
 
-class AirlinesView(APIView): # /airlines
-    def get(self, request):
+class AirlinesView(AsyncAPIView): # /airlines
+    async def get(self, request):
         """
         GET /airlines - Get all airlines / filter by name
         """
         # Get correct facade
-        facade = AnonymousFacade.login(request)
+        facade = await AnonymousFacade.alogin(request)
         
         # Get all the details
         name = request.GET.get('name', '')
@@ -35,7 +36,7 @@ class AirlinesView(APIView): # /airlines
             return Response(status=code, data=data)
         
         # Call facade and return response
-        code, data = facade.get_airlines_by_name(
+        code, data = await facade.aget_airlines_by_name(
             name=name,
             limit=limit,
             page=page
@@ -0,0 +1,136 @@
+from time import monotonic
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from FlightsApi.facades import AnonymousFacade
+from FlightsApi.repository.country_registry import CountryRegistry
+from FlightsApi.repository.flight_boards import FlightBoards, Board
+from FlightsApi.repository import Paginate
+from FlightsApi.utils.response_utils import bad_request_response
+from FlightsApi.utils.async_views import AsyncAPIView, handler_etag
+
+
+# Clients reconnect after a second when the stream ends
+RETRY = 'retry: 1000\n\n'
+# Keeps proxies from closing an idle connection
+KEEP_ALIVE = ': keep-alive\n\n'
+
+_encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
+def board_etag(request, country_id: int, board: str):
+    if not CountryRegistry.exists(country_id):
+        # Answered with a 404 - the board isn't loaded (and kept) for a country that doesn't exist
+        return None
+    # Responses only change when the board does
+    return FlightBoards.etag(Board(board), country_id)
+
+
+def board_events(board: Board, country_id: int, last_event_id: str = None):
+    """Server-Sent Events of a board - the board's flights whenever they change, for up to settings.FLIGHT_BOARD_STREAM_SECONDS.
+    Each event's ID is the board's ETag, so a reconnecting client (sending it as Last-Event-ID) only gets the board if it changed.
+    Holds the request's thread while waiting for changes, see aboard_events() for ASGI.
+
+    Args:
+        board (Board): ARRIVALS or DEPARTURES.
+        country_id (int): ID of the country.
+        last_event_id (str, optional): The ID of the last event the client received. Defaults to None.
+    """
+    heartbeat = getattr(settings, 'FLIGHT_BOARD_HEARTBEAT', 15)
+    deadline = monotonic() + getattr(settings, 'FLIGHT_BOARD_STREAM_SECONDS', 300)
+    yield RETRY
+    seen = last_event_id
+    while True:
+        flights, current = FlightBoards.get(board, country_id)
+        if current != seen:
+            seen = current
+            yield board_event(flights, current)
+        remaining = deadline - monotonic()
+        if remaining <= 0:
+            return
+        if not FlightBoards.wait(board, country_id, seen, min(heartbeat, remaining)):
+            yield KEEP_ALIVE
+
+
+async def aboard_events(board: Board, country_id: int, last_event_id: str = None):
+    """
+    board_events() as an async generator, waiting for changes on the event loop rather than in a thread.
+    """
+    heartbeat = getattr(settings, 'FLIGHT_BOARD_HEARTBEAT', 15)
+    deadline = monotonic() + getattr(settings, 'FLIGHT_BOARD_STREAM_SECONDS', 300)
+    yield RETRY
+    seen = last_event_id
+    while True:
+        # Reloads the board (in a thread) if it expired
+        flights, current = await sync_to_async(FlightBoards.get)(board, country_id)
+        if current != seen:
+            seen = current
+            yield board_event(flights, current)
+        remaining = deadline - monotonic()
+        if remaining <= 0:
+            return
+        if not await FlightBoards.await_change(board, country_id, seen, min(heartbeat, remaining)):
+            yield KEEP_ALIVE
+
+
+def board_event(flights: list, etag: str) -> str:
+    return f'event: board\nid: {etag}\ndata: {_encoder.encode({"data": flights})}\n\n'
+
+
+class FlightBoardView(APIView): # /boards/<country_id>/(arrivals|departures)
+    @handler_etag(board_etag)
+    def get(self, request, country_id: int, board: str):
+        # Get correct facade
+        facade = AnonymousFacade.login(request)
+        
+        # Validate pagination inputs
+        try:
+            limit = int(request.GET.get('limit', 50))
+        except (TypeError, ValueError):
+            code, data = bad_request_response('Pagination limit is not a valid integer.')
+            return Response(status=code, data=data)
+        try:
+            page = int(request.GET.get('page', 1))
+        except (TypeError, ValueError):
+            code, data = bad_request_response('Pagination page is not a valid integer.')
+            return Response(status=code, data=data)
+        cursor = request.GET.get('cursor')
+        if not Paginate.is_valid_cursor(cursor):
+            code, data = bad_request_response('Pagination cursor is invalid.')
+            return Response(status=code, data=data)
+        
+        code, data = facade.get_flight_board(board, country_id, limit=limit, page=page, cursor=cursor)
+        response = Response(status=code, data=data)
+        if code == 200:
+            patch_cache_control(response, public=True, max_age=getattr(settings, 'FLIGHT_BOARD_MAX_AGE', 15))
+        return response
+
+
+class FlightBoardStreamView(AsyncAPIView): # /boards/<country_id>/(arrivals|departures)/stream
+    async def get(self, request, country_id: int, board: str):
+        # Get correct facade
+        facade = await AnonymousFacade.alogin(request)
+        
+        # Checks that the country exists, and loads the board
+        code, data = await sync_to_async(facade.get_flight_board)(board, country_id, limit=1)
+        if code != 200:
+            return Response(status=code, data=data)
+        
+        last_event_id = request.headers.get('Last-Event-ID')
+        if isinstance(request._request, ASGIRequest):
+            # Waits for changes without holding a thread
+            events = aboard_events(Board(board), country_id, last_event_id)
+        else:
+            events = board_events(Board(board), country_id, last_event_id)
+        response = StreamingHttpResponse(events, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Tells nginx not to buffer the events
+        response['X-Accel-Buffering'] = 'no'
+        return response
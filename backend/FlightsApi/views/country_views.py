@@ -1,14 +1,46 @@
 from ..facades import AnonymousFacade
 
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import etag
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
+from FlightsApi.repository.country_registry import CountryRegistry
 from FlightsApi.utils.response_utils import bad_request_response
+from FlightsApi.utils.async_views import AsyncAPIView, async_etag
 
-class CountriesView(APIView):
-    def get(self, request): # /countries
+
+def countries_etag(request, *args, **kwargs):
+    # Responses only change when the countries do
+    return CountryRegistry.etag()
+
+
+async def countries_aetag(request, *args, **kwargs):
+    await CountryRegistry.aload()
+    return CountryRegistry.etag()
+
+
+def cacheable(response: Response) -> Response:
+    """Lets clients cache a successful countries response.
+
+    Args:
+        response (Response): A response of the country endpoints.
+
+    Returns:
+        Response: The same response.
+    """
+    if response.status_code == 200:
+        patch_cache_control(response, public=True, max_age=getattr(settings, 'COUNTRIES_MAX_AGE', 3600))
+    return response
+
+
+class CountriesView(AsyncAPIView):
+    @async_etag(countries_aetag)
+    async def get(self, request): # /countries
         # Get correct facade
-        facade = AnonymousFacade.login(request)
+        facade = await AnonymousFacade.alogin(request)
         
         # Validate pagination inputs
         try:
@@ -22,14 +54,15 @@ class CountriesView(APIView):
             code, data = bad_request_response('Pagination page is not a valid integer.')
             return Response(status=code, data=data)
         
-        code, data = facade.get_all_countries(limit=limit, page=page)
-        return Response(status=code, data=data)
+        code, data = await facade.aget_all_countries(limit=limit, page=page)
+        return cacheable(Response(status=code, data=data))
     
 class CountryView(APIView):
+    @method_decorator(etag(countries_etag))
     def get(self, request, id: int): # /country/<id>
         # Get correct facade
         facade = AnonymousFacade.login(request)
         
         # Create response
         code, data = facade.get_country_by_id(id)
-        return Response(status=code, data=data)
\ No newline at end of file
+        return cacheable(Response(status=code, data=data))
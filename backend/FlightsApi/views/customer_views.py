@@ -7,6 +7,7 @@ from rest_framework.response import Response
 
 from FlightsApi.utils.response_utils import forbidden_response, bad_request_response
 from FlightsApi.utils import StringValidation
+from FlightsApi.repository import Paginate
 
 logger = logging.getLogger('django')
 
@@ -31,8 +32,13 @@ class CustomersView(APIView): # /customers
         except TypeError:
             code, data = bad_request_response('Pagination page is not a valid integer.')
             return Response(status=code, data=data)
+        cursor = request.GET.get('cursor')
+        if not Paginate.is_valid_cursor(cursor):
+            code, data = bad_request_response('Pagination cursor is invalid.')
+            return Response(status=code, data=data)
+        count_total = request.GET.get('count', '').lower() not in ('0', 'false')
         
-        code, data = facade.get_all_customers(limit=limit, page=page)
+        code, data = facade.get_all_customers(limit=limit, page=page, cursor=cursor, count_total=count_total)
         return Response(status=code, data=data)
         
     
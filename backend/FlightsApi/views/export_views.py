@@ -0,0 +1,70 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.renderers import JSONRenderer
+
+from FlightsApi.utils.response_utils import bad_request_response, forbidden_response
+from FlightsApi.utils.renderers import NDJSONRenderer, CSVRenderer, stream_export
+from FlightsApi.facades import AnonymousFacade, AdministratorFacade
+
+from .flight_views import parse_flight_filters
+
+
+class ExportView(APIView):
+    """
+    Streams a whole table as NDJSON (the default) or CSV, chosen by the Accept header or a 'format' query parameter.
+    Errors are sent as JSON.
+    """
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if isinstance(response, Response):
+            response.accepted_renderer = JSONRenderer()
+            response.accepted_media_type = JSONRenderer.media_type
+        return response
+
+    def export(self, request, code: int, res: dict, filename: str):
+        """
+        Streams a facade's export, or returns its error.
+        """
+        if code != 200:
+            return Response(status=code, data=res)
+        return stream_export(request.accepted_renderer, res['data']['fields'], res['data']['rows'], filename)
+
+
+class CustomersExportView(ExportView): # /export/customers
+    def get(self, request):
+        facade = AnonymousFacade.login(request)
+        if not isinstance(facade, AdministratorFacade):
+            code, res = forbidden_response()
+            return Response(status=code, data=res)
+
+        code, res = facade.export_customers()
+        return self.export(request, code, res, 'customers')
+
+
+class FlightsExportView(ExportView): # /export/flights
+    def get(self, request):
+        facade = AnonymousFacade.login(request)
+        if not isinstance(facade, AdministratorFacade):
+            code, res = forbidden_response()
+            return Response(status=code, data=res)
+
+        filters, error = parse_flight_filters(request.GET)
+        if error:
+            code, res = bad_request_response(error)
+            return Response(status=code, data=res)
+
+        code, res = facade.export_flights(**filters)
+        return self.export(request, code, res, 'flights')
+
+
+class UsersExportView(ExportView): # /export/users/<usertype>
+    def get(self, request, usertype: str):
+        facade = AnonymousFacade.login(request)
+        if not isinstance(facade, AdministratorFacade):
+            code, res = forbidden_response()
+            return Response(status=code, data=res)
+
+        code, res = facade.export_users_by_usertype(usertype)
+        return self.export(request, code, res, usertype)
@@ -4,54 +4,178 @@ from FlightsApi.facades import AnonymousFacade, AirlineFacade
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.parsers import JSONParser
+from rest_framework.exceptions import ParseError
 from dateutil import parser
 from datetime import datetime
+from types import GeneratorType
+from typing import Tuple, Union
 from django.utils import timezone
 
 from FlightsApi.utils.response_utils import bad_request_response, forbidden_response
 from FlightsApi.utils import StringValidation
+from FlightsApi.utils.parsers import NDJSONParser, CSVParser
+from FlightsApi.utils.async_views import AsyncAPIView
+from FlightsApi.repository import Paginate
 
 logger = logging.getLogger('django')
 
-class FlightsView(APIView): # /flights
-    def get(self, request):
-        # Get correct facade
-        facade = AnonymousFacade.login(request)
-        
-        # Validate and fetch request parameters
-        
-        origin_country_id = request.GET.get('origin_country')
-        if origin_country_id:
-            if not StringValidation.is_natural_int(origin_country_id):
-                code, data = bad_request_response("Origin country must be a natural number.")
-                return Response(status=code, data=data)
-            origin_country_id = int(origin_country_id)
-            
-        destination_country_id = request.GET.get('destination_country')
-        if destination_country_id:
-            if not StringValidation.is_natural_int(destination_country_id):
-                code, data = bad_request_response("Destination country must be a natural number.")
-                return Response(status=code, data=data)
-            destination_country_id = int(destination_country_id)
+
+def is_natural(value) -> bool:
+    """Checks if a field is a natural number - an int from a JSON body, or a string from a CSV or form body.
+
+    Args:
+        value (Any): The field's value, as sent by the client.
+
+    Returns:
+        bool: True if the value is a natural number, False otherwise (including booleans, floats, lists and objects).
+    """
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, int):
+        return value > 0
+    return isinstance(value, str) and StringValidation.is_natural_int(value)
+
+
+def validate_new_flight(fields) -> Tuple[Union[dict, None], Union[str, None]]:
+    """Validates the fields of a new flight.
+
+    Args:
+        fields (dict): The flight's fields, as sent by the client.
+
+    Returns:
+        Tuple[Union[dict, None], Union[str, None]]: (Flight, None) with the parsed fields of a valid flight, or (None, Error message).
+    """
+    if not isinstance(fields, dict):
+        return None, "Flight must be an object."
+    
+    # Origin Country Validation
+    origin_country_id = fields.get('origin_country')
+    if not origin_country_id:
+        return None, "Origin country is required."
+    if not is_natural(origin_country_id):
+        return None, "Origin country must be a natural number."
         
-        airline_id = request.GET.get('airline')
-        if airline_id:
-            if not StringValidation.is_natural_int(airline_id):
-                code, data = bad_request_response("Airline must be a natural number.")
-                return Response(status=code, data=data)
-            airline_id = int(airline_id)
+    # Destination Country Validation
+    destination_country_id = fields.get('destination_country')
+    if not destination_country_id:
+        return None, "Destination country is required."
+    if not is_natural(destination_country_id):
+        return None, "Destination country must be a natural number."
+    
+    # Total Seats Validation
+    total_seats = fields.get('total_seats')
+    if not total_seats:
+        return None, "Total seats is required."
+    if not is_natural(total_seats):
+        return None, "Total seats must be a natural number."
+    
+    # Departure DateTime Validation
+    departure_datetime_str = fields.get('departure_datetime')
+    if not departure_datetime_str:
+        return None, "Departure datetime is required."
+    if not isinstance(departure_datetime_str, str):
+        return None, "Departure datetime must be a valid date (formatted in ISO 8601)."
+    try:
+        departure_datetime = parser.parse(departure_datetime_str)
+    except (ValueError, TypeError, OverflowError) as e:
+        logger.debug(e)
+        return None, "Departure datetime must be a valid date (formatted in ISO 8601)."
+    
+    if not datetime.now(tz=departure_datetime.tzinfo) < departure_datetime:
+        return None, "departure_datetime must be in the future."
+
+    # Arrival DateTime Validation
+    arrival_datetime_str = fields.get('arrival_datetime')
+    if not arrival_datetime_str:
+        return None, "Arrival datetime is required."
+    if not isinstance(arrival_datetime_str, str):
+        return None, "Arrival datetime must be a valid date (formatted in ISO 8601)."
+    try:
+        arrival_datetime = parser.parse(arrival_datetime_str)
+    except (ValueError, TypeError, OverflowError) as e:
+        logger.debug(e)
+        return None, "Arrival datetime must be a valid date (formatted in ISO 8601)."
+    
+    if (departure_datetime.tzinfo is None) != (arrival_datetime.tzinfo is None):
+        return None, "Departure and arrival datetimes must both have a time zone, or neither."
+    if not departure_datetime < arrival_datetime:
+        return None, "arrival_datetime must be after departure_datetime."
+
+    return {
+        'origin_country': int(origin_country_id),
+        'destination_country': int(destination_country_id),
+        'departure_datetime': departure_datetime,
+        'arrival_datetime': arrival_datetime,
+        'total_seats': int(total_seats)
+    }, None
+
+
+def parse_flight_filters(params) -> Tuple[Union[dict, None], Union[str, None]]:
+    """Validates the query parameters of a flight search.
+
+    Args:
+        params (QueryDict): The request's query parameters - origin_country, destination_country, airline, date, min_seats and expand.
+
+    Returns:
+        Tuple[Union[dict, None], Union[str, None]]: (Filters, None) with the keyword arguments of get_flights_by_parameters, or (None, Error message).
+    """
+    origin_country_id = params.get('origin_country')
+    if origin_country_id:
+        if not StringValidation.is_natural_int(origin_country_id):
+            return None, "Origin country must be a natural number."
+        origin_country_id = int(origin_country_id)
         
+    destination_country_id = params.get('destination_country')
+    if destination_country_id:
+        if not StringValidation.is_natural_int(destination_country_id):
+            return None, "Destination country must be a natural number."
+        destination_country_id = int(destination_country_id)
+    
+    airline_id = params.get('airline')
+    if airline_id:
+        if not StringValidation.is_natural_int(airline_id):
+            return None, "Airline must be a natural number."
+        airline_id = int(airline_id)
+    
+    date_str = params.get('date')
+    if date_str:
+        try:
+            date = parser.parse(date_str).date()
+        except ValueError as e:
+            logger.info(e)
+            return None, "'date' must be in the ISO 8601 format."
+    else:
+        date = None
+    
+    min_seats = params.get('min_seats')
+    if min_seats:
+        if not StringValidation.is_natural_int(min_seats):
+            return None, "Minimum seats must be a natural number."
+        min_seats = int(min_seats)
+    
+    # Embed airline and country details in the results if requested
+    expand = params.get('expand', '').lower() in ('1', 'true')
+
+    return {
+        'origin_country_id': origin_country_id or None,
+        'destination_country_id': destination_country_id or None,
+        'date': date,
+        'airline_id': airline_id or None,
+        'min_seats': min_seats or None,
+        'expand': expand
+    }, None
+
+class FlightsView(AsyncAPIView): # /flights
+    async def get(self, request):
+        # Get correct facade
+        facade = await AnonymousFacade.alogin(request)
         
-        date_str = request.GET.get('date')
-        if date_str:
-            try:
-                date = parser.parse(date_str).date()
-            except ValueError as e:
-                logger.info(e)
-                code, data = bad_request_response("'date' must be in the ISO 8601 format.")
-                return Response(status=code, data=data)
-        else:
-            date = None
+        # Validate and fetch request parameters
+        filters, error = parse_flight_filters(request.GET)
+        if error:
+            code, data = bad_request_response(error)
+            return Response(status=code, data=data)
         
         # Validate pagination inputs
         try:
@@ -64,14 +188,18 @@ class FlightsView(APIView): # /flights
         except TypeError:
             code, data = bad_request_response('Pagination page is not a valid integer.')
             return Response(status=code, data=data)
+        cursor = request.GET.get('cursor')
+        if not Paginate.is_valid_cursor(cursor):
+            code, data = bad_request_response('Pagination cursor is invalid.')
+            return Response(status=code, data=data)
+        count_total = request.GET.get('count', '').lower() not in ('0', 'false')
 
-        code, data = facade.get_flights_by_parameters(
-            origin_country_id=origin_country_id or None,
-            destination_country_id=destination_country_id or None,
-            date=date,
-            airline_id=airline_id or None,
+        code, data = await facade.aget_flights_by_parameters(
+            **filters,
             limit=limit,
-            page=page
+            page=page,
+            cursor=cursor,
+            count_total=count_total
         )
         return Response(status=code, data=data)
         
@@ -84,79 +212,117 @@ class FlightsView(APIView): # /flights
             code, data = forbidden_response()
             return Response(status=code, data=data)
         
-        # Origin Country Validation
-        origin_country_id = request.data.get('origin_country')
-        if not origin_country_id:
-            code, data = bad_request_response("Origin country is required.")
-            return Response(status=code, data=data)
-        if not StringValidation.is_natural_int(origin_country_id):
-            code, data = bad_request_response("Origin country must be a natural number.")
-            return Response(status=code, data=data)
-            
-        # Destination Country Validation
-        destination_country_id = request.data.get('destination_country')
-        if not destination_country_id:
-            code, data = bad_request_response("Destination country is required.")
-            return Response(status=code, data=data)
-        if not StringValidation.is_natural_int(destination_country_id):
-            code, data = bad_request_response("Destination country must be a natural number.")
+        flight, error = validate_new_flight(request.data)
+        if error:
+            code, data = bad_request_response(error)
             return Response(status=code, data=data)
+
+        code, data = facade.add_flight(
+            origin_id=flight['origin_country'],
+            destination_id=flight['destination_country'],
+            departure_datetime=flight['departure_datetime'],
+            arrival_datetime=flight['arrival_datetime'],
+            total_seats=flight['total_seats']
+        )
+        return Response(status=code, data=data)
+
+
+class FlightsBulkView(APIView): # /flights/bulk
+    # A JSON array, or a stream of flights parsed lazily
+    parser_classes = [JSONParser, NDJSONParser, CSVParser]
+    
+    def post(self, request):
+        # Get correct facade
+        facade = AnonymousFacade.login(request)
         
-        # Total Seats Validation
-        total_seats = request.data.get('total_seats')
-        if not total_seats:
-            code, data = bad_request_response("Total seats is required.")
-            return Response(status=code, data=data)
-        if not StringValidation.is_natural_int(total_seats):
-            code, data = bad_request_response("Total seats must be a natural number.")
+        # Check if the user has the right permissions
+        if not isinstance(facade, AirlineFacade):
+            code, data = forbidden_response()
             return Response(status=code, data=data)
         
-        # Departure DateTime Validation
-        departure_datetime_str = request.data.get('departure_datetime')
-        if not departure_datetime_str:
-            code, data = bad_request_response("Departure datetime is required.")
-            return Response(status=code, data=data)
         try:
-            departure_datetime = parser.parse(departure_datetime_str)
-        except ValueError as e:
-            logger.debug(e)
-            code, data = bad_request_response("Departure datetime must be a valid date (formatted in ISO 8601).")
+            rows = request.data
+            if not isinstance(rows, (list, GeneratorType)):
+                code, data = bad_request_response("Flights must be a JSON array, NDJSON or CSV.")
+                return Response(status=code, data=data)
+            
+            # Validate each flight with the same rules as a single flight
+            flights = []
+            invalid_rows = []
+            for row_number, row in enumerate(rows, start=1):
+                flight, error = validate_new_flight(row)
+                if error:
+                    invalid_rows.append({'row': row_number, 'errors': error})
+                else:
+                    flights.append((row_number, flight))
+        except ParseError as e:
+            code, data = bad_request_response(str(e.detail))
             return Response(status=code, data=data)
         
-        if not datetime.now(tz=departure_datetime.tzinfo) < departure_datetime:
-            code, data = bad_request_response("departure_datetime must be in the future.")
-            return Response(status=code, data=data)
-
-        # Arrival DateTime Validation
-        arrival_datetime_str = request.data.get('arrival_datetime')
-        if not arrival_datetime_str:
-            code, data = bad_request_response("Arrival datetime is required.")
-            return Response(status=code, data=data)
-        try:
-            arrival_datetime = parser.parse(arrival_datetime_str)
-        except ValueError as e:
-            logger.debug(e)
-            code, data = bad_request_response("Arrival datetime must be a valid date (formatted in ISO 8601).")
-            return Response(status=code, data=data)
+        code, data = facade.add_flights(flights, invalid_rows)
+        return Response(status=code, data=data)
+    
+class ItinerariesView(APIView): # /itineraries
+    def get(self, request):
+        # Get correct facade
+        facade = AnonymousFacade.login(request)
         
-        if not departure_datetime < arrival_datetime:
-            code, data = bad_request_response("arrival_datetime must be after departure_datetime.")
+        # Validate and fetch request parameters
+        countries = {}
+        for name in ('origin_country', 'destination_country'):
+            value = request.GET.get(name)
+            if not value or not StringValidation.is_natural_int(value):
+                code, data = bad_request_response(f"'{name}' is required, and must be a natural number.")
+                return Response(status=code, data=data)
+            countries[name] = int(value)
+        
+        dates = {}
+        for name in ('date', 'end_date'):
+            value = request.GET.get(name)
+            if not value:
+                dates[name] = None
+                continue
+            try:
+                dates[name] = parser.parse(value).date()
+            except (ValueError, OverflowError) as e:
+                logger.info(e)
+                code, data = bad_request_response(f"'{name}' must be in the ISO 8601 format.")
+                return Response(status=code, data=data)
+        if dates['date'] is None:
+            code, data = bad_request_response("'date' is required.")
             return Response(status=code, data=data)
+        
+        # Optional numbers, validated in range by the repository
+        options = {}
+        for name in ('max_stops', 'min_connection', 'max_connection', 'seats', 'limit'):
+            value = request.GET.get(name)
+            if value is None:
+                continue
+            if not value.isdigit():
+                code, data = bad_request_response(f"'{name}' must be a whole number.")
+                return Response(status=code, data=data)
+            options[name] = int(value)
+        options['limit'] = min(options.get('limit', 50), 100)
+        
+        # Embed airline and country details in the results if requested
+        expand = request.GET.get('expand', '').lower() in ('1', 'true')
 
-        code, data = facade.add_flight(
-            origin_id=int(origin_country_id),
-            destination_id=int(destination_country_id),
-            departure_datetime=departure_datetime,
-            arrival_datetime=arrival_datetime,
-            total_seats=int(total_seats)
+        code, data = facade.get_itineraries(
+            origin_country_id=countries['origin_country'],
+            destination_country_id=countries['destination_country'],
+            date_from=dates['date'],
+            date_to=dates['end_date'],
+            expand=expand,
+            **options
         )
         return Response(status=code, data=data)
-    
-class FlightView(APIView): # /flight/<id>
-    def get(self, request, id):
-        facade = AnonymousFacade.login(request)
+
+
+class FlightView(AsyncAPIView): # /flight/<id>
+    async def get(self, request, id):
+        facade = await AnonymousFacade.alogin(request)
         
-        code, data = facade.get_flight_by_id(id)
+        code, data = await facade.aget_flight_by_id(id)
         return Response(status=code, data=data)
         
     def patch(self, request, id):
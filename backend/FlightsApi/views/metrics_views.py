@@ -0,0 +1,25 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+
+from FlightsApi.utils.response_utils import forbidden_response
+from FlightsApi.facades import AnonymousFacade, AdministratorFacade
+
+
+class RepositoryMetricsView(APIView):
+    def get(self, request):
+        facade = AnonymousFacade.login(request)
+        if not isinstance(facade, AdministratorFacade):
+            code, res = forbidden_response()
+            return Response(status=code, data=res)
+
+        code, res = facade.get_repository_metrics()
+        return Response(status=code, data=res)
+
+    def delete(self, request):
+        facade = AnonymousFacade.login(request)
+        if not isinstance(facade, AdministratorFacade):
+            code, res = forbidden_response()
+            return Response(status=code, data=res)
+
+        code, res = facade.reset_repository_metrics()
+        return Response(status=code, data=res)
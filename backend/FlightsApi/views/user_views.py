@@ -7,6 +7,8 @@ from django.views.decorators.csrf import csrf_exempt
 from django.middleware.csrf import get_token
 from FlightsApi.utils.response_utils import no_content_ok, forbidden_response, bad_request_response
 from FlightsApi.facades import AnonymousFacade, AdministratorFacade
+from FlightsApi.repository import Paginate
+from FlightsApi.utils.async_views import AsyncAPIView
 
 
 class LogoutView(APIView):
@@ -27,12 +29,14 @@ class LoginView(APIView):
             code, res = bad_request_response("This combination of username and password does not exist.")
             return Response(status=code, data=res)
         login(request, user)
+        # Stores the user's role and profile in the new session
+        AnonymousFacade.login(request)
         code, res = no_content_ok()
         return Response(status=code, data=res)
 
-class WhoAmIView(APIView):
-    def get(self, request):
-        facade = AnonymousFacade.login(request)
+class WhoAmIView(AsyncAPIView):
+    async def get(self, request):
+        facade = await AnonymousFacade.alogin(request)
         code, res = facade.whoami()
         return Response(status=code, data=res)
 
@@ -50,5 +54,22 @@ class UsersView(APIView):
             code, res = forbidden_response()
             return Response(status=code, data=res)
         
-        code, res = facade.get_users_by_usertype(usertype)
+        # Validate pagination inputs
+        try:
+            limit = int(request.GET.get('limit', 50))
+        except (TypeError, ValueError):
+            code, res = bad_request_response('Pagination limit is not a valid integer.')
+            return Response(status=code, data=res)
+        try:
+            page = int(request.GET.get('page', 1))
+        except (TypeError, ValueError):
+            code, res = bad_request_response('Pagination page is not a valid integer.')
+            return Response(status=code, data=res)
+        cursor = request.GET.get('cursor')
+        if not Paginate.is_valid_cursor(cursor):
+            code, res = bad_request_response('Pagination cursor is invalid.')
+            return Response(status=code, data=res)
+        count_total = request.GET.get('count', '').lower() not in ('0', 'false')
+
+        code, res = facade.get_users_by_usertype(usertype, limit=limit, page=page, cursor=cursor, count_total=count_total)
         return Response(status=code, data=res)
\ No newline at end of file
@@ -0,0 +1,370 @@
+"""
+Load test of the API. Seeds a dataset, drives the app through scenarios and reports latency percentiles,
+throughput and SQL queries per request as JSON, so results can be compared across commits.
+
+Targets:
+    In process (default) - a throwaway test database is created and seeded with the generate_data command,
+        and requests go through django.test.Client from --concurrency threads. Queries are counted on the connections.
+    HTTP (--url) - requests go to a running server (ie. gunicorn), seeded beforehand with generate_data, whose output
+        file is passed with --data. Queries are read from the Server-Timing header if the server runs with PROFILING_ENABLED.
+
+    SQLite locks the whole database on writes, so concurrent bookings in process fail with "database table is locked"
+    unless the benchmark runs against PostgreSQL (or with --concurrency 1).
+
+Scenarios:
+    search      Anonymous flight search by route and date
+    boards      Anonymous departures/arrivals of a country on a date
+    booking     Customers booking seats, mostly on a few popular flights (conflicts are expected)
+    schedule    Airlines rescheduling their flights and changing their seat counts
+    users       Admins listing the users of each type
+
+Usage (from the backend directory):
+    python -m benchmarks.api [--scenarios search,booking] [--requests 500] [--concurrency 8] [--output results.json]
+    python -m benchmarks.api --url http://127.0.0.1:8000 --data exposed/generated_data/output.json
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import platform
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+from collections import Counter
+from contextlib import ExitStack
+from datetime import datetime, timedelta, timezone
+from http.cookiejar import CookieJar
+from time import perf_counter
+from urllib.error import HTTPError
+from urllib.request import HTTPCookieProcessor, Request, build_opener
+
+import django
+
+# Setup django environment
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "FlightProject.settings")
+django.setup()
+
+from django.core.management import call_command
+from django.db import connections
+from django.test import Client
+from django.test.utils import setup_test_environment, setup_databases, teardown_databases
+
+from FlightsApi.models import User
+from FlightsApi.utils.profiling import RequestProfile
+
+
+class Dataset():
+    """
+    The seeded entities, read from a generate_data output file.
+    """
+    def __init__(self, path: str, hot_flights: int, seed: int) -> None:
+        with open(path) as file:
+            data = json.load(file)
+        self.admins = data['admins']
+        self.airlines = data['airlines']
+        self.customers = data['customers']
+        self.flights_by_airline = {int(airline_id): flights for airline_id, flights in data['flights'].items() if flights}
+        self.flights = [flight for flights in self.flights_by_airline.values() for flight in flights]
+        if not self.flights:
+            raise ValueError("The dataset has no flights.")
+        # The flights most bookings go to
+        self.hot_flights = random.Random(seed).sample(self.flights, min(hot_flights, len(self.flights)))
+
+    def identities(self, role: str) -> list:
+        """
+        The generated users of a role, alongside their profiles.
+        """
+        match (role):
+            case 'admin':
+                identities = self.admins
+            case 'airline':
+                identities = [airline for airline in self.airlines if airline['airline']['id'] in self.flights_by_airline]
+            case 'customer':
+                identities = self.customers
+            case _:
+                return [None]
+        if not identities:
+            raise ValueError(f"The dataset has no {role} users.")
+        return identities
+
+
+def search_request(rng: random.Random, dataset: Dataset, identity: dict) -> tuple:
+    # Search for an existing flight's route and date, so there's something to find
+    flight = rng.choice(dataset.flights)
+    expand = '&expand=true' if rng.random() < 0.5 else ''
+    return 'GET', f"/api/flights/?origin_country={flight['origin_country']}&destination_country={flight['destination_country']}&date={flight['departure_datetime'][:10]}{expand}", None
+
+
+def board_request(rng: random.Random, dataset: Dataset, identity: dict) -> tuple:
+    flight = rng.choice(dataset.flights)
+    if rng.random() < 0.5:
+        return 'GET', f"/api/flights/?origin_country={flight['origin_country']}&date={flight['departure_datetime'][:10]}&expand=true", None
+    return 'GET', f"/api/flights/?destination_country={flight['destination_country']}&date={flight['arrival_datetime'][:10]}&expand=true", None
+
+
+def booking_request(rng: random.Random, dataset: Dataset, identity: dict) -> tuple:
+    flight = rng.choice(dataset.hot_flights) if rng.random() < 0.8 else rng.choice(dataset.flights)
+    return 'POST', '/api/tickets/', {'flight_id': str(flight['id']), 'seat_count': str(rng.randint(1, 3))}
+
+
+def schedule_request(rng: random.Random, dataset: Dataset, identity: dict) -> tuple:
+    flight = rng.choice(dataset.flights_by_airline[identity['airline']['id']])
+    # Delay the flight by up to an hour (from its generated schedule), the view expects all of its fields
+    delay = timedelta(minutes=rng.randint(0, 60))
+    return 'PATCH', f"/api/flight/{flight['id']}/", {
+        'origin_country': str(flight['origin_country']),
+        'destination_country': str(flight['destination_country']),
+        'departure_datetime': (datetime.fromisoformat(flight['departure_datetime']) + delay).isoformat(),
+        'arrival_datetime': (datetime.fromisoformat(flight['arrival_datetime']) + delay).isoformat(),
+        # Above the generated seat counts, so it's never below the booked seats
+        'total_seats': str(rng.randint(300, 400))
+    }
+
+
+def users_request(rng: random.Random, dataset: Dataset, identity: dict) -> tuple:
+    return 'GET', f"/api/users/{rng.choice(('admins', 'airlines', 'customers'))}/", None
+
+
+# Name -> (Role of the requesting users, Request builder)
+SCENARIOS = {
+    'search': ('anonymous', search_request),
+    'boards': ('anonymous', board_request),
+    'booking': ('customer', booking_request),
+    'schedule': ('airline', schedule_request),
+    'users': ('admin', users_request),
+}
+
+
+class ClientSession():
+    """
+    A user's session in the in-process app.
+    """
+    def __init__(self, identity: dict = None) -> None:
+        self.identity = identity
+        self.client = Client()
+        if identity is not None:
+            self.client.force_login(User.objects.get(pk=identity['user']['id']))
+
+    def request(self, method: str, path: str, body: dict = None) -> tuple:
+        """
+        Returns the response's status code and the amount of queries it took.
+        """
+        profile = RequestProfile()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile))
+            response = self.client.generic(method, path, json.dumps(body) if body is not None else '', content_type='application/json')
+        return response.status_code, profile.queries
+
+
+class HttpSession():
+    """
+    A user's session in a running server.
+    """
+    def __init__(self, url: str, identity: dict = None) -> None:
+        self.identity = identity
+        self.url = url.rstrip('/')
+        self.cookies = CookieJar()
+        self.opener = build_opener(HTTPCookieProcessor(self.cookies))
+        if identity is not None:
+            # Gets the CSRF cookie
+            self.request('GET', '/api/csrf/')
+            status, _ = self.request('POST', '/api/login/', {'username': identity['user']['username'], 'password': identity['user']['password']})
+            if status != 204:
+                raise RuntimeError(f"Failed to log in as '{identity['user']['username']}' ({status}).")
+
+    def request(self, method: str, path: str, body: dict = None) -> tuple:
+        """
+        Returns the response's status code and the amount of queries it took, if reported.
+        """
+        headers = {'Content-Type': 'application/json'}
+        csrf_token = next((cookie.value for cookie in self.cookies if cookie.name == 'csrftoken'), None)
+        if csrf_token:
+            headers['X-CSRFToken'] = csrf_token
+        data = json.dumps(body).encode() if body is not None else None
+        try:
+            with self.opener.open(Request(self.url + path, data=data, headers=headers, method=method), timeout=60) as response:
+                response.read()
+                status, server_timing = response.status, response.headers.get('Server-Timing')
+        except HTTPError as e:
+            e.read()
+            status, server_timing = e.code, e.headers.get('Server-Timing')
+        match = re.search(r'desc="(\d+) queries"', server_timing or '')
+        return status, int(match.group(1)) if match else None
+
+
+def percentile(quantiles: list, p: int) -> float:
+    return round(quantiles[p - 1], 3)
+
+
+def run_scenario(name: str, dataset: Dataset, create_session, options) -> dict:
+    """
+    Runs a scenario's requests from --concurrency threads, each with its own sessions.
+    """
+    role, build_request = SCENARIOS[name]
+    identities = dataset.identities(role)
+    rng = random.Random(f"{options.seed}-{name}")
+    # Sessions aren't thread safe, each worker gets its own
+    sessions_per_worker = max(1, options.sessions // options.concurrency)
+    sessions = [
+        [create_session(rng.choice(identities)) for _ in range(1 if role == 'anonymous' else sessions_per_worker)]
+        for _ in range(options.concurrency)
+    ]
+
+    start_barrier = threading.Barrier(options.concurrency + 1)
+    results = [None] * options.concurrency
+
+    def worker(index: int) -> None:
+        worker_rng = random.Random(f"{options.seed}-{name}-{index}")
+        worker_sessions = sessions[index]
+        count = options.requests // options.concurrency + (1 if index < options.requests % options.concurrency else 0)
+        worker_results = []
+        try:
+            for i in range(options.warmup + count):
+                if i == options.warmup:
+                    start_barrier.wait()
+                session = worker_sessions[i % len(worker_sessions)]
+                method, path, body = build_request(worker_rng, dataset, session.identity)
+                start = perf_counter()
+                try:
+                    status, queries = session.request(method, path, body)
+                except Exception as e:
+                    status, queries = type(e).__name__, None
+                if i >= options.warmup:
+                    worker_results.append((perf_counter() - start, status, queries))
+            if not count:
+                start_barrier.wait()
+        finally:
+            results[index] = worker_results
+            connections.close_all()
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(options.concurrency)]
+    for thread in threads:
+        thread.start()
+    start_barrier.wait()
+    start = perf_counter()
+    for thread in threads:
+        thread.join()
+    duration = perf_counter() - start
+
+    results = [result for worker_results in results for result in worker_results]
+    latencies = [seconds * 1000 for seconds, _, _ in results]
+    quantiles = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+    statuses = Counter(str(status) for _, status, _ in results)
+    queries = [queries for _, _, queries in results if queries is not None]
+    return {
+        'requests': len(results),
+        'concurrency': options.concurrency,
+        'duration_s': round(duration, 3),
+        'throughput_rps': round(len(results) / duration, 2),
+        'latency_ms': {
+            'mean': round(statistics.fmean(latencies), 3),
+            'p50': percentile(quantiles, 50),
+            'p95': percentile(quantiles, 95),
+            'p99': percentile(quantiles, 99),
+            'max': round(max(latencies), 3),
+        },
+        'statuses': dict(sorted(statuses.items())),
+        # Server errors and requests that failed to complete
+        'errors': sum(count for status, count in statuses.items() if not status.isdigit() or int(status) >= 500),
+        'queries_per_request': {
+            'mean': round(statistics.fmean(queries), 2),
+            'max': max(queries)
+        } if queries else None,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help="Comma separated scenarios to run.")
+    parser.add_argument('--requests', type=int, default=500, help="Measured requests per scenario.")
+    parser.add_argument('--concurrency', type=int, default=4, help="Concurrent clients.")
+    parser.add_argument('--warmup', type=int, default=5, help="Unmeasured requests per client before measuring.")
+    parser.add_argument('--sessions', type=int, default=40, help="Logged in users per scenario, split between the clients.")
+    parser.add_argument('--hot-flights', type=int, default=5, help="Amount of popular flights in the booking scenario.")
+    parser.add_argument('--seed', type=int, default=1, help="Random seed, for reproducible data and requests.")
+    parser.add_argument('--url', help="URL of a running server to benchmark, instead of the in-process app.")
+    parser.add_argument('--data', help="generate_data output file of the server's data (required with --url).")
+    parser.add_argument('--admins', type=int, default=5, help="Admins to seed (in process).")
+    parser.add_argument('--airlines', type=int, default=20, help="Airlines to seed (in process).")
+    parser.add_argument('--customers', type=int, default=500, help="Customers to seed (in process).")
+    parser.add_argument('--flights', type=int, default=100, help="Flights per airline to seed (in process).")
+    parser.add_argument('--tickets', type=int, default=5, help="Maximum tickets per flight to seed (in process).")
+    parser.add_argument('--keepdb', action='store_true', help="Keep the test database between runs (in process).")
+    parser.add_argument('--output', help="File to write the results to, defaults to stdout.")
+    options = parser.parse_args()
+
+    scenarios = [name.strip() for name in options.scenarios.split(',') if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(unknown)}.")
+    if options.requests <= 0 or options.concurrency <= 0 or options.sessions <= 0 or options.warmup < 0:
+        parser.error("--requests, --concurrency and --sessions must be positive.")
+    if options.url and not options.data:
+        parser.error("--data is required with --url.")
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'target': options.url or 'in-process',
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'options': {key: value for key, value in vars(options).items() if key != 'output'},
+        },
+        'scenarios': {},
+    }
+
+    old_config = None
+    try:
+        if options.url:
+            dataset = Dataset(options.data, options.hot_flights, options.seed)
+            create_session = lambda identity: HttpSession(options.url, identity)
+        else:
+            setup_test_environment()
+            # 4XX responses are expected (ie. booking conflicts), don't log each of them
+            logging.getLogger('django.request').setLevel(logging.ERROR)
+            old_config = setup_databases(verbosity=0, interactive=False, keepdb=options.keepdb)
+            report['meta']['database'] = connections['default'].vendor
+            with tempfile.TemporaryDirectory() as directory:
+                data_path = os.path.join(directory, 'data.json')
+                print("Seeding the database...", file=sys.stderr)
+                call_command('loaddata', 'countries', verbosity=0)
+                call_command(
+                    'generate_data', admins=options.admins, airlines=options.airlines, customers=options.customers,
+                    flights=options.flights, tickets=options.tickets, seed=options.seed, passwords=1, output=data_path,
+                    stdout=io.StringIO()
+                )
+                dataset = Dataset(data_path, options.hot_flights, options.seed)
+            create_session = ClientSession
+
+        for name in scenarios:
+            print(f"Running '{name}'...", file=sys.stderr)
+            result = report['scenarios'][name] = run_scenario(name, dataset, create_session, options)
+            print(f"  {result['throughput_rps']} req/s, p50 {result['latency_ms']['p50']}ms, p99 {result['latency_ms']['p99']}ms, "
+                  f"{(result['queries_per_request'] or {}).get('mean')} queries/request, statuses {result['statuses']}", file=sys.stderr)
+    finally:
+        if old_config is not None:
+            teardown_databases(old_config, verbosity=0, keepdb=options.keepdb)
+
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(report, output, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Benchmark of the database connection setup cost in request latency. Runs simulated requests (a few queries between
+Django's request_started/request_finished connection handling) from --concurrency threads, with:
+
+    new         CONN_MAX_AGE = 0 - each request opens (and authenticates) a connection and closes it
+    persistent  CONN_MAX_AGE > 0 - each thread keeps its connection (health checked) for its next requests
+    pool        A connection pool shared by the threads (see FlightProject.postgresql_pool)
+
+Connects to the database configured by the settings (POSTGRES_* environment variables), which must be PostgreSQL.
+The difference from the 'new' mode's latency is the connection setup removed from each request.
+Under ASGI every request runs in a new thread, so 'persistent' doesn't apply there - see --fresh-threads.
+
+Usage (from the backend directory):
+    python -m benchmarks.connections [--requests 500] [--concurrency 4] [--queries 3] [--pool-size 4] [--fresh-threads]
+"""
+import argparse
+import copy
+import json
+import os
+import statistics
+import threading
+from time import perf_counter
+
+import django
+
+# Setup django environment
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "FlightProject.settings")
+django.setup()
+
+from django.db import OperationalError, connections
+from django.db.utils import load_backend
+
+MODES = ('new', 'persistent', 'pool')
+
+
+def database_settings(mode: str, options) -> dict:
+    """
+    The default database's settings, configured for a mode.
+    """
+    settings_dict = copy.deepcopy(connections.settings['default'])
+    settings_dict['ENGINE'] = 'FlightProject.postgresql_pool'
+    settings_dict['OPTIONS'].pop('pool', None)
+    match (mode):
+        case 'new':
+            settings_dict['CONN_MAX_AGE'] = 0
+        case 'persistent':
+            settings_dict['CONN_MAX_AGE'] = None
+        case 'pool':
+            settings_dict['CONN_MAX_AGE'] = 0
+            settings_dict['OPTIONS']['pool'] = {'min_size': options.pool_size, 'max_size': options.pool_size}
+    return settings_dict
+
+
+def request(connection, queries: int) -> None:
+    """
+    A request's use of the database, as Django handles its connection.
+    """
+    # request_started
+    connection.close_if_unusable_or_obsolete()
+    for _ in range(queries):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+    # request_finished
+    connection.close_if_unusable_or_obsolete()
+
+
+def run_mode(mode: str, options) -> dict:
+    """
+    Runs a mode's requests from --concurrency threads, and returns their latency percentiles.
+    """
+    settings_dict = database_settings(mode, options)
+    backend = load_backend(settings_dict['ENGINE'])
+    # Each mode gets its own alias, so the pool isn't shared with the app's
+    alias = f'benchmark_{mode}'
+    start_barrier = threading.Barrier(options.concurrency + 1)
+    results = [None] * options.concurrency
+
+    def measure(connection) -> float:
+        start = perf_counter()
+        request(connection, options.queries)
+        return perf_counter() - start
+
+    def measure_in_thread() -> float:
+        # A request in a thread of its own (as under ASGI) - the thread's connection ends with it
+        result = []
+
+        def run() -> None:
+            connection = backend.DatabaseWrapper(settings_dict, alias)
+            result.append(measure(connection))
+            connection.close()
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+        return result[0]
+
+    def worker(index: int) -> None:
+        count = options.requests // options.concurrency + (1 if index < options.requests % options.concurrency else 0)
+        connection = backend.DatabaseWrapper(settings_dict, alias)
+        worker_results = []
+        try:
+            for i in range(options.warmup + count):
+                if i == options.warmup:
+                    start_barrier.wait()
+                seconds = measure_in_thread() if options.fresh_threads else measure(connection)
+                if i >= options.warmup:
+                    worker_results.append(seconds)
+            if not count:
+                start_barrier.wait()
+        except BaseException:
+            # Releases the other threads, the error is reported by the thread
+            start_barrier.abort()
+            raise
+        finally:
+            results[index] = worker_results
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(options.concurrency)]
+    for thread in threads:
+        thread.start()
+    start_barrier.wait()
+    start = perf_counter()
+    for thread in threads:
+        thread.join()
+    duration = perf_counter() - start
+
+    latencies = [seconds * 1000 for worker_results in results for seconds in worker_results]
+    quantiles = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+    result = {
+        'requests': len(latencies),
+        'throughput_rps': round(len(latencies) / duration, 2),
+        'latency_ms': {
+            'mean': round(statistics.fmean(latencies), 3),
+            'p50': round(quantiles[49], 3),
+            'p95': round(quantiles[94], 3),
+            'p99': round(quantiles[98], 3),
+            'max': round(max(latencies), 3),
+        },
+    }
+    pool = backend.DatabaseWrapper._pools.pop(alias, None)
+    if pool is not None:
+        result['pool'] = pool.get_stats()
+        pool.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', default=','.join(MODES), help="Comma separated modes to run.")
+    parser.add_argument('--requests', type=int, default=500, help="Measured requests per mode.")
+    parser.add_argument('--concurrency', type=int, default=4, help="Concurrent threads.")
+    parser.add_argument('--warmup', type=int, default=5, help="Unmeasured requests per thread before measuring.")
+    parser.add_argument('--queries', type=int, default=3, help="Queries per request.")
+    parser.add_argument('--pool-size', type=int, default=4, help="Connections of the pool.")
+    parser.add_argument('--fresh-threads', action='store_true', help="Run each request in a new thread, as under ASGI.")
+    options = parser.parse_args()
+
+    modes = [mode.strip() for mode in options.modes.split(',') if mode.strip()]
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown:
+        parser.error(f"Unknown modes: {', '.join(unknown)}.")
+    if options.requests <= 0 or options.concurrency <= 0 or options.pool_size <= 0 or options.warmup < 0 or options.queries < 0:
+        parser.error("--requests, --concurrency and --pool-size must be positive, --warmup and --queries can't be negative.")
+    if connections['default'].vendor != 'postgresql':
+        parser.error("The benchmark connects to PostgreSQL, set the POSTGRES_* environment variables.")
+    try:
+        connections['default'].ensure_connection()
+    except OperationalError as e:
+        parser.error(f"Failed to connect to the database: {e}")
+    connections['default'].close()
+
+    results = {}
+    for mode in modes:
+        results[mode] = run_mode(mode, options)
+    # The connection setup removed from each request, compared to opening a connection per request
+    if 'new' in results:
+        for result in results.values():
+            result['saved_ms'] = {
+                key: round(results['new']['latency_ms'][key] - result['latency_ms'][key], 3) for key in ('mean', 'p50', 'p99')
+            }
+    print(json.dumps({'options': vars(options), 'modes': results}, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Micro-benchmark of the per-call overhead of `FlightsApi.utils.typechecking.accepts`.
+
+Compares the previous implementation (which inspected the function on every call) with the current one,
+for positional and keyword calls, and with the checks compiled out.
+
+Usage (from the backend directory):
+    python -m benchmarks.typechecking [--calls 1000000]
+"""
+import argparse
+import json
+import os
+import timeit
+from functools import wraps
+from inspect import getargs
+
+import django
+
+# Setup django environment
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "FlightProject.settings")
+django.setup()
+
+from FlightsApi.utils.typechecking import accepts
+from FlightsApi.utils.exceptions import IncorrectTypePassedToFunctionException
+
+
+def legacy_accepts(*types, throw: Exception = IncorrectTypePassedToFunctionException):
+    """
+    The previous implementation of accepts, for comparison.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            expected_args = getargs(func.__code__)[0]
+            expected_arg_count = len(expected_args)
+            actual_arg_count = len(args)
+            arg_list = [*args]
+            for arg_index in range(actual_arg_count, expected_arg_count):
+                if expected_args[arg_index] in kwargs:
+                    arg_list.append(kwargs[expected_args[arg_index]])
+            for type_index in range(len(types)):
+                if not isinstance(arg_list[type_index], types[type_index]):
+                    raise throw("Incorrect type")
+            return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def function(table, id, paginator=None):
+    return id
+
+
+VARIANTS = {
+    'undecorated': function,
+    'legacy': legacy_accepts(str, int)(function),
+    'current': accepts(str, int, enabled=True)(function),
+    'positional_only': accepts(str, int, positional_only=True, enabled=True)(function),
+    'disabled': accepts(str, int, enabled=False)(function),
+}
+
+
+def measure(func, calls: int, keyword: bool) -> float:
+    """
+    Returns the average time of a call in nanoseconds (best of 5 runs).
+    """
+    if keyword:
+        statement = lambda: func('FLIGHT', id=1, paginator=None)
+    else:
+        statement = lambda: func('FLIGHT', 1)
+    return min(timeit.repeat(statement, number=calls, repeat=5)) / calls * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=1000000, help="Calls per measurement.")
+    args = parser.parse_args()
+
+    results = {}
+    for name, func in VARIANTS.items():
+        results[name] = {'positional_ns': round(measure(func, args.calls, False), 1)}
+        if name != 'positional_only':
+            results[name]['keyword_ns'] = round(measure(func, args.calls, True), 1)
+    # Overhead over calling the function directly
+    for name, result in results.items():
+        result['positional_overhead_ns'] = round(result['positional_ns'] - results['undecorated']['positional_ns'], 1)
+        if 'keyword_ns' in result:
+            result['keyword_overhead_ns'] = round(result['keyword_ns'] - results['undecorated']['keyword_ns'], 1)
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -12,4 +12,20 @@ if [ ! -e /$CONTAINER_FIRST_STARTUP ]; then
     python setup_db.py make_superuser_admin
 fi
 # This will run every time
-gunicorn FlightProject.wsgi:application --bind 0.0.0.0:8000
\ No newline at end of file
+# Served with uvicorn workers (ASGI), so the async views wait for the database and slow clients without holding a thread.
+# SERVER_INTERFACE=wsgi serves with gunicorn's sync workers instead.
+if [ "${SERVER_INTERFACE:-asgi}" = "wsgi" ]; then
+    APPLICATION="FlightProject.wsgi:application"
+    WORKER_CLASS="sync"
+else
+    APPLICATION="FlightProject.asgi:application"
+    WORKER_CLASS="uvicorn.workers.UvicornWorker"
+    # Each request runs its queries in a new thread, which can't keep a connection - a pool per worker reuses them
+    export DB_POOL_MAX_SIZE=${DB_POOL_MAX_SIZE:-10}
+fi
+# Deletes the expired sessions in the background, they're otherwise kept in the database
+if [ "${SESSION_SWEEP_INTERVAL:-3600}" != "0" ]; then
+    python manage.py sweep_sessions --interval ${SESSION_SWEEP_INTERVAL:-3600} &
+fi
+# Type checks are kept for development and tests, but skipped when serving
+TYPE_CHECKS_ENABLED=${TYPE_CHECKS_ENABLED:-False} gunicorn $APPLICATION --worker-class $WORKER_CLASS --bind 0.0.0.0:8000
\ No newline at end of file
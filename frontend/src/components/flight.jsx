@@ -32,26 +32,34 @@ export default function Flight({ flightData, allCountries, forceRender }) {
     useEffect(() => {
         setLoadingData(true);
         setOrigin(
-            allCountries.find(
-                country => country.id === flightData.origin_country
-            )
+            flightData.origin_country_details ??
+                allCountries.find(
+                    country => country.id === flightData.origin_country
+                )
         );
         setDestination(
-            allCountries.find(
-                country => country.id === flightData.destination_country
-            )
+            flightData.destination_country_details ??
+                allCountries.find(
+                    country => country.id === flightData.destination_country
+                )
         );
-        API.airline
-            .get(flightData.airline)
-            .then(airlineResponse => {
-                setAirline(airlineResponse.data.data);
-            })
-            .catch(error => {
-                console.log(error.data);
-            })
-            .finally(() => {
-                setLoadingData(false);
-            });
+        if (flightData.airline_name !== undefined) {
+            // Expanded flights already carry the airline's name
+            setAirline({ id: flightData.airline, name: flightData.airline_name });
+            setLoadingData(false);
+        } else {
+            API.airline
+                .get(flightData.airline)
+                .then(airlineResponse => {
+                    setAirline(airlineResponse.data.data);
+                })
+                .catch(error => {
+                    console.log(error.data);
+                })
+                .finally(() => {
+                    setLoadingData(false);
+                });
+        }
 
         switch (login.type) {
             case "airline":
@@ -49,6 +49,7 @@ export default function FlightsPage() {
             .get({
                 limit: 10,
                 page: flightPage ?? 1,
+                expand: true,
                 ...filters,
                 ...forceAirline,
             })
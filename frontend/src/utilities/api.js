@@ -53,7 +53,14 @@ export default class API {
 
     // User endpoints
     users = {
-        get: usertype => axios.get(`${this.API_URL}/users/${usertype}/`, {}),
+        get: (usertype, { limit, page, cursor } = {}) =>
+            axios.get(`${this.API_URL}/users/${usertype}/`, {
+                params: {
+                    limit: limit ?? undefined,
+                    page: page ?? undefined,
+                    cursor: cursor ?? undefined,
+                },
+            }),
     };
 
     // Admin endpoints
@@ -96,13 +103,15 @@ export default class API {
     };
 
     flights = {
-        get: ({ origin, destination, date, airline, page, limit }) =>
+        get: ({ origin, destination, date, airline, minSeats, expand, page, limit }) =>
             axios.get(`${this.API_URL}/flights/`, {
                 params: {
                     origin_country: origin ?? undefined,
                     destination_country: destination ?? undefined,
                     date: date ?? undefined,
                     airline: airline ?? undefined,
+                    min_seats: minSeats ?? undefined,
+                    expand: expand ?? undefined,
                     page: page ?? undefined,
                     limit: limit ?? undefined,
                 },
@@ -110,6 +119,44 @@ export default class API {
         post: params => axios.post(`${this.API_URL}/flights/`, params),
     };
 
+    itineraries = {
+        get: ({ origin, destination, date, endDate, maxStops, seats, expand, limit }) =>
+            axios.get(`${this.API_URL}/itineraries/`, {
+                params: {
+                    origin_country: origin,
+                    destination_country: destination,
+                    date,
+                    end_date: endDate ?? undefined,
+                    max_stops: maxStops ?? undefined,
+                    seats: seats ?? undefined,
+                    expand: expand ?? undefined,
+                    limit: limit ?? undefined,
+                },
+            }),
+    };
+
+    // board is 'arrivals' or 'departures'
+    boards = {
+        get: (country, board, { page, limit } = {}) =>
+            axios.get(`${this.API_URL}/boards/${country}/${board}/`, {
+                params: {
+                    page: page ?? undefined,
+                    limit: limit ?? undefined,
+                },
+            }),
+        // Calls onBoard with the board's flights on connection and whenever they change, returns the EventSource to close
+        stream: (country, board, onBoard) => {
+            const source = new EventSource(
+                `${this.API_URL}/boards/${country}/${board}/stream/`,
+                { withCredentials: true }
+            );
+            source.addEventListener("board", event =>
+                onBoard(JSON.parse(event.data).data)
+            );
+            return source;
+        },
+    };
+
     // Airlines endpoints
     airline = {
         get: id => axios.get(`${this.API_URL}/airline/${id}/`),